@@ -1,17 +1,13 @@
 import sys
-import os
-
-# Add the analysis directory to path
-sys.path.insert(0, r"c:\Users\27885\Desktop\citywalk\情感分析")
 
 # Now try to run the main script
 print("Starting...")
 
-# Import and run main
+# Import and run the command-line entry point (default: the analyze command)
 try:
-    from run_analysis import main
-    print("Imported main function")
-    main()
+    from 情感分析.cli import run
+    print("Imported entry point")
+    run(sys.argv[1:] or ["analyze"])
 except Exception as e:
     print(f"Error: {e}")
     import traceback
@@ -1,15 +1,18 @@
-import subprocess
+import os
 import sys
 
-result = subprocess.run(
-    [sys.executable, r"c:\Users\27885\Desktop\citywalk\情感分析\run_analysis.py"],
-    capture_output=True,
-    text=True,
-    cwd=r"c:\Users\27885\Desktop\citywalk\情感分析"
-)
-
-print("STDOUT:")
-print(result.stdout)
-print("\nSTDERR:")
-print(result.stderr)
-print(f"\nReturn code: {result.returncode}")
+from 情感分析.cli import run
+
+# Run the analysis in this process (no extra interpreter start-up), from the analysis directory
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), "情感分析"))
+
+try:
+    returncode = run(sys.argv[1:] or ["analyze"])
+except SystemExit as e:
+    returncode = e.code
+except Exception:
+    import traceback
+    traceback.print_exc()
+    returncode = 1
+
+print(f"\nReturn code: {returncode}")
@@ -0,0 +1,7 @@
+"""
+上海CityWalk打卡点情感分析
+
+在仓库根目录运行 python -m 情感分析 <命令> [参数]（见 cli.py），或导入各模块，如
+from 情感分析.pipeline import run_analysis；
+包本身不导入任何模块，--help 与只用部分模块时不会加载 pandas / SnowNLP / matplotlib
+"""
@@ -0,0 +1,8 @@
+"""python -m 情感分析 <命令> [参数]，见 cli.py；须在仓库根目录运行（包内有同名模块 情感分析.py）"""
+
+import sys
+
+from .cli import run
+
+
+sys.exit(run())
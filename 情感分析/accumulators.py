@@ -0,0 +1,147 @@
+"""
+打卡点统计累加器
+按块更新、可相互合并的每打卡点充分统计量（样本数、得分和、得分平方和、积极/负面数、得分直方图、最佳示例）
+内存只与打卡点数量有关，与语料规模无关
+"""
+
+import numpy as np
+
+from .aggregate import aggregate_landmarks
+from .ranking import HIST_BINS, rank_landmarks, score_bins
+
+
+class LandmarkAccumulator:
+    """可合并的打卡点运行统计"""
+
+    def __init__(self):
+        self.landmarks = []
+        self._index = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0, dtype=np.float64)
+        self.sumsq = np.zeros(0, dtype=np.float64)
+        self.positive = np.zeros(0, dtype=np.int64)
+        self.negative = np.zeros(0, dtype=np.int64)
+        self.hist = np.zeros((0, HIST_BINS), dtype=np.int64)
+        self.best_score = np.zeros(0, dtype=np.float64)
+        self.best_row = np.zeros(0, dtype=np.int64)
+        self.best_sample = []
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def _ids(self, landmarks):
+        """打卡点名称 -> 全局编号，新打卡点按出现顺序追加"""
+        new = [lm for lm in landmarks if lm not in self._index]
+        if new:
+            for lm in new:
+                self._index[lm] = len(self.landmarks)
+                self.landmarks.append(lm)
+            grow = len(new)
+            self.count = np.concatenate((self.count, np.zeros(grow, dtype=np.int64)))
+            self.total = np.concatenate((self.total, np.zeros(grow)))
+            self.sumsq = np.concatenate((self.sumsq, np.zeros(grow)))
+            self.positive = np.concatenate((self.positive, np.zeros(grow, dtype=np.int64)))
+            self.negative = np.concatenate((self.negative, np.zeros(grow, dtype=np.int64)))
+            self.hist = np.concatenate((self.hist, np.zeros((grow, HIST_BINS), dtype=np.int64)))
+            self.best_score = np.concatenate((self.best_score, np.full(grow, -np.inf)))
+            self.best_row = np.concatenate((self.best_row, np.full(grow, -1, dtype=np.int64)))
+            self.best_sample.extend([None] * grow)
+        return np.array([self._index[lm] for lm in landmarks], dtype=np.intp)
+
+    def add(self, landmarks, count, total, sumsq, positive, negative, best_score, best_row, best_sample, hist=None):
+        """累加一组部分统计（landmarks 内不重复）；hist 为对应的 (len(landmarks), HIST_BINS) 得分直方图"""
+        ids = self._ids(landmarks)
+        self.count[ids] += count
+        self.total[ids] += total
+        self.sumsq[ids] += sumsq
+        self.positive[ids] += positive
+        self.negative[ids] += negative
+        if hist is not None:
+            self.hist[ids] += hist
+        self._update_best(ids, best_score, best_row, best_sample)
+
+    def _update_best(self, ids, best_score, best_row, best_sample):
+        # 严格大于才替换，并列时保留更早出现的示例
+        for i in np.flatnonzero(np.asarray(best_score) > self.best_score[ids]):
+            self.best_score[ids[i]] = best_score[i]
+            self.best_row[ids[i]] = best_row[i]
+            self.best_sample[ids[i]] = best_sample[i]
+
+    def add_chunk(self, incidence, comment_scores, samples, first_row=0, pair_scores=None):
+        """累加一个数据块
+
+        incidence:      该块的评论 -> 打卡点关联表
+        comment_scores: 该块每条评论的得分
+        pair_scores:    与 incidence.pairs() 对齐的每对得分（分句级归因）；给出时代替 comment_scores
+        samples:        该块每条评论的示例文本（通常为原始内容）
+        first_row:      该块第一条评论在整个语料中的行号，用于记录最佳示例的全局编号
+        """
+        if not incidence.landmarks:
+            return
+        comment_ids, landmark_ids = incidence.pairs()
+        scores = comment_scores[comment_ids] if pair_scores is None else np.asarray(pair_scores, dtype=float)
+        stats = aggregate_landmarks(landmark_ids, scores, incidence.n_landmarks)
+        ids = self._ids(incidence.landmarks)
+
+        # 得分和按记录顺序逐条累加到全局统计上（而不是先求块内部分和再相加），
+        # 这样结果与分块方式无关，增量更新与全量重算逐位一致
+        np.add.at(self.total, ids[landmark_ids], scores)
+        np.add.at(self.sumsq, ids[landmark_ids], scores * scores)
+        np.add.at(self.hist, (ids[landmark_ids], score_bins(scores)), 1)
+        self.count[ids] += stats.count
+        self.positive[ids] += stats.positive
+        self.negative[ids] += stats.negative
+        best_rows = comment_ids[stats.best]
+        self._update_best(ids, scores[stats.best], best_rows + first_row,
+                          [samples[r] for r in best_rows])
+
+    def merge(self, other):
+        """合并另一个累加器（例如其他进程/分片的结果）"""
+        self.add(other.landmarks, other.count, other.total, other.sumsq, other.positive, other.negative,
+                 other.best_score, other.best_row, other.best_sample, other.hist)
+        return self
+
+    def mean(self):
+        mean = np.full(len(self), np.nan)
+        np.divide(self.total, self.count, out=mean, where=self.count > 0)
+        return mean
+
+    def std(self):
+        """总体标准差，由平方和与和计算"""
+        var = np.full(len(self), np.nan)
+        np.divide(self.sumsq, self.count, out=var, where=self.count > 0)
+        var -= self.mean() ** 2
+        return np.sqrt(np.maximum(var, 0))
+
+    def robust(self, **options):
+        """收缩得分与置信区间（ranking.RobustStats）；options 见 ranking.rank_landmarks"""
+        return rank_landmarks(self.count, self.total, self.sumsq, self.positive, self.hist, **options)
+
+    def ranked(self):
+        """按样本量降序的打卡点编号（并列时保持首次出现顺序）"""
+        return np.argsort(-self.count, kind='stable')
+
+    def state_dict(self):
+        """导出为 {名称: numpy 数组}，可直接用 np.savez 保存"""
+        return {
+            'landmarks': np.array(self.landmarks, dtype=str),
+            'count': self.count,
+            'total': self.total,
+            'sumsq': self.sumsq,
+            'positive': self.positive,
+            'negative': self.negative,
+            'hist': self.hist,
+            'best_score': self.best_score,
+            'best_row': self.best_row,
+            'best_sample': np.array(['' if s is None else str(s) for s in self.best_sample], dtype=str),
+        }
+
+    @classmethod
+    def from_state_dict(cls, state):
+        acc = cls()
+        acc.landmarks = [str(lm) for lm in state['landmarks']]
+        acc._index = {lm: i for i, lm in enumerate(acc.landmarks)}
+        for name in ('count', 'total', 'sumsq', 'positive', 'negative', 'hist', 'best_score', 'best_row'):
+            setattr(acc, name, np.array(state[name]))
+        acc.best_sample = [str(s) for s in state['best_sample']]
+        return acc
@@ -0,0 +1,42 @@
+"""
+打卡点统计汇总
+按打卡点分组，对情感得分数组做一次性的向量化归约
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+# 各字段均为长度 n_landmarks 的数组；best 为每组得分最高记录在输入中的下标
+LandmarkStats = namedtuple('LandmarkStats', ['count', 'total', 'mean', 'positive', 'negative', 'best'])
+
+POSITIVE_THRESHOLD = 0.6
+NEGATIVE_THRESHOLD = 0.4
+
+
+def aggregate_landmarks(codes, scores, n_landmarks):
+    """按打卡点编号分组统计
+
+    codes:  每条 (打卡点, 评论) 记录的打卡点编号，取值 0..n_landmarks-1
+    scores: 对应记录的情感得分
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    count = np.bincount(codes, minlength=n_landmarks)
+    total = np.bincount(codes, weights=scores, minlength=n_landmarks)
+    positive = np.bincount(codes[scores > POSITIVE_THRESHOLD], minlength=n_landmarks)
+    negative = np.bincount(codes[scores < NEGATIVE_THRESHOLD], minlength=n_landmarks)
+
+    mean = np.full(n_landmarks, np.nan)
+    np.divide(total, count, out=mean, where=count > 0)
+
+    # 组内按得分降序的稳定排序，每组第一条即最高分（并列时取最早出现者，与 np.argmax 一致）
+    order = np.lexsort((-scores, codes))
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    best = np.full(n_landmarks, -1, dtype=np.intp)
+    has_rows = count > 0
+    best[has_rows] = order[starts[has_rows]]
+
+    return LandmarkStats(count, total, mean, positive, negative, best)
@@ -0,0 +1,95 @@
+"""
+Aho-Corasick 多模式匹配自动机
+一次扫描文本即可找出所有关键词（打卡点、情感词等）的出现位置
+"""
+
+import re
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机 - 构建一次，重复扫描"""
+
+    def __init__(self, patterns):
+        # 去重并保持输入顺序，模式编号即在 self.patterns 中的下标
+        self.patterns = [p for p in dict.fromkeys(patterns) if p]
+        self.lengths = [len(p) for p in self.patterns]
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pid, pattern in enumerate(self.patterns):
+            self._insert(pattern, pid)
+        self._build_fail_links()
+
+        # 只有由模式字符组成的连续片段才可能命中，先用正则（C 实现）切出候选片段
+        alphabet = sorted({ch for p in self.patterns for ch in p})
+        if alphabet:
+            char_class = ''.join(re.escape(ch) for ch in alphabet)
+            self._run_re = re.compile(f'[{char_class}]{{{min(self.lengths)},}}')
+        else:
+            self._run_re = None
+
+    def _insert(self, pattern, pid):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (pid,)
+
+    def _build_fail_links(self):
+        """广度优先建立失败指针，并把失败链上的输出合并到当前节点"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def iter_matches(self, text):
+        """生成所有命中 (start, end, pid)，包括相互重叠的命中，按结束位置排列"""
+        if self._run_re is None or not isinstance(text, str):
+            return
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self.lengths
+        for run in self._run_re.finditer(text):
+            base = run.start()
+            node = 0
+            for i, ch in enumerate(run.group()):
+                while node and ch not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(ch, 0)
+                if out[node]:
+                    end = base + i + 1
+                    for pid in out[node]:
+                        yield end - lengths[pid], end, pid
+
+    def find_longest(self, text):
+        """最左最长匹配：返回互不重叠的命中 [(start, end, pid), ...]，按位置排序
+
+        同一位置起始的多个模式取最长者，被更早命中覆盖的短模式不再计入，
+        例如“北外滩”不会同时算作“外滩”。
+        """
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        last_end = 0
+        for start, end, pid in matches:
+            if start >= last_end:
+                selected.append((start, end, pid))
+                last_end = end
+        return selected
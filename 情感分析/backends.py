@@ -0,0 +1,159 @@
+"""
+打分后端注册表
+各分析脚本的情感打分器统一为“批量打分函数 score_many(texts) -> BatchScores”，并声明成本特征：
+单条评论的典型打分耗时、每个进程加载模型/词典的耗时、打分用原文还是预处理后的文本、是否值得持久化缓存。
+ScoringEngine 按成本特征决定进程内打分还是进程池、每批条数以及是否经 SentimentCache；
+换打分器只需换后端名称（各命令的 --analyzer），不必换脚本。
+注册表本身不导入 numpy 或任何打分器，命令行解析参数时可以直接列出可选后端
+"""
+
+import importlib
+import os
+
+
+# 单条打分低于该耗时（微秒）的后端在进程内打分：把文本传给子进程的开销与打分本身相当
+PARALLEL_MIN_COST_US = 1000
+# 进程池每批的目标耗时（秒），批次过小时进程间传输占比变大，过大时负载不均
+TARGET_BATCH_SECONDS = 0.5
+MIN_BATCH_SIZE = 64
+
+
+def _resolve(path):
+    """'模块:属性' -> 对象，模块为本包内的模块名；后端只记路径，注册表本身不导入任何打分器"""
+    module, _, attr = path.partition(':')
+    return getattr(importlib.import_module(f'.{module}', __package__), attr)
+
+
+class _Factory:
+    """可被 pickle 的打分器工厂，传给进程池后在 worker 内按路径导入"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        return _resolve(self.path)()
+
+
+class Backend:
+    """打分后端
+
+    name:      注册名，即命令行 --analyzer 的取值
+    factory:   '模块:函数'，无参调用返回批量打分函数（每个进程调用一次）
+    cost_us:   单条评论的典型打分耗时（微秒）
+    startup_s: 每个进程加载模型/词典的耗时（秒）
+    text:      'raw' 对原文打分，'processed' 对 normalize_series 预处理后的文本打分
+    version:   '模块:函数'，返回模型/词典版本，用作得分缓存键和增量状态指纹
+    cache:     是否把得分写入 SentimentCache（只对昂贵的后端值得）
+    """
+
+    def __init__(self, name, factory, description, cost_us, startup_s=0.0, text='processed',
+                 version=None, cache=False):
+        if text not in ('raw', 'processed'):
+            raise ValueError(f"text 只能是 'raw' 或 'processed': {text}")
+        self.name = name
+        self.factory = factory
+        self.description = description
+        self.cost_us = cost_us
+        self.startup_s = startup_s
+        self.text = text
+        self.version = version
+        self.cache = cache
+
+    def create(self):
+        """在当前进程创建批量打分函数"""
+        return _resolve(self.factory)()
+
+    def model_version(self):
+        return str(_resolve(self.version)()) if self.version else self.name
+
+    def __repr__(self):
+        return f"Backend({self.name!r}, cost_us={self.cost_us}, text={self.text!r})"
+
+
+BACKENDS = {}
+
+
+def register(backend):
+    """注册后端，同名覆盖"""
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name):
+    if isinstance(name, Backend):
+        return name
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的打分后端: {name}，可选: {', '.join(BACKENDS)}") from None
+
+
+register(Backend('builtin', '情感分析:make_scorer', '情感分析.py 的内置情感词（扫描匹配）',
+                 cost_us=5, text='raw', version='情感分析:lexicon_version'))
+register(Backend('citywalk', 'citywalk_analysis:make_scorer', 'citywalk_analysis.py 的扩展情感词（扫描匹配）',
+                 cost_us=5, version='citywalk_analysis:lexicon_version'))
+register(Backend('full', '情感分析:make_full_scorer', '完整打标词表，双数组 Trie 匹配',
+                 cost_us=15, startup_s=2.0, text='raw', version='情感分析:full_lexicon_version'))
+register(Backend('snownlp', 'sentiment_analysis:make_scorer', 'SnowNLP 朴素贝叶斯情感模型',
+                 cost_us=20000, startup_s=3.0, version='sentiment_analysis:snownlp_model_version', cache=True))
+
+
+def plan(backend, workers=None):
+    """按后端成本特征决定 (进程数, 进程池每批条数)
+
+    workers 为 None 时自动选择：便宜的后端进程内打分，昂贵的后端使用全部 CPU；
+    显式给出时照用（0 表示全部 CPU）。每批条数只是上限（约 TARGET_BATCH_SECONDS 的打分量），
+    ParallelScorer 每次调用再按文本数与进程数切小，词典类后端显式 --workers N 时同样分到 N 个进程
+    """
+    backend = get_backend(backend)
+    cpus = os.cpu_count() or 1
+    if workers is None:
+        workers = cpus if backend.cost_us >= PARALLEL_MIN_COST_US else 1
+    workers = workers or cpus
+    if workers <= 1:
+        return 1, None
+    return workers, max(MIN_BATCH_SIZE, int(TARGET_BATCH_SECONDS * 1e6 / backend.cost_us))
+
+
+class ScoringEngine:
+    """按后端打分：batch = engine(texts)
+
+    进程数与批大小见 plan；后端声明 cache 时经 SentimentCache，只为未命中的文本调用打分器，
+    全部命中时不会加载模型
+    """
+
+    def __init__(self, backend, workers=None, cache_path=None):
+        from .parallel_scoring import ParallelScorer
+        self.backend = get_backend(backend)
+        self.workers, self.batch_size = plan(self.backend, workers)
+        self._scorer = ParallelScorer(_Factory(self.backend.factory), self.workers, self.batch_size)
+        self.cache = None
+        score_many = self._scorer
+        if self.backend.cache:
+            from .sentiment_cache import DEFAULT_CACHE_PATH, SentimentCache
+            self.cache = SentimentCache(cache_path or DEFAULT_CACHE_PATH, model_version=self.backend.model_version())
+            score_many = self.cache.wrap(score_many)
+        self._score_many = score_many
+
+    def __call__(self, texts):
+        return self._score_many(texts)
+
+    def describe(self):
+        mode = (f"进程池 {self.workers} 进程，每批 {self.batch_size} 条" if self.workers > 1 else '进程内')
+        cache = '，得分缓存' if self.cache else ''
+        return f"打分后端 {self.backend.name}（{self.backend.description}）：{mode}{cache}"
+
+    def report(self):
+        """缓存命中统计；未使用缓存时为 None"""
+        return self.cache.report() if self.cache else None
+
+    def close(self):
+        self._scorer.close()
+        if self.cache:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
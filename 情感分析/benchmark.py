@@ -0,0 +1,328 @@
+"""
+分析流程基准测试
+经 情感分析.py 的 main()（pipeline.run_analysis 的共用流程）运行，由运行报告取各阶段耗时：
+读取、预处理、提取打卡点、情感打分、累加统计、区域汇总、汇总、写 CSV、趋势表、绘图；
+语料由样本评论的句子随机拼接生成（默认 1 万 / 10 万 / 100 万条），
+记录吞吐量、单条评论打分延迟的 p50 / p95 和峰值内存，结果保存为 JSON，可与上一次结果对比并标出退化；
+另记录启动耗时：各入口模块 python -X importtime 的导入耗时及最重的直接依赖、python -m 情感分析 --help 的总耗时
+
+每个 (打分器, 规模) 组合在独立子进程中运行，峰值内存互不影响
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .backends import BACKENDS, get_backend
+from .instrumentation import peak_rss_mb
+
+
+# pipeline.run_analysis 的运行报告阶段（areas 为 情感分析.py 的区域汇总）
+STAGES = ('load', 'preprocess', 'extract', 'score', 'accumulate', 'areas', 'aggregate', 'write_csv', 'trends', 'plot')
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_ANALYZERS = ('builtin', 'snownlp')
+ANALYZERS = tuple(BACKENDS)
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_TOLERANCE = 0.15
+DEFAULT_LATENCY_SAMPLE = 2000
+# 阶段耗时低于该值（秒）时不判定退化，避免计时噪声
+MIN_SECONDS = 0.05
+STARTUP_MODULES = ('cli', 'citywalk_analysis', 'sentiment_analysis', '情感分析')
+STARTUP_REPEAT = 3
+STARTUP_TOP = 5
+# 启动耗时增加不足该值（毫秒）时不判定退化，几十毫秒量级的计时抖动很大
+MIN_STARTUP_MS = 50
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据', '去重后的数据.xlsx')
+_CLAUSE_END = re.compile(r'(?<=[。！？!?；;，,\n])')
+_IMPORTTIME = re.compile(r'import time:\s+\d+ \|\s+(\d+) \| ( *)(\S.*)$')
+# 子进程在仓库根目录以 python -m 情感分析... 的形式启动
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_texts(path=SAMPLE_PATH):
+    """样本评论；数据文件不存在时退回 情感分析.py 的示例数据"""
+    from .ingest import find_content_column, read_excel_cached
+    try:
+        df = read_excel_cached(path)
+        column = find_content_column(df.columns) or df.columns[-1]
+        return df[column].dropna().astype(str).tolist()
+    except FileNotFoundError:
+        from .情感分析 import load_data
+        return load_data()['content'].astype(str).tolist()
+
+
+def synthetic_corpus(texts, n, seed=0):
+    """由样本评论生成 n 条合成评论：把样本切成分句，每条评论随机拼接 1-8 个分句"""
+    clauses = [c for t in texts for c in _CLAUSE_END.split(t) if c.strip()]
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 9, size=n)
+    picks = rng.integers(0, len(clauses), size=int(lengths.sum()))
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    contents = [''.join(clauses[i] for i in picks[bounds[k]:bounds[k + 1]]) for k in range(n)]
+    return pd.DataFrame({'发布时间': ['12月01日 12:00'] * n, '博文内容': contents})
+
+
+def _analyzer(name):
+    """打分后端名称 -> (批量打分函数, 单条打分函数)
+
+    词典类后端的批量函数是分析器的 analyze_many，单条用同一分析器的 analyze；其余经批量接口逐条打分
+    """
+    score_many = get_backend(name).create()
+    score_one = getattr(getattr(score_many, '__self__', None), 'analyze', None)
+    return score_many, score_one or (lambda text: score_many([text]).score[0])
+
+
+def run_once(analyzer, corpus_path, work_dir, latency_sample=DEFAULT_LATENCY_SAMPLE):
+    """经 情感分析.py 的 main()（即 pipeline.run_analysis，默认按整条评论归因）流式读取语料跑一遍，
+    由运行报告取各阶段耗时，返回一条结果记录"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from contextlib import redirect_stdout
+    from .gazetteer import GAZETTEER
+    from .ingest import find_content_column, read_excel_cached
+    from .情感分析 import main as analyze
+
+    out_dir = tempfile.mkdtemp(prefix=f'{analyzer}_', dir=work_dir)
+    report_path = os.path.join(out_dir, 'report.json')
+    # 流程的输出改走 stderr，stdout 只留结果记录
+    with redirect_stdout(sys.stderr):
+        analyze(analyzer, input_path=corpus_path, output_dir=out_dir, report_path=report_path)
+    with open(report_path, encoding='utf-8') as f:
+        report = json.load(f)
+    timings = {stage: report['stages'].get(stage, {}).get('seconds', 0.0) for stage in STAGES}
+    counters = report['counters']
+    size = counters['comments']
+
+    # 单条延迟：对提及打卡点的评论抽样逐条打分（不计入流程耗时）
+    _, score_one = _analyzer(analyzer)
+    df = read_excel_cached(corpus_path, cache_dir=out_dir)
+    contents = df[find_content_column(df.columns)].astype(str).to_numpy()
+    matcher = GAZETTEER.matcher()
+    rng = np.random.default_rng(0)
+    sample = [text for text in contents[rng.permutation(len(contents))[:latency_sample * 4]]
+              if matcher.match(text)][:latency_sample]
+    latencies = np.empty(len(sample))
+    for i, text in enumerate(sample):
+        start = time.perf_counter_ns()
+        score_one(text)
+        latencies[i] = (time.perf_counter_ns() - start) / 1000
+
+    total = report['elapsed_seconds']
+    mentioned = counters.get('mentioned', 0)
+    return {
+        'analyzer': analyzer,
+        'size': size,
+        'mentioned': int(mentioned),
+        'landmarks': int(counters.get('landmarks', 0)),
+        'stages': {stage: round(timings[stage], 4) for stage in STAGES},
+        'total_seconds': round(total, 4),
+        'throughput': round(size / total, 1) if total else None,
+        'score_throughput': round(mentioned / timings['score'], 1) if timings['score'] else None,
+        'latency_p50_us': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        'latency_p95_us': round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _run_child(analyzer, corpus_path, work_dir, latency_sample):
+    """在子进程中运行一次，返回结果记录"""
+    cmd = [sys.executable, '-m', f'{__package__}.benchmark', '--child', analyzer,
+           os.path.abspath(corpus_path), '--workdir', os.path.abspath(work_dir), '--latency-sample', str(latency_sample)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{analyzer} 基准测试失败:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_profile(module, repeat=STARTUP_REPEAT):
+    """在新解释器中用 python -X importtime 导入本包的 module（取 repeat 次中最快的一次）
+
+    返回 {'import_ms': 总耗时, 'top': {直接依赖: 累计耗时}}，只保留最耗时的 STARTUP_TOP 个依赖
+    """
+    best, qualified = None, f'{__package__}.{module}'
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {qualified}'],
+                              capture_output=True, text=True, encoding='utf-8', cwd=ROOT)
+        if proc.returncode != 0:
+            raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+        total, children, pending = None, {}, {}
+        # importtime 先输出子模块再输出父模块；缩进 2 格为顶层导入的直接依赖
+        for line in proc.stderr.splitlines():
+            match = _IMPORTTIME.match(line)
+            if not match:
+                continue
+            cumulative, depth, name = int(match.group(1)) / 1000, len(match.group(2)) // 2, match.group(3)
+            if depth == 1:
+                pending[name] = cumulative
+            elif depth == 0:
+                if name == qualified:
+                    total, children = cumulative, pending
+                pending = {}
+        if total is not None and (best is None or total < best['import_ms']):
+            top = sorted(children.items(), key=lambda item: -item[1])[:STARTUP_TOP]
+            best = {'import_ms': round(total, 1), 'top': {name: round(ms, 1) for name, ms in top}}
+    return best
+
+
+def cli_help_ms(repeat=STARTUP_REPEAT):
+    """python -m 情感分析 --help 的总耗时（含解释器启动），取最快的一次 (ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', __package__, '--help'], capture_output=True, cwd=ROOT, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return round(min(times), 1)
+
+
+def measure_startup(modules=STARTUP_MODULES):
+    return {'cli_help_ms': cli_help_ms(), 'imports': {module: import_profile(module) for module in modules}}
+
+
+def format_startup(startup):
+    lines = [f"[启动] -m {__package__} --help {startup['cli_help_ms']:.0f}ms"]
+    for module, profile in startup['imports'].items():
+        top = ', '.join(f"{name} {ms:.0f}ms" for name, ms in profile['top'].items())
+        lines.append(f"[启动] import {module} {profile['import_ms']:.0f}ms ({top})")
+    return '\n'.join(lines)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(sizes=DEFAULT_SIZES, analyzers=DEFAULT_ANALYZERS, work_dir=None,
+              latency_sample=DEFAULT_LATENCY_SAMPLE, verbose=True, startup=True):
+    """先测启动耗时，再对每个规模生成一次语料，依次用各打分器测试；返回可直接写成 JSON 的报告"""
+    startup_report = measure_startup() if startup else None
+    if startup_report and verbose:
+        print(format_startup(startup_report), flush=True)
+    work_dir = work_dir or tempfile.mkdtemp(prefix='citywalk_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+    texts = sample_texts() if sizes else []
+    runs = []
+    for size in sizes:
+        corpus_path = os.path.join(work_dir, f'corpus_{size}.xlsx')
+        if not os.path.exists(corpus_path):
+            if verbose:
+                print(f"生成 {size} 条合成评论 -> {corpus_path}", flush=True)
+            synthetic_corpus(texts, size).to_excel(corpus_path, index=False)
+        for analyzer in analyzers:
+            run = _run_child(analyzer, corpus_path, work_dir, latency_sample)
+            runs.append(run)
+            if verbose:
+                print(format_run(run), flush=True)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'startup': startup_report,
+        'runs': runs,
+    }
+
+
+def format_run(run):
+    stages = ' '.join(f"{stage}={run['stages'][stage]:.2f}s" for stage in STAGES)
+    rss = f"{run['peak_rss_mb']:.0f}MB" if run['peak_rss_mb'] is not None else '-'
+    return (f"[{run['analyzer']} x {run['size']}] {stages} | {run['throughput']:.0f} 条/s | "
+            f"p50 {run['latency_p50_us']}us p95 {run['latency_p95_us']}us | 峰值内存 {rss}")
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """与基线报告对比，返回退化描述列表（阶段耗时、p95 延迟、峰值内存或启动耗时超过基线 tolerance 比例）"""
+    regressions = _compare_startup(report.get('startup'), baseline.get('startup'), tolerance)
+    previous = {(r['analyzer'], r['size']): r for r in baseline.get('runs', [])}
+    for run in report['runs']:
+        old = previous.get((run['analyzer'], run['size']))
+        if old is None:
+            continue
+        label = f"{run['analyzer']} x {run['size']}"
+        for stage in STAGES:
+            now, before = run['stages'].get(stage), old['stages'].get(stage)
+            if now is None or before is None or max(now, before) < MIN_SECONDS:
+                continue
+            if now > before * (1 + tolerance):
+                regressions.append(f"{label} {stage}: {before:.3f}s -> {now:.3f}s (+{now / before - 1:.0%})")
+        for key, unit in (('latency_p95_us', 'us'), ('peak_rss_mb', 'MB')):
+            now, before = run.get(key), old.get(key)
+            if now and before and now > before * (1 + tolerance):
+                regressions.append(f"{label} {key}: {before:.1f}{unit} -> {now:.1f}{unit} (+{now / before - 1:.0%})")
+    return regressions
+
+
+def _compare_startup(startup, baseline, tolerance):
+    if not startup or not baseline:
+        return []
+    pairs = [(f'-m {__package__} --help', startup['cli_help_ms'], baseline.get('cli_help_ms'))]
+    for module, profile in startup['imports'].items():
+        old = baseline.get('imports', {}).get(module)
+        pairs.append((f"import {module}", profile['import_ms'], old and old['import_ms']))
+    regressions = []
+    for label, now, before in pairs:
+        if before and now - before >= MIN_STARTUP_MS and now > before * (1 + tolerance):
+            regressions.append(f"启动 {label}: {before:.0f}ms -> {now:.0f}ms (+{now / before - 1:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog=f'python -m {__package__}.benchmark', description='分析流程基准测试')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help='语料规模（逗号分隔）')
+    parser.add_argument('--analyzers', default=','.join(DEFAULT_ANALYZERS),
+                        help=f"打分器（逗号分隔，可选 {', '.join(ANALYZERS)}）")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'结果 JSON（默认 {DEFAULT_OUTPUT}）')
+    parser.add_argument('--baseline', help='与该 JSON 对比，出现退化时以状态码 1 退出')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的变慢比例（默认 0.15）')
+    parser.add_argument('--workdir', help='合成语料与中间文件目录（默认临时目录，可复用已生成的语料）')
+    parser.add_argument('--latency-sample', type=int, default=DEFAULT_LATENCY_SAMPLE, help='逐条计时的评论数')
+    startup_group = parser.add_mutually_exclusive_group()
+    startup_group.add_argument('--startup-only', action='store_true', help='只测启动耗时（导入耗时与 --help）')
+    startup_group.add_argument('--no-startup', dest='startup', action='store_false', help='不测启动耗时')
+    parser.add_argument('--child', nargs=2, metavar=('ANALYZER', 'CORPUS'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        analyzer, corpus_path = args.child
+        print(json.dumps(run_once(analyzer, corpus_path, args.workdir, args.latency_sample)))
+        return 0
+
+    analyzers = [a for a in args.analyzers.split(',') if a]
+    unknown = set(analyzers) - set(ANALYZERS)
+    if unknown:
+        parser.error(f"未知的打分器: {', '.join(sorted(unknown))}")
+    sizes = [] if args.startup_only else [int(s) for s in args.sizes.split(',') if s]
+
+    report = run_suite(sizes, analyzers, args.workdir, args.latency_sample, startup=args.startup)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"发现 {len(regressions)} 项退化（容差 {args.tolerance:.0%}）:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"与基线相比无退化（容差 {args.tolerance:.0%}）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+分句级情感归因
+评论先按中文标点切成分句（在预处理去掉标点之前），每个分句只打分一次；
+评论提及的每个打卡点取它所在分句的得分（可选：前后若干分句按距离衰减加权），而不是把整条评论的得分记给所有打卡点；
+所在分句（及窗口）没有命中情感词时，退回同一评论中最近的有情感词的分句，整条评论的分句都没有时取整条评论的得分。
+切分、预处理、匹配都对整块评论一次完成，只为提及打卡点的分句（及其窗口）打分，需要退回时才为该评论的其余分句打分
+"""
+
+import re
+from collections import namedtuple
+from itertools import chain
+
+import numpy as np
+
+from .comment_table import LandmarkIncidence, score_comments
+from .instrumentation import RunReport
+from .text_normalizer import normalize_series
+
+
+ATTRIBUTIONS = ('clause', 'post')
+# 句读与分隔符：中英文句号、问号、叹号、分号、逗号、顿号、全角冒号、换行、省略号、波浪号
+# （半角冒号不算，以免切断网址和时间）
+CLAUSE_BREAK = re.compile(r'[。！？!?；;，,、：\n\r…～~]+')
+DEFAULT_WINDOW = 0
+DEFAULT_DECAY = 0.5
+
+# incidence:      评论 -> 打卡点关联表，同一评论对同一打卡点只出现一次
+# pair_scores:    与 incidence.pairs() 对齐的每对得分
+# comment_scores: 每条评论的得分（其各对得分的均值，未提及打卡点的评论为 NaN）
+MentionScores = namedtuple('MentionScores', ['incidence', 'pair_scores', 'comment_scores', 'n_clauses', 'n_scored'])
+
+
+def split_clauses(texts):
+    """评论 -> (每个分句所属评论的行号, 分句原文)，按评论、再按出现顺序排列；空分句和非字符串评论被丢弃"""
+    pieces = [[c for c in CLAUSE_BREAK.split(t) if c] if type(t) is str else [] for t in texts]
+    post = np.repeat(np.arange(len(pieces), dtype=np.int64), [len(p) for p in pieces])
+    clauses = np.empty(len(post), dtype=object)
+    clauses[:] = list(chain.from_iterable(pieces))
+    return post, clauses
+
+
+def _match_clauses(post, clauses, matcher):
+    """逐评论扫描一次（分句以换行连接，模式不会跨分句命中），按命中位置归到分句
+
+    返回 (打卡点标准名列表, 命中的分句下标, 打卡点编号)，同一分句重复提及只记一次
+    """
+    starts = np.flatnonzero(np.r_[True, post[1:] != post[:-1]]) if len(post) else np.zeros(0, dtype=np.intp)
+    ends = np.r_[starts[1:], len(post)]
+    landmark_ids = {}
+    hits = {}
+    for first, last in zip(starts.tolist(), ends.tolist()):
+        parts = clauses[first:last]
+        found = matcher.find('\n'.join(parts))
+        if not found:
+            continue
+        offsets = np.cumsum([len(p) + 1 for p in parts])
+        for (landmark, pos), k in zip(found, np.searchsorted(offsets, [pos for _, pos in found], side='right')):
+            lid = landmark_ids.setdefault(landmark, len(landmark_ids))
+            hits[(first + int(k), lid)] = None
+    pairs = np.array(list(hits), dtype=np.int64).reshape(-1, 2)
+    return list(landmark_ids), pairs[:, 0], pairs[:, 1]
+
+
+def _same_post_neighbors(rows, post, shift):
+    """rows 各分句向后（shift>0）或向前第 |shift| 个分句，只保留同一评论内的；返回 (掩码, 邻句行号)"""
+    src = rows + shift
+    ok = (src >= 0) & (src < len(post))
+    ok[ok] = post[src[ok]] == post[rows[ok]]
+    return ok, src[ok]
+
+
+def _nearest_signal(rows, post, signal):
+    """rows 各分句在同一评论内最近的有情感信号的分句行号（距离相同时取前一个），没有时为 -1"""
+    nearest = np.full(len(rows), -1, dtype=np.int64)
+    pending = np.arange(len(rows))
+    d = 1
+    while len(pending):
+        alive = np.zeros(len(pending), dtype=bool)
+        for shift in (-d, d):
+            ok, src = _same_post_neighbors(rows[pending], post, shift)
+            alive |= ok
+            target = np.full(len(pending), -1, dtype=np.int64)
+            target[ok] = src
+            found = np.zeros(len(pending), dtype=bool)
+            found[ok] = signal[src]
+            nearest[pending[found]] = target[found]
+            pending, alive = pending[~found], alive[~found]
+        # 两侧都已越过评论边界的不会再找到
+        pending = pending[alive]
+        d += 1
+    return nearest
+
+
+def score_mentions(texts, matcher, score_many, text='processed', window=DEFAULT_WINDOW, decay=DEFAULT_DECAY,
+                   match='processed', rows=None, run=None, fallback=True):
+    """分句级归因的打卡点得分
+
+    texts:      评论原文
+    matcher:    LandmarkMatcher
+    score_many: 批量打分函数（可以是 ScoringEngine），分句去重后只调用一次
+    text:       'processed' 对预处理后的分句打分，'raw' 对分句原文打分（见 Backend.text）
+    window:     0 时每次提及取所在分句的得分；>0 时取前后 window 个同评论分句的加权平均，权重 decay**距离
+    match:      'processed' 在预处理后的分句上匹配打卡点，'raw' 在分句原文上匹配
+    rows:       只切分这些评论（通常是整条评论已匹配到打卡点的行），其余评论不会有分句命中，不必再扫描
+    run:        RunReport，切分/匹配/打分分别记为 preprocess / extract / score 阶段
+    fallback:   所在分句及窗口内都没有情感信号（见 score_comments）时，改取同一评论中最近的有信号分句的得分，
+                评论的分句都没有信号时取整条评论的得分；False 时保留无信号分句的默认得分 0.5
+    同一评论在多个分句中提及同一打卡点时取各次得分的均值
+    """
+    run = run or RunReport('score_mentions')
+    n_posts = len(texts)
+    texts = np.asarray(texts, dtype=object)
+    rows = np.arange(n_posts) if rows is None else np.asarray(rows, dtype=np.int64)
+    with run.span('preprocess', rows=len(rows)):
+        post, raw = split_clauses(texts[rows])
+        post = rows[post]
+        processed = normalize_series(raw).to_numpy()
+    with run.span('extract', rows=len(raw)):
+        landmarks, clause_rows, landmark_ids = _match_clauses(post, raw if match == 'raw' else processed, matcher)
+    mentioned = np.unique(clause_rows)
+
+    # 需要打分的分句：提及打卡点的分句，以及窗口内的同评论分句
+    need = np.zeros(len(raw), dtype=bool)
+    need[mentioned] = True
+    for d in range(1, window + 1):
+        for shift in (d, -d):
+            need[_same_post_neighbors(mentioned, post, shift)[1]] = True
+    scored = np.flatnonzero(need)
+    score_text = raw if text == 'raw' else processed
+    clause_scores = np.full(len(raw), np.nan)
+    signal = np.zeros(len(raw), dtype=bool)
+    with run.span('score', rows=len(scored)):
+        clause_scores[scored], signal[scored] = score_comments(score_text[scored], score_many, with_signal=True)
+    n_scored = len(scored)
+
+    mention_scores = clause_scores[clause_rows]
+    has_signal = signal[clause_rows]
+    if window:
+        total = mention_scores.copy()
+        weight = np.ones(len(clause_rows))
+        for d in range(1, window + 1):
+            for shift in (d, -d):
+                ok, src = _same_post_neighbors(clause_rows, post, shift)
+                total[ok] += decay ** d * clause_scores[src]
+                weight[ok] += decay ** d
+                has_signal[ok] |= signal[src]
+        mention_scores = total / weight
+
+    unresolved = np.flatnonzero(~has_signal) if fallback else np.zeros(0, dtype=np.intp)
+    if len(unresolved):
+        # 没有情感词的提及：先为这些评论其余的分句打分，取最近的有信号分句
+        extra = np.flatnonzero(np.isin(post, post[clause_rows[unresolved]]) & ~need)
+        if len(extra):
+            with run.span('score', rows=len(extra)):
+                clause_scores[extra], signal[extra] = score_comments(score_text[extra], score_many, with_signal=True)
+            n_scored += len(extra)
+        nearest = _nearest_signal(clause_rows[unresolved], post, signal)
+        found = nearest >= 0
+        mention_scores[unresolved[found]] = clause_scores[nearest[found]]
+        # 整条评论的分句都没有信号时取整条评论的得分（预处理去掉标点后可能组成跨分句的情感词）
+        rest = unresolved[~found]
+        if len(rest):
+            rest_posts, inverse = np.unique(post[clause_rows[rest]], return_inverse=True)
+            post_text = texts[rest_posts] if text == 'raw' else normalize_series(texts[rest_posts]).to_numpy()
+            with run.span('score', rows=len(rest_posts)):
+                mention_scores[rest] = score_comments(post_text, score_many)[inverse]
+            n_scored += len(rest_posts)
+
+    # 折叠为评论级：(评论, 打卡点) 去重，按评论、再按打卡点编号排列
+    n_landmarks = max(len(landmarks), 1)
+    keys, inverse = np.unique(post[clause_rows] * n_landmarks + landmark_ids, return_inverse=True)
+    pair_scores = np.bincount(inverse, weights=mention_scores, minlength=len(keys)) / \
+        np.bincount(inverse, minlength=len(keys))
+    pair_posts, pair_landmarks = np.divmod(keys, n_landmarks)
+    per_post = np.bincount(pair_posts, minlength=n_posts)
+    incidence = LandmarkIncidence(landmarks, np.concatenate(([0], np.cumsum(per_post))).astype(np.int64),
+                                  pair_landmarks.astype(np.int32))
+
+    comment_scores = np.full(n_posts, np.nan)
+    np.divide(np.bincount(pair_posts, weights=pair_scores, minlength=n_posts), per_post,
+              out=comment_scores, where=per_post > 0)
+    return MentionScores(incidence, pair_scores, comment_scores, len(raw), n_scored)
@@ -0,0 +1,129 @@
+"""
+统一命令行入口
+    python -m 情感分析 <命令> [参数]   # 在仓库根目录，经 情感分析/__main__.py
+包内的 情感分析.py 与包同名，在 情感分析/ 目录内运行时 -m 会找到该模块而不是包，所以必须在仓库根目录运行
+
+各分析脚本的参数都在这里定义，参数解析完才导入对应脚本：
+--help、参数错误不会加载 pandas / SnowNLP / matplotlib；脚本本身被直接运行时也用这里的解析器
+"""
+
+import argparse
+import importlib
+import sys
+from functools import partial
+
+from .backends import BACKENDS
+from .graph_export import DEFAULT_BATCH_SIZE
+from .incremental_state import DEFAULT_STATE_PATH
+from .ingest import DEFAULT_CHUNKSIZE
+from .instrumentation import PROFILERS
+from .rendering import DEFAULT_MAX_LANDMARKS
+
+
+# 命令 -> (脚本模块, 说明)
+COMMANDS = {
+    'analyze': ('情感分析', '内置词典情感分析，附区域汇总，可导出 Neo4j 知识图谱（情感分析.py）'),
+    'citywalk': ('citywalk_analysis', '扩展词典情感分析（citywalk_analysis.py）'),
+    'snownlp': ('sentiment_analysis', 'SnowNLP 情感分析，带持久化得分缓存（sentiment_analysis.py）'),
+    'benchmark': ('benchmark', '分阶段基准测试与启动耗时（benchmark.py，参数见 benchmark --help）'),
+    'discover': ('landmark_discovery', '从语料中挖掘候选打卡点（landmark_discovery.py，参数见 discover --help）'),
+}
+# 自带参数解析的命令，其余参数原样交给模块的 main(argv)
+_DELEGATED = ('benchmark', 'discover')
+
+
+def _add_common(parser, analyzer):
+    """三个分析脚本共有的参数；analyzer 为该命令的默认打分后端"""
+    parser.add_argument('--analyzer', choices=list(BACKENDS), default=analyzer,
+                        help=f'打分后端，见 backends.py（默认 {analyzer}）')
+    parser.add_argument('--workers', type=int,
+                        help='打分进程数，0 表示使用全部 CPU（默认按后端成本自动选择：词典类进程内，SnowNLP 用全部 CPU）')
+    parser.add_argument('--attribution', choices=('clause', 'post'), default='post',
+                        help='打卡点得分取整条评论的得分（post，默认）或其所在分句的得分（clause）')
+    parser.add_argument('--clause-window', type=int, default=0,
+                        help='分句级归因时再按距离衰减加权纳入前后几个分句（默认 0：只用所在分句）')
+    parser.add_argument('--report', dest='report_path', help='把分阶段运行报告写成 JSON 文件')
+    parser.add_argument('--profile', choices=PROFILERS, help='对整个运行采样（cprofile 输出 .prof，pyinstrument 输出 .html）')
+    plot_group = parser.add_mutually_exclusive_group()
+    plot_group.add_argument('--no-plot', dest='plot', action='store_false', help='不生成图表')
+    plot_group.add_argument('--plot-only', action='store_true', help='不重跑分析，用上次保存的结果 CSV 重新出图')
+
+
+def _add_streaming(parser):
+    parser.add_argument('--input', dest='input_path', help='流式读取的数据文件（csv/jsonl/parquet/xlsx）')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help=f'流式读取每块行数（默认 {DEFAULT_CHUNKSIZE}）')
+
+
+def _add_chart(parser):
+    parser.add_argument('--max-landmarks', type=int, default=DEFAULT_MAX_LANDMARKS,
+                        help=f'每张图最多显示的打卡点数，0 表示不限（默认 {DEFAULT_MAX_LANDMARKS}）')
+    parser.add_argument('--paginate', action='store_true', help='打卡点超过 --max-landmarks 时分页输出全部打卡点')
+
+
+def _add_analyze(parser):
+    _add_pipeline(parser, 'builtin')
+    parser.add_argument('--graph-dir', help='把 Neo4j 知识图谱导出到该目录')
+    parser.add_argument('--graph-format', choices=['admin', 'cypher'], default='admin',
+                        help='admin: neo4j-admin 导入 CSV，cypher: 分批 UNWIND 脚本（默认 admin）')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'UNWIND 每批行数（默认 {DEFAULT_BATCH_SIZE}）')
+
+
+def _add_pipeline(parser, analyzer):
+    """三个分析脚本共用 pipeline.py 的流程（流式读取、增量模式、趋势表），只差默认打分后端"""
+    _add_common(parser, analyzer)
+    _add_streaming(parser)
+    _add_chart(parser)
+    parser.add_argument('--incremental', action='store_true', help='增量模式：只为上次运行之后新增的评论打分')
+    parser.add_argument('--state', dest='state_path',
+                        help=f'增量状态文件（默认 {DEFAULT_STATE_PATH}，analyze 为输出目录下的 citywalk_analysis_state.npz）')
+    parser.add_argument('--no-trends', dest='trends', action='store_false',
+                        help='不输出按发布时间的日/周/月情感趋势表')
+    parser.add_argument('--as-of', help='抓取时间（如 2025-12-10），用于换算“今天”“N分钟前”和补全不带年份的发布时间；'
+                                         '默认取数据文件的修改时间或数据中带年份的最晚发布时间')
+
+
+_ARGUMENTS = {
+    'analyze': _add_analyze,
+    'citywalk': partial(_add_pipeline, analyzer='citywalk'),
+    'snownlp': partial(_add_pipeline, analyzer='snownlp'),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog=f'python -m {__package__}', description='上海CityWalk打卡点情感分析')
+    subparsers = parser.add_subparsers(dest='command', metavar='<命令>')
+    for command, (_, description) in COMMANDS.items():
+        sub = subparsers.add_parser(command, help=description, description=description)
+        if command in _ARGUMENTS:
+            _ARGUMENTS[command](sub)
+    return parser
+
+
+def parse_command(command, argv=None):
+    """按 command 的参数定义解析 argv（默认 sys.argv[1:]），返回传给对应脚本 main() 的关键字参数"""
+    module, description = COMMANDS[command]
+    parser = argparse.ArgumentParser(prog=f'python -m {__package__}.{module}', description=description)
+    _ARGUMENTS[command](parser)
+    return vars(parser.parse_args(argv))
+
+
+def run(argv=None):
+    """执行一条命令，返回进程退出码"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] and argv[0] in _DELEGATED:
+        module = importlib.import_module(f'.{COMMANDS[argv[0]][0]}', __package__)
+        return module.main(argv[1:])
+
+    parser = build_parser()
+    kwargs = vars(parser.parse_args(argv))
+    command = kwargs.pop('command')
+    if command is None:
+        parser.print_help()
+        return 2
+    module = importlib.import_module(f'.{COMMANDS[command][0]}', __package__)
+    result = module.main(**kwargs)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,98 @@
+"""
+打卡点共现网络
+由评论 × 打卡点关联矩阵 X（scipy CSR）一次稀疏矩阵乘法 X^T · [X, diag(s)·X] 得到
+两两共现次数与共现评论的情感得分和，再计算 PMI / NPMI；复杂度与提及记录数成正比，不做两两循环
+这些乘积对评论可加，分块流式处理时逐块累加（co_mention_products），最后一次算出边（edges_from_products）
+"""
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MIN_COUNT = 2
+
+EDGE_COLUMNS = ['start', 'end', 'count', 'pmi', 'npmi', 'sentiment', 'weight']
+
+
+def co_mention_products(incidence, comment_scores=None):
+    """共现的可加统计量：(打卡点 × 打卡点) 的共现次数 X^T·X、共现评论得分和 X^T·diag(s)·X、
+    共现评论中有得分的条数（三个 scipy CSR 矩阵）；打卡点编号一致时分块计算后逐块相加即为整体结果"""
+    from scipy import sparse
+
+    X = incidence.to_scipy()
+    if comment_scores is None:
+        scores = np.zeros(incidence.n_comments)
+        scored = np.zeros(incidence.n_comments)
+    else:
+        scores = np.asarray(comment_scores, dtype=np.float64)
+        scored = (~np.isnan(scores)).astype(np.float64)
+        scores = np.nan_to_num(scores)
+
+    # 一次乘法同时得到三块：共现次数、共现评论得分和、共现评论中有得分的条数
+    n_landmarks = incidence.n_landmarks
+    stacked = sparse.hstack([X, sparse.diags(scores) @ X, sparse.diags(scored) @ X], format='csr')
+    product = (X.T @ stacked).tocsr()
+    return tuple(product[:, k * n_landmarks:(k + 1) * n_landmarks] for k in range(3))
+
+
+def co_mention_edges(incidence, comment_scores=None, min_count=DEFAULT_MIN_COUNT):
+    """计算打卡点两两共现边
+
+    incidence:      LandmarkIncidence（评论 -> 打卡点关联表）
+    comment_scores: 每条评论的情感得分（可选，缺失值按未打分处理）
+    min_count:      至少共同出现在这么多条评论中才保留
+
+    返回 DataFrame，每对打卡点一行（start 的编号小于 end）：
+        start, end:  打卡点名称
+        count:       共同提及的评论数
+        pmi:         log(P(i,j) / (P(i)·P(j)))，概率以评论总数为分母
+        npmi:        pmi / -log P(i,j)，取值 [-1, 1]
+        sentiment:   共同提及评论的平均情感得分（未提供得分时为 NaN）
+        weight:      共同提及评论的情感得分和，可作情感加权的边权
+    """
+    if incidence.n_landmarks < 2 or incidence.n_comments == 0:
+        return pd.DataFrame(columns=EDGE_COLUMNS)
+    return edges_from_products(incidence.landmarks, incidence.n_comments, incidence.counts(),
+                               *co_mention_products(incidence, comment_scores), min_count=min_count)
+
+
+def edges_from_products(landmarks, n_comments, mentions, count, score_sum, scored_count,
+                        min_count=DEFAULT_MIN_COUNT):
+    """由 co_mention_products 的（累加）结果计算共现边，返回值同 co_mention_edges
+
+    landmarks:  打卡点名称（与矩阵行列对齐）
+    n_comments: 评论总数（PMI 的分母）
+    mentions:   各打卡点被多少条评论提及
+    """
+    from scipy import sparse
+
+    if len(landmarks) < 2 or n_comments == 0:
+        return pd.DataFrame(columns=EDGE_COLUMNS)
+    count = sparse.triu(count, k=1).tocoo()
+    keep = count.data >= min_count
+    if not keep.any():
+        return pd.DataFrame(columns=EDGE_COLUMNS)
+    rows, cols, pair_count = count.row[keep], count.col[keep], count.data[keep]
+
+    score_sum = np.asarray(sparse.csr_matrix(score_sum)[rows, cols]).ravel()
+    scored_count = np.asarray(sparse.csr_matrix(scored_count)[rows, cols]).ravel()
+    mentions = np.asarray(mentions, dtype=np.float64)
+    n = float(n_comments)
+
+    p_joint = pair_count / n
+    pmi = np.log(p_joint / ((mentions[rows] / n) * (mentions[cols] / n)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        npmi = np.where(p_joint < 1, pmi / -np.log(p_joint), 1.0)
+        sentiment = np.where(scored_count > 0, score_sum / scored_count, np.nan)
+
+    names = np.asarray(landmarks, dtype=object)
+    edges = pd.DataFrame({
+        'start': names[rows],
+        'end': names[cols],
+        'count': pair_count.astype(np.int64),
+        'pmi': pmi,
+        'npmi': npmi,
+        'sentiment': sentiment,
+        'weight': score_sum,
+    }, columns=EDGE_COLUMNS)
+    return edges.sort_values(['count', 'start', 'end'], ascending=[False, True, True], kind='stable').reset_index(drop=True)
@@ -0,0 +1,78 @@
+"""
+评论级数据表
+评论 -> 打卡点关联表（CSR 稀疏结构）以及按唯一评论去重的批量打分
+每条评论只打分一次，再通过关联表汇总到它提及的所有打卡点
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class LandmarkIncidence:
+    """评论 × 打卡点关联矩阵（CSR：第 i 条评论提及的打卡点编号为 indices[indptr[i]:indptr[i+1]]）
+
+    打卡点编号按在语料中首次出现的顺序分配，landmarks[编号] 为名称。
+    """
+
+    def __init__(self, landmarks, indptr, indices):
+        self.landmarks = landmarks
+        self.indptr = indptr
+        self.indices = indices
+
+    @property
+    def n_comments(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_landmarks(self):
+        return len(self.landmarks)
+
+    def counts(self):
+        """每个打卡点被多少条评论提及"""
+        return np.bincount(self.indices, minlength=self.n_landmarks)
+
+    def mentioned_rows(self):
+        """至少提及一个打卡点的评论行号"""
+        return np.flatnonzero(np.diff(self.indptr))
+
+    def pairs(self):
+        """展开为 (评论行号, 打卡点编号) 两个等长数组，按评论顺序排列"""
+        rows = np.repeat(np.arange(self.n_comments), np.diff(self.indptr))
+        return rows, self.indices
+
+    def to_scipy(self):
+        """转换为 scipy.sparse.csr_matrix（需要安装 scipy）"""
+        from scipy.sparse import csr_matrix
+        data = np.ones(len(self.indices), dtype=np.float64)
+        return csr_matrix((data, self.indices, self.indptr), shape=(self.n_comments, self.n_landmarks))
+
+
+def build_incidence(texts, matcher):
+    """扫描全部评论一次，构建评论 -> 打卡点关联表"""
+    landmark_ids = {}
+    indptr = [0]
+    indices = []
+    for text in texts:
+        for landmark in matcher.match(text):
+            lid = landmark_ids.get(landmark)
+            if lid is None:
+                lid = landmark_ids[landmark] = len(landmark_ids)
+            indices.append(lid)
+        indptr.append(len(indices))
+    return LandmarkIncidence(list(landmark_ids),
+                             np.asarray(indptr, dtype=np.int64),
+                             np.asarray(indices, dtype=np.int32))
+
+
+def score_comments(texts, score_many, with_signal=False):
+    """对评论去重后批量打分，返回与 texts 等长的得分数组
+
+    score_many:  接收文本列表、返回 BatchScores 的批量打分函数（如 analyzer.analyze_many）
+    with_signal: 为 True 时返回 (得分, 是否有情感信号)：词典类后端命中了权重非零的情感词时才有信号，
+                 没有信号的得分只是默认的 0.5；SnowNLP 等模型总有信号
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    batch = score_many(list(uniques))
+    if with_signal:
+        return batch.score[codes], (batch.pos_total + batch.neg_total)[codes] > 0
+    return batch.score[codes]
@@ -0,0 +1,334 @@
+"""
+评论去重引擎
+- 完全重复：整行内容的 64 位哈希，跨数据块流式判重
+- 近似重复：预处理后文本的字符 n-gram -> MinHash 签名 -> LSH 分段分桶，候选再用签名估计的 Jaccard 相似度确认
+逐块处理；每条保留记录只占用一份截断签名和若干 16 字节的索引条目，不保留原文。
+去重结果与分块大小无关，python -m 情感分析.dedup [数据文件] 用几种分块大小校验这一点
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .text_normalizer import preprocess_text
+
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 3
+# 校验分块无关性时使用的分块大小（一整块、常规大小、不整除的小块）
+CHECK_CHUNKSIZES = (50000, 1000, 333)
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据', '原数据.xlsx')
+
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+
+def choose_bands(num_perm, threshold):
+    """选择 LSH 分段数 b（每段 r = num_perm / b 行）
+
+    候选概率曲线的拐点约为 (1/b)^(1/r)，取不超过 threshold 的最大拐点，宁可多出候选交给签名复核，也少漏检
+    """
+    options = [(b, (1 / b) ** (b / num_perm)) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [opt for opt in options if opt[1] <= threshold]
+    b, _ = max(below, key=lambda opt: opt[1]) if below else min(options, key=lambda opt: opt[1])
+    return b
+
+
+class _SortedIndex:
+    """uint64 键 -> int64 值的追加式索引
+
+    按 LSM 方式保存若干有序段，新段与相近大小的旧段合并；查找为各段二分。
+    同一键只保留最早写入的值。
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self._runs)
+
+    def lookup(self, keys):
+        """返回每个键对应的值，不存在为 -1"""
+        out = np.full(len(keys), -1, dtype=np.int64)
+        for run_keys, run_values in self._runs:
+            pos = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+            hit = (run_keys[pos] == keys) & (out < 0)
+            out[hit] = run_values[pos[hit]]
+        return out
+
+    def add(self, keys, values):
+        """写入新键（已存在的键被忽略）"""
+        if len(keys) == 0:
+            return
+        self._runs.append(self._compact(np.asarray(keys, dtype=np.uint64), np.asarray(values, dtype=np.int64)))
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= 2 * len(self._runs[-1][0]):
+            newer = self._runs.pop()
+            older = self._runs.pop()
+            self._runs.append(self._compact(np.concatenate((older[0], newer[0])),
+                                            np.concatenate((older[1], newer[1]))))
+
+    @staticmethod
+    def _compact(keys, values):
+        # 稳定排序后每个键取第一条，即更早写入的值
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        first = np.concatenate(([True], keys[1:] != keys[:-1]))
+        return keys[first], values[first]
+
+
+class MinHasher:
+    """批量计算字符 n-gram 的 MinHash 签名（multiply-shift 哈希族，全部向量化）"""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._char_mult = rng.integers(1, 2 ** 63, size=shingle_size, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, texts):
+        """返回 (签名矩阵 uint32[n, num_perm], 是否有效 bool[n])；空文本没有签名"""
+        n = self.shingle_size
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        valid = lengths > 0
+        sigs = np.zeros((len(texts), self.num_perm), dtype=np.uint32)
+        if not valid.any():
+            return sigs, valid
+
+        # 各文本之间以 n-1 个 \0 分隔，短于 n 的文本得到一个补齐的 n-gram，其余 n-gram 不会跨文本
+        sep = '\0' * (n - 1)
+        codes = np.frombuffer((sep.join(texts) + sep).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        starts = np.concatenate(([0], np.cumsum(lengths + n - 1)[:-1]))
+        per_doc = np.maximum(lengths - n + 1, 1) * valid
+        doc_of = np.repeat(np.arange(len(texts)), per_doc)
+        offsets = np.arange(per_doc.sum()) - np.repeat(np.cumsum(per_doc) - per_doc, per_doc)
+        positions = starts[doc_of] + offsets
+
+        shingles = np.zeros(len(positions), dtype=np.uint64)
+        for k in range(n):
+            shingles += codes[positions + k] * self._char_mult[k]
+        shingles ^= shingles >> np.uint64(33)
+        shingles *= _MIX
+        shingles >>= np.uint64(32)
+
+        segment_starts = np.concatenate(([0], np.cumsum(per_doc[valid])[:-1]))
+        for j in range(self.num_perm):
+            hashed = (self._a[j] * shingles + self._b[j]) >> np.uint64(32)
+            sigs[valid, j] = np.minimum.reduceat(hashed, segment_starts)
+        return sigs, valid
+
+
+class Deduplicator:
+    """逐块去重
+
+    threshold:     近似重复的 Jaccard 相似度阈值（字符 n-gram 集合）
+    num_perm:      MinHash 签名长度
+    shingle_size:  n-gram 长度
+    bands:         LSH 分段数，默认由 choose_bands 按阈值选择
+    near:          False 时只去除完全重复的行
+    normalize:     计算近似重复前的文本预处理
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, bands=None, near=True, normalize=preprocess_text):
+        self.threshold = threshold
+        self.near = near
+        self.normalize = normalize
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands = bands or choose_bands(num_perm, threshold)
+        if num_perm % self.bands:
+            raise ValueError(f"num_perm={num_perm} 不能被 bands={self.bands} 整除")
+        self.rows_per_band = num_perm // self.bands
+        self._band_mult = np.random.default_rng(2).integers(
+            1, 2 ** 63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+        self.rows_seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._exact = _SortedIndex()
+        self._band_indexes = [_SortedIndex() for _ in range(self.bands)]
+        # 已保留记录的 16 位截断签名（用于复核）及其全局行号；下标即代表编号
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint16)
+        self._rep_rows = np.zeros(0, dtype=np.int64)
+        self._n_reps = 0
+        self._records = []
+
+    def process(self, chunk, content_column):
+        """处理一个数据块，返回保留的行（保持原顺序）"""
+        first_row = self.rows_seen
+        self.rows_seen += len(chunk)
+        keep = self._drop_exact(chunk, content_column, first_row)
+        if self.near and keep.any():
+            rows = np.flatnonzero(keep)
+            texts = chunk[content_column].to_numpy()[rows]
+            keep[rows[self._drop_near(texts, rows + first_row)]] = False
+        return chunk[keep]
+
+    def _drop_exact(self, chunk, content_column, first_row):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy(dtype=np.uint64)
+        rows = np.arange(first_row, first_row + len(chunk))
+        # 块内首次出现且在此前各块中未出现过的行才保留
+        first_in_chunk = ~pd.Series(hashes).duplicated().to_numpy()
+        previous = self._exact.lookup(hashes)
+        keep = first_in_chunk & (previous < 0)
+        self._exact.add(hashes[keep], rows[keep])
+
+        duplicate = np.flatnonzero(~keep)
+        if len(duplicate):
+            self.exact_duplicates += len(duplicate)
+            # 块内重复的代表行是块内第一次出现的那一行
+            owner = pd.Series(rows).groupby(hashes).transform('first').to_numpy()
+            rep = np.where(previous >= 0, previous, owner)
+            texts = chunk[content_column].to_numpy()[duplicate]
+            for i, text in zip(duplicate, texts):
+                self._records.append((int(rep[i]), int(rows[i]), '完全重复', 1.0, _snippet(text)))
+        return keep
+
+    def _drop_near(self, texts, rows):
+        """返回近似重复（应丢弃）的布尔掩码
+
+        每条文本只与已保留的代表比较：每个分段取同桶中最早保留的代表作候选（先查此前各块的索引，
+        再查本块中已保留的行），判定保留后立即登记，下一条文本就能看到它；结果与分块大小无关
+        """
+        normalized = [self.normalize(t) for t in texts]
+        sigs, valid = self.hasher.signatures(normalized)
+        band_keys = self._band_keys(sigs)
+        candidates = np.stack([index.lookup(keys) for index, keys in zip(self._band_indexes, band_keys.T)], axis=1)
+        # 块内是否有更早的文本与之同桶（不论是否保留）：没有时它不可能有块内候选
+        shares_bucket = np.zeros(len(texts), dtype=bool)
+        for b in range(self.bands):
+            _, first, inverse = np.unique(band_keys[:, b], return_index=True, return_inverse=True)
+            shares_bucket |= first[inverse] < np.arange(len(texts))
+
+        short = sigs.astype(np.uint16)
+        drop = np.zeros(len(texts), dtype=bool)
+        rep_of = np.full(len(texts), -1, dtype=np.int64)
+        has_candidate = (candidates >= 0).any(axis=1) | shares_bucket
+
+        # 没有任何候选的文本必然保留，且是各自所在桶中最早的一条，批量登记为代表；其余按顺序逐条复核
+        fresh = valid & ~has_candidate
+        rep_of[fresh] = self._add_reps(short[fresh], rows[fresh])
+        local = [dict(zip(band_keys[fresh, b].tolist(), rep_of[fresh].tolist())) for b in range(self.bands)]
+        for i in np.flatnonzero(valid & has_candidate):
+            keys = band_keys[i].tolist()
+            refs = {int(rep) if rep >= 0 else local[b].get(keys[b], -1) for b, rep in enumerate(candidates[i])}
+            refs.discard(-1)
+            best_rep, best_sim = -1, 0.0
+            # 相似度并列时取行号最早的代表（代表编号的先后与分块有关，行号无关）
+            for rep in sorted(refs, key=lambda rep: self._rep_rows[rep]):
+                sim = np.count_nonzero(self._signatures[rep] == short[i]) / short.shape[1]
+                if sim >= self.threshold and sim > best_sim:
+                    best_rep, best_sim = rep, sim
+            if best_rep >= 0:
+                drop[i] = True
+                rep_of[i] = best_rep
+                self.near_duplicates += 1
+                self._records.append((int(self._rep_rows[best_rep]), int(rows[i]), '近似重复',
+                                      round(best_sim, 3), _snippet(texts[i])))
+            else:
+                rep_of[i] = self._add_reps(short[i:i + 1], rows[i:i + 1])[0]
+                for b, rep in enumerate(candidates[i]):
+                    if rep < 0:
+                        local[b].setdefault(keys[b], int(rep_of[i]))
+
+        # 按行序写入索引，同一键保留最早的代表，与块内的登记规则一致
+        kept = valid & ~drop
+        for index, keys in zip(self._band_indexes, band_keys.T):
+            index.add(keys[kept], rep_of[kept])
+        return drop
+
+    def _band_keys(self, sigs):
+        r = self.rows_per_band
+        keys = np.zeros((len(sigs), self.bands), dtype=np.uint64)
+        for b in range(self.bands):
+            block = sigs[:, b * r:(b + 1) * r].astype(np.uint64)
+            keys[:, b] = (block * self._band_mult).sum(axis=1, dtype=np.uint64)
+        return keys
+
+    def _add_reps(self, signatures, rows):
+        """登记一批新代表，返回它们的代表编号"""
+        need = self._n_reps + len(rows)
+        if need > len(self._signatures):
+            grow = max(need, 2 * len(self._signatures), 1024) - len(self._signatures)
+            self._signatures = np.concatenate((self._signatures, np.zeros((grow, self._signatures.shape[1]), np.uint16)))
+            self._rep_rows = np.concatenate((self._rep_rows, np.zeros(grow, dtype=np.int64)))
+        ids = np.arange(self._n_reps, need)
+        self._signatures[ids] = signatures
+        self._rep_rows[ids] = rows
+        self._n_reps = need
+        return ids
+
+    def report(self):
+        """重复记录明细：每行一条被去除的记录及其保留的代表行（行号从 0 开始，按数据行计）"""
+        report = pd.DataFrame(self._records, columns=['代表行号', '重复行号', '类型', '相似度', '重复文本'])
+        # 代表行本身也可能被去除（如某行的完全重复先出现，而它又是更早一行的近似重复），沿链找到最终保留的行
+        parent = pd.Series(report['代表行号'].to_numpy(), index=report['重复行号'].to_numpy())
+        rep = report['代表行号']
+        while True:
+            resolved = rep.map(parent).fillna(rep).astype(np.int64)
+            if resolved.equals(rep):
+                break
+            rep = resolved
+        report['代表行号'] = rep
+        return report
+
+    def clusters(self):
+        """按代表行汇总的重复簇，按簇大小降序"""
+        report = self.report()
+        if report.empty:
+            return pd.DataFrame(columns=['代表行号', '重复条数', '完全重复', '近似重复', '最低相似度'])
+        grouped = report.groupby('代表行号')
+        summary = pd.DataFrame({
+            '重复条数': grouped.size(),
+            '完全重复': grouped['类型'].apply(lambda s: int((s == '完全重复').sum())),
+            '近似重复': grouped['类型'].apply(lambda s: int((s == '近似重复').sum())),
+            '最低相似度': grouped['相似度'].min(),
+        }).reset_index()
+        return summary.sort_values(['重复条数', '代表行号'], ascending=[False, True], kind='stable')
+
+    def summary(self):
+        kept = self.rows_seen - self.exact_duplicates - self.near_duplicates
+        return (f"共 {self.rows_seen} 行：完全重复 {self.exact_duplicates} 行，"
+                f"近似重复 {self.near_duplicates} 行（阈值 {self.threshold}，"
+                f"{self.bands}×{self.rows_per_band} LSH），保留 {kept} 行")
+
+
+def _snippet(text, width=60):
+    return str(text)[:width] if text is not None and not (isinstance(text, float) and np.isnan(text)) else ''
+
+
+def deduplicate(path, chunksize, **options):
+    """逐块读取 path 并去重，返回 (保留的行, Deduplicator)；options 传给 Deduplicator"""
+    from .ingest import find_content_column, iter_chunks
+    dedup = Deduplicator(**options)
+    kept, content_column = [], None
+    for chunk in iter_chunks(path, chunksize):
+        content_column = content_column or find_content_column(chunk.columns) or chunk.columns[-1]
+        kept.append(dedup.process(chunk, content_column))
+    return pd.concat(kept, ignore_index=True), dedup
+
+
+def check_chunking(path, chunksizes=CHECK_CHUNKSIZES, **options):
+    """用不同分块大小对同一份数据去重，保留的行不完全一致时抛出 AssertionError；返回 {分块大小: Deduplicator}"""
+    runs, expected = {}, None
+    for chunksize in chunksizes:
+        kept, runs[chunksize] = deduplicate(path, chunksize, **options)
+        if expected is None:
+            expected = kept
+        elif not kept.equals(expected):
+            raise AssertionError(f"分块大小 {chunksize} 的去重结果与 {chunksizes[0]} 不一致")
+    return runs
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_PATH
+    for chunksize, dedup in check_chunking(path).items():
+        print(f"  chunksize={chunksize:<6} {dedup.summary()}")
+    print(f"✅ {path}: 分块大小 {', '.join(map(str, CHECK_CHUNKSIZES))} 的去重结果完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+打卡点地名表
+每个地名有唯一的标准名（编号即在表中的下标）、若干别名（全称、英文名、拼音）和上级地名（浦东 ⊃ 陆家嘴 ⊃ 东方明珠）。
+匹配器由全部标准名和别名构建一次，单次扫描就把每个命中归一为标准名；
+上级汇总把评论 -> 地名关联表沿上下级展开后做一次分组归约，不再重新扫描语料
+"""
+
+import numpy as np
+
+from .landmark_matcher import LandmarkMatcher
+
+
+# (标准名, 上级, 别名)；跨区的道路不设上级
+PLACES = [
+    # 区域
+    ('浦东', None, ('浦东新区', 'Pudong')),
+    ('浦西', None, ('Puxi',)),
+    ('黄浦', '浦西', ('黄浦区', 'Huangpu')),
+    ('静安', '浦西', ('静安区', 'Jingan')),
+    ('徐汇', '浦西', ('徐汇区', 'Xuhui')),
+    ('长宁', '浦西', ('长宁区', 'Changning')),
+    ('虹口', '浦西', ('虹口区', 'Hongkou')),
+    ('杨浦', '浦西', ('杨浦区', 'Yangpu')),
+    ('闵行', None, ('闵行区', 'Minhang')),
+    ('青浦', None, ('青浦区', 'Qingpu')),
+    ('黄浦江', None, ('Huangpu River',)),
+    ('浦北', None, ()),
+    # 黄浦
+    ('外滩', '黄浦', ('the Bund', 'waitan')),
+    ('外白渡桥', '外滩', ('Garden Bridge',)),
+    ('豫园', '黄浦', ('Yu Garden', 'Yuyuan')),
+    ('城隍庙', '黄浦', ('上海城隍庙', 'City God Temple', 'chenghuangmiao')),
+    ('泰康路', '黄浦', ()),
+    ('田子坊', '泰康路', ('Tianzifang',)),
+    ('新天地', '黄浦', ('Xintiandi',)),
+    ('思南公馆', '黄浦', ('Sinan Mansions',)),
+    ('人民广场', '黄浦', ('Peoples Square',)),
+    ('人民公园', '人民广场', ()),
+    ('福州路', '黄浦', ()),
+    ('北京东路', '黄浦', ()),
+    ('黄陂南路', '黄浦', ()),
+    ('瑞金医院', '黄浦', ()),
+    ('南京路', None, ('Nanjing Road',)),
+    ('南京东路', '南京路', ('East Nanjing Road',)),
+    ('南京西路', '南京路', ('West Nanjing Road',)),
+    ('淮海路', None, ('Huaihai Road',)),
+    ('淮海中路', '淮海路', ()),
+    ('建国路', None, ()),
+    ('建国中路', '建国路', ()),
+    ('建国西路', '建国路', ()),
+    ('复兴路', None, ()),
+    ('复兴中路', '复兴路', ()),
+    ('复兴西路', '复兴路', ()),
+    # 徐汇
+    ('武康路', '徐汇', ('Wukang Road', 'wukanglu')),
+    ('安福路', '徐汇', ('Anfu Road',)),
+    ('徐家汇', '徐汇', ('Xujiahui',)),
+    ('徐汇滨江', '徐汇', ('West Bund',)),
+    ('龙华寺', '徐汇', ('Longhua Temple',)),
+    ('衡山路', '徐汇', ()),
+    ('天平路', '徐汇', ()),
+    ('永康路', '徐汇', ()),
+    ('汾阳路', '徐汇', ()),
+    ('东平路', '徐汇', ()),
+    ('湖南路', '徐汇', ()),
+    ('嘉陵路', None, ()),
+    ('乌鲁木齐路', None, ()),
+    ('陕西南路', None, ()),
+    ('长乐路', None, ()),
+    # 静安
+    ('静安寺', '静安', ('Jingan Temple',)),
+    ('愚园路', None, ()),
+    ('巨鹿路', '静安', ()),
+    ('富民路', '静安', ()),
+    ('常德公馆', '静安', ()),
+    ('静安别墅', '静安', ()),
+    ('陕西北路', '静安', ()),
+    ('西康路', '静安', ()),
+    ('威海路', '静安', ()),
+    ('铜仁路', '静安', ()),
+    ('万航渡路', '静安', ()),
+    ('南阳路', '静安', ()),
+    ('恒丰路', '静安', ()),
+    ('北京西路', '静安', ()),
+    ('百乐门', '静安', ('Paramount',)),
+    # 长宁
+    ('上生新所', '长宁', ('Columbia Circle',)),
+    ('昭化路', '长宁', ()),
+    ('茅台路', '长宁', ()),
+    ('长宁公园', '长宁', ()),
+    ('华山路', None, ()),
+    ('凯旋路', None, ()),
+    # 虹口
+    ('北外滩', '虹口', ('North Bund',)),
+    ('多伦路', '虹口', ()),
+    ('山阴路', '虹口', ()),
+    ('甜爱路', '虹口', ()),
+    ('四川北路', '虹口', ()),
+    ('霍山路', '虹口', ()),
+    ('兆丰路', '虹口', ()),
+    ('1933', '虹口', ('1933老场坊',)),
+    # 杨浦
+    ('共青森林公园', '杨浦', ()),
+    ('长海医院', '杨浦', ()),
+    # 浦东
+    ('陆家嘴', '浦东', ('Lujiazui',)),
+    ('东方明珠', '陆家嘴', ('东方明珠塔', 'Oriental Pearl')),
+    ('世纪大道', '浦东', ()),
+    ('迪士尼', '浦东', ('迪士尼乐园', '迪斯尼', 'Disneyland')),
+    # 郊区
+    ('七宝', '闵行', ('七宝古镇', 'Qibao')),
+    ('古美路', '闵行', ()),
+    ('朱家角', '青浦', ('朱家角古镇', 'Zhujiajiao')),
+    ('枫泾', None, ('枫泾古镇',)),
+    ('东平国家森林公园', None, ()),
+    # 其他
+    ('M50', None, ('M50创意园',)),
+    ('长风', None, ()),
+    ('吴昌硕公园', None, ()),
+    ('江南造船厂', None, ()),
+    ('皇家园林', None, ()),
+    ('冠生园', None, ()),
+    ('共青团', None, ()),
+    ('仁德里', None, ()),
+    ('三十二弄', None, ()),
+    ('文采里', None, ()),
+]
+
+
+class Gazetteer:
+    """地名表：标准名、别名与上下级关系
+
+    places: [(标准名, 上级标准名或 None, 别名元组), ...]
+    地名编号即在 names 中的下标，parent[i] 为上级编号（-1 表示顶层）
+    """
+
+    def __init__(self, places=PLACES):
+        self.places = [(name, parent, tuple(aliases)) for name, parent, aliases in places]
+        self.names = [name for name, _, _ in self.places]
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        if len(self._ids) != len(self.names):
+            raise ValueError("地名表中有重复的标准名")
+
+        self.parent = np.full(len(self.names), -1, dtype=np.intp)
+        self.aliases = {}
+        for i, (name, parent, aliases) in enumerate(self.places):
+            if parent is not None:
+                if parent not in self._ids:
+                    raise ValueError(f"{name} 的上级 {parent} 不在地名表中")
+                self.parent[i] = self._ids[parent]
+            for alias in aliases:
+                if alias in self._ids or self.aliases.get(alias, name) != name:
+                    raise ValueError(f"别名 {alias} 同时指向多个地名")
+                self.aliases[alias] = name
+        self._lookup = {key.lower(): name for key, name in list(self.aliases.items()) + [(n, n) for n in self.names]}
+
+        # 每个地名自身及其全部上级，拼成一个扁平数组（CSR）：chain(i) = _chains[_chain_start[i]:_chain_start[i] + _chain_len[i]]
+        chains = [self._walk_up(i) for i in range(len(self.names))]
+        self._chain_len = np.array([len(c) for c in chains], dtype=np.intp)
+        self._chain_start = np.concatenate(([0], np.cumsum(self._chain_len)[:-1])).astype(np.intp)
+        self._chains = np.array([i for c in chains for i in c], dtype=np.intp)
+
+    def _walk_up(self, i):
+        chain = [i]
+        while self.parent[chain[-1]] >= 0:
+            chain.append(int(self.parent[chain[-1]]))
+            if len(chain) > len(self.names):
+                raise ValueError(f"{self.names[i]} 的上级关系成环")
+        return chain
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def resolve(self, name):
+        """标准名或别名（英文不区分大小写） -> 标准名；不在表中时返回 None"""
+        return self._lookup.get(str(name).lower())
+
+    def ancestors(self, name):
+        """地名自身及其全部上级的标准名，由近及远"""
+        i = self._ids[self.resolve(name)]
+        return [self.names[k] for k in self._chains[self._chain_start[i]:self._chain_start[i] + self._chain_len[i]]]
+
+    def children(self, name):
+        """直接下级的标准名"""
+        i = self._ids[self.resolve(name)]
+        return [self.names[k] for k in np.flatnonzero(self.parent == i)]
+
+    def matcher(self):
+        """匹配全部标准名和别名、命中归一为标准名的 LandmarkMatcher"""
+        return LandmarkMatcher(self.names, self.aliases)
+
+    def subset(self, names):
+        """只保留 names 中的地名（可用别名）及其别名；被去掉的上级由最近的保留上级代替"""
+        keep = {self.resolve(n) for n in names}
+        keep.discard(None)
+        places = []
+        for name, _, aliases in self.places:
+            if name in keep:
+                parent = next((p for p in self.ancestors(name)[1:] if p in keep), None)
+                places.append((name, parent, aliases))
+        return Gazetteer(places)
+
+    def fingerprint(self):
+        """地名表内容，作为增量状态等配置指纹的一部分"""
+        return [[name, parent, list(aliases)] for name, parent, aliases in self.places]
+
+    def roll_up(self, incidence):
+        """把评论 -> 地名关联表沿上下级展开：每条评论计入它提及的地名及其全部上级，同一评论对同一地名只计一次
+
+        incidence 的地名须为本表的标准名（由 matcher() 匹配得到）。返回新的 LandmarkIncidence，
+        只含出现过的地名、按地名表顺序编号；对它做一次 aggregate_landmarks 即得到各级地名的汇总
+        """
+        return self._roll_up(incidence)[0]
+
+    def roll_up_scores(self, incidence, pair_scores):
+        """带每对得分的 roll_up（分句级归因）：上级地名取该评论中并入它的各下级得分的均值
+
+        pair_scores 与 incidence.pairs() 对齐；返回 (展开后的 LandmarkIncidence, 与其 pairs() 对齐的得分)
+        """
+        rolled, inverse, n_keys = self._roll_up(incidence)
+        pair_scores = np.repeat(np.asarray(pair_scores, dtype=float), self._chain_len[self._places(incidence)])
+        scores = np.bincount(inverse, weights=pair_scores, minlength=n_keys) / np.bincount(inverse, minlength=n_keys)
+        return rolled, scores
+
+    def _places(self, incidence):
+        """incidence 每对 (评论, 地名) 中地名在本表中的编号"""
+        try:
+            places = np.array([self._ids[name] for name in incidence.landmarks], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"地名 {e.args[0]} 不在地名表中") from None
+        return places[incidence.pairs()[1]]
+
+    def _roll_up(self, incidence):
+        from .comment_table import LandmarkIncidence
+        rows, _ = incidence.pairs()
+        places = self._places(incidence)
+
+        lengths = self._chain_len[places]
+        firsts = np.cumsum(lengths) - lengths
+        offsets = np.arange(int(lengths.sum())) - np.repeat(firsts, lengths)
+        ancestors = self._chains[np.repeat(self._chain_start[places], lengths) + offsets]
+        rows = np.repeat(rows, lengths)
+
+        # (评论, 地名) 去重，结果按评论、再按地名编号排列；inverse 把展开后的每一项映射到去重后的位置
+        keys, inverse = np.unique(rows.astype(np.int64) * len(self) + ancestors, return_inverse=True)
+        rows, ancestors = np.divmod(keys, len(self))
+        present = np.unique(ancestors)
+        remap = np.full(len(self), -1, dtype=np.int32)
+        remap[present] = np.arange(len(present), dtype=np.int32)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=incidence.n_comments))))
+        rolled = LandmarkIncidence([self.names[i] for i in present], indptr.astype(np.int64), remap[ancestors])
+        return rolled, inverse, len(keys)
+
+
+GAZETTEER = Gazetteer()
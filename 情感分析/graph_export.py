@@ -0,0 +1,381 @@
+"""
+知识图谱批量导出 (Neo4j)
+由分析结果直接生成图数据，两种输出：
+- admin:  neo4j-admin database import 可直接使用的节点/关系 CSV（离线一次性导入）
+- cypher: 参数化的分批 UNWIND $rows 语句（cypher-shell 脚本，或经驱动逐批执行）
+两种输出都可离线校验：validate_admin_import 检查 CSV，MemoryGraph 在内存中执行生成的语句
+
+用法：python -m 情感分析.graph_export 情感分析/citywalk_analysis_results.csv --out neo4j/import --format admin
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 原 neo4j/theme_*.cypher 中手工维护的主题清单（去重后），仅在特征词表不可用时作为后备；
+# 正常情况下主题归属由 theme_scorer 按评论打分得到
+DEFAULT_THEMES = {
+    '文化场馆/历史街区': ['豫园', '外白渡桥', '城隍庙', '田子坊', '上海城隍庙', '静安寺', '龙华寺', '朱家角'],
+    '购物/商业街区': ['南京路', '淮海中路', '淮海路', '陕西南路', '徐家汇', '南京西路', '北京路'],
+    '特色街巷/酒吧街': ['武康路', '安福路', '衡山路', '长乐路', '永康路', '甜爱路', '复兴中路', '多伦路'],
+    '现代摩天楼/地标': ['陆家嘴', '东方明珠', '世纪大道', '人民广场', '浦东', '外滩', '黄浦江'],
+    '公园/绿色空间': ['人民公园', '世纪公园', '静安公园', '长风'],
+    '艺术区/创意园': ['M50', '愚园路', '共青团', '威海路'],
+    '美食/小吃': ['城隍庙', '福州路', '七宝', '百乐门'],
+}
+
+# 两个分析脚本的结果列名 -> 图属性
+_RESULT_COLUMNS = {
+    'Landmark': 'name', '打卡点': 'name',
+    'Score': 'score', '情感得分': 'score',
+    'Grade': 'grade', '情感等级': 'grade',
+    'Count': 'count', '样本量': 'count',
+}
+
+# pandas dtype -> neo4j-admin 列类型
+_ADMIN_TYPES = {'f': 'float', 'i': 'long', 'u': 'long', 'b': 'boolean'}
+
+
+class GraphExport:
+    """待导出的图
+
+    nodes:         {标签: DataFrame}，name 列为节点主键，其余列为属性
+    relationships: [(关系类型, 起点标签, 终点标签, DataFrame)]，start/end 列为两端节点的 name，其余列为属性
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = []
+
+    def add_nodes(self, label, df):
+        df = df.drop_duplicates('name').reset_index(drop=True)
+        if label in self.nodes:
+            import pandas as pd
+            df = pd.concat([self.nodes[label], df]).drop_duplicates('name').reset_index(drop=True)
+        self.nodes[label] = df
+
+    def add_relationships(self, rel_type, start_label, end_label, df):
+        """添加关系；两端节点不存在的关系被丢弃（与 MATCH 语义一致）"""
+        keep = (df['start'].isin(self.nodes[start_label]['name'])
+                & df['end'].isin(self.nodes[end_label]['name']))
+        self.relationships.append((rel_type, start_label, end_label, df[keep].reset_index(drop=True)))
+
+    def summary(self):
+        parts = [f"{label} {len(df)}" for label, df in self.nodes.items()]
+        parts += [f":{rel_type} {len(df)}" for rel_type, _, _, df in self.relationships]
+        return '，'.join(parts)
+
+
+def graph_from_results(results, themes=DEFAULT_THEMES):
+    """由分析结果表构建 Landmark / Grade / Theme 图
+
+    results: 分析脚本输出的结果表（情感分析.py 或 citywalk_analysis.py 的列名均可）
+    themes:  {主题: [打卡点, ...]} 或 [(主题, 打卡点, 权重), ...]；结果中不存在的打卡点被忽略
+    """
+    import pandas as pd
+    df = results.rename(columns=_RESULT_COLUMNS)[['name', 'score', 'grade', 'count']].copy()
+    df['name'] = df['name'].astype(str)
+    df['score'] = pd.to_numeric(df['score']).astype(float)
+    df['count'] = pd.to_numeric(df['count']).astype('int64')
+
+    graph = GraphExport()
+    graph.add_nodes('Landmark', df)
+    graph.add_nodes('Grade', pd.DataFrame({'name': df['grade'].drop_duplicates().astype(str)}))
+    graph.add_relationships('情感评级', 'Landmark', 'Grade',
+                            pd.DataFrame({'start': df['name'], 'end': df['grade'], 'score': df['score']}))
+
+    if isinstance(themes, dict):
+        themes = [(theme, name, 1.0) for theme, names in themes.items() for name in names]
+    members = pd.DataFrame(list(themes), columns=['start', 'end', 'weight']).drop_duplicates(['start', 'end'])
+    graph.add_nodes('Theme', pd.DataFrame({'name': members['start'].drop_duplicates()}))
+    graph.add_relationships('包含', 'Theme', 'Landmark', members)
+    return graph
+
+
+def add_co_mentions(graph, edges):
+    """把 co_mention.co_mention_edges 的结果作为打卡点之间的 :共现 关系加入图（每对只存一个方向）"""
+    graph.add_relationships('共现', 'Landmark', 'Landmark', edges)
+    return graph
+
+
+# ---------------------------------------------------------------------------
+# neo4j-admin import CSV
+# ---------------------------------------------------------------------------
+
+def _typed_header(df, columns):
+    header = []
+    for col in columns:
+        kind = df[col].dtype.kind
+        header.append(f"{col}:{_ADMIN_TYPES[kind]}" if kind in _ADMIN_TYPES else col)
+    return header
+
+
+def _rel_file_name(rel_type, start_label, end_label):
+    return f"rel_{start_label}_{rel_type}_{end_label}.csv"
+
+
+def write_admin_import(graph, out_dir):
+    """写出 neo4j-admin import 的节点与关系 CSV，返回导入命令
+
+    节点文件使用各自标签作为 ID 空间，关系文件的 START_ID/END_ID 引用这些空间；
+    文件为不带 BOM 的 UTF-8（neo4j-admin 会把 BOM 当作表头的一部分）
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    args = []
+    for label, df in graph.nodes.items():
+        props = [c for c in df.columns if c != 'name']
+        out = df[['name'] + props].copy()
+        out[':LABEL'] = label
+        out.columns = [f"name:ID({label})"] + _typed_header(df, props) + [':LABEL']
+        path = os.path.join(out_dir, f"nodes_{label}.csv")
+        out.to_csv(path, index=False, encoding='utf-8')
+        args.append(f"--nodes={os.path.basename(path)}")
+
+    for rel_type, start_label, end_label, df in graph.relationships:
+        props = [c for c in df.columns if c not in ('start', 'end')]
+        out = df[['start', 'end'] + props].copy()
+        out[':TYPE'] = rel_type
+        out.columns = [f":START_ID({start_label})", f":END_ID({end_label})"] + _typed_header(df, props) + [':TYPE']
+        path = os.path.join(out_dir, _rel_file_name(rel_type, start_label, end_label))
+        out.to_csv(path, index=False, encoding='utf-8')
+        args.append(f"--relationships={os.path.basename(path)}")
+
+    command = 'neo4j-admin database import full ' + ' '.join(args) + ' neo4j'
+    with open(os.path.join(out_dir, 'import_command.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"# 在本目录下执行（目标数据库需为空且已停止）\n{command}\n")
+    return command
+
+
+def _parse_typed(value, typ):
+    if value == '':
+        return None
+    if typ == 'float':
+        return float(value)
+    if typ in ('long', 'int'):
+        return int(value)
+    if typ == 'boolean':
+        if value.lower() not in ('true', 'false'):
+            raise ValueError(value)
+        return value.lower() == 'true'
+    return value
+
+
+def validate_admin_import(out_dir):
+    """离线校验 write_admin_import 的输出，返回问题列表（空列表表示通过）
+
+    检查：表头格式、节点 ID 在各自 ID 空间内唯一、关系两端 ID 均存在、类型列可解析、:LABEL/:TYPE 非空
+    """
+    errors = []
+    id_spaces = {}
+    node_files, rel_files = [], []
+    for path in sorted(glob.glob(os.path.join(out_dir, '*.csv'))):
+        with open(path, encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f), [])
+        if header and header[0].startswith('\ufeff'):
+            errors.append(f"{os.path.basename(path)}: 文件带 BOM")
+        if any(re.fullmatch(r'.*:ID\(\w+\)', h) for h in header):
+            node_files.append((path, header))
+        elif any(h.startswith(':START_ID(') for h in header):
+            rel_files.append((path, header))
+        else:
+            errors.append(f"{os.path.basename(path)}: 无法识别的表头 {header}")
+
+    def rows(path, header):
+        with open(path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            for line_no, row in enumerate(reader, 2):
+                if len(row) != len(header):
+                    errors.append(f"{os.path.basename(path)}:{line_no}: 列数 {len(row)} != {len(header)}")
+                    continue
+                for value, h in zip(row, header):
+                    name, _, typ = h.rpartition(':')
+                    if name and typ and not typ.startswith(('ID', 'START_ID', 'END_ID')):
+                        try:
+                            _parse_typed(value, typ)
+                        except ValueError:
+                            errors.append(f"{os.path.basename(path)}:{line_no}: {h} 无法解析 {value!r}")
+                yield line_no, dict(zip(header, row))
+
+    for path, header in node_files:
+        id_col = next(h for h in header if re.fullmatch(r'.*:ID\(\w+\)', h))
+        space = re.search(r':ID\((\w+)\)', id_col).group(1)
+        ids = id_spaces.setdefault(space, set())
+        for line_no, row in rows(path, header):
+            if row[id_col] in ids:
+                errors.append(f"{os.path.basename(path)}:{line_no}: {space} ID 重复 {row[id_col]!r}")
+            ids.add(row[id_col])
+            if ':LABEL' in row and not row[':LABEL']:
+                errors.append(f"{os.path.basename(path)}:{line_no}: :LABEL 为空")
+
+    for path, header in rel_files:
+        start_col = next(h for h in header if h.startswith(':START_ID('))
+        end_col = next(h for h in header if h.startswith(':END_ID('))
+        start_space = start_col[len(':START_ID('):-1]
+        end_space = end_col[len(':END_ID('):-1]
+        for line_no, row in rows(path, header):
+            if row[start_col] not in id_spaces.get(start_space, ()):
+                errors.append(f"{os.path.basename(path)}:{line_no}: 起点 {start_space} {row[start_col]!r} 不存在")
+            if row[end_col] not in id_spaces.get(end_space, ()):
+                errors.append(f"{os.path.basename(path)}:{line_no}: 终点 {end_space} {row[end_col]!r} 不存在")
+            if not row.get(':TYPE'):
+                errors.append(f"{os.path.basename(path)}:{line_no}: :TYPE 为空")
+    return errors
+
+
+# ---------------------------------------------------------------------------
+# 分批 UNWIND 语句
+# ---------------------------------------------------------------------------
+
+def _node_query(label):
+    return f"UNWIND $rows AS row MERGE (n:`{label}` {{name: row.name}}) SET n += row"
+
+
+def _rel_query(rel_type, start_label, end_label):
+    return (f"UNWIND $rows AS row "
+            f"MATCH (a:`{start_label}` {{name: row.start}}) MATCH (b:`{end_label}` {{name: row.end}}) "
+            f"MERGE (a)-[r:`{rel_type}`]->(b) SET r += row.props")
+
+
+def _records(df):
+    """DataFrame -> 可序列化的字典列表（numpy 标量转为 Python 值，缺失值省略）"""
+    records = json.loads(df.to_json(orient='records', force_ascii=False))
+    return [{k: v for k, v in rec.items() if v is not None} for rec in records]
+
+
+def iter_unwind_batches(graph, batch_size=DEFAULT_BATCH_SIZE):
+    """按“约束 -> 节点 -> 关系”的顺序产生 (语句, 参数) 对，每批最多 batch_size 行"""
+    for label in graph.nodes:
+        yield f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:`{label}`) REQUIRE n.name IS UNIQUE", {}
+    for label, df in graph.nodes.items():
+        rows = _records(df)
+        for i in range(0, len(rows), batch_size):
+            yield _node_query(label), {'rows': rows[i:i + batch_size]}
+    for rel_type, start_label, end_label, df in graph.relationships:
+        props = [c for c in df.columns if c not in ('start', 'end')]
+        rows = [{'start': rec['start'], 'end': rec['end'], 'props': {k: rec[k] for k in props if k in rec}}
+                for rec in _records(df)]
+        for i in range(0, len(rows), batch_size):
+            yield _rel_query(rel_type, start_label, end_label), {'rows': rows[i:i + batch_size]}
+
+
+def _cypher_literal(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, dict):
+        return '{' + ', '.join(f"`{k}`: {_cypher_literal(v)}" for k, v in value.items()) + '}'
+    if isinstance(value, list):
+        return '[' + ', '.join(_cypher_literal(v) for v in value) + ']'
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def write_unwind_cypher(graph, path, batch_size=DEFAULT_BATCH_SIZE):
+    """写出 cypher-shell 脚本：每批先 :param rows => [...]，再执行同一条参数化语句，返回批数"""
+    batches = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("// 由 graph_export.py 生成，请勿手工编辑\n")
+        f.write(f"// cypher-shell -f {os.path.basename(path)}\n\n")
+        for query, params in iter_unwind_batches(graph, batch_size):
+            if 'rows' in params:
+                f.write(f":param rows => {_cypher_literal(params['rows'])}\n")
+            f.write(query + ";\n\n")
+            batches += 1
+    return batches
+
+
+def load_with_driver(session, graph, batch_size=DEFAULT_BATCH_SIZE):
+    """通过 neo4j 驱动的 session（或 MemoryGraph）逐批执行，返回批数"""
+    batches = 0
+    for query, params in iter_unwind_batches(graph, batch_size):
+        session.run(query, **params)
+        batches += 1
+    return batches
+
+
+class MemoryGraph:
+    """本地替身：在内存中执行 iter_unwind_batches 生成的语句，用于离线验证导入结果
+
+    只支持本模块生成的约束、节点 MERGE 与关系 MERGE 三种语句
+    """
+
+    _CONSTRAINT = re.compile(r"CREATE CONSTRAINT IF NOT EXISTS FOR \(n:`(.+?)`\) REQUIRE n\.name IS UNIQUE")
+    _NODE = re.compile(r"UNWIND \$rows AS row MERGE \(n:`(.+?)` \{name: row\.name\}\) SET n \+= row")
+    _REL = re.compile(r"UNWIND \$rows AS row MATCH \(a:`(.+?)` \{name: row\.start\}\) "
+                      r"MATCH \(b:`(.+?)` \{name: row\.end\}\) MERGE \(a\)-\[r:`(.+?)`\]->\(b\) SET r \+= row\.props")
+
+    def __init__(self):
+        self.nodes = {}          # (标签, name) -> 属性
+        self.relationships = {}  # (类型, (起点标签, name), (终点标签, name)) -> 属性
+        self.constraints = set()
+
+    def run(self, query, rows=()):
+        if m := self._CONSTRAINT.fullmatch(query):
+            self.constraints.add(m.group(1))
+        elif m := self._NODE.fullmatch(query):
+            for row in rows:
+                self.nodes.setdefault((m.group(1), row['name']), {}).update(row)
+        elif m := self._REL.fullmatch(query):
+            start_label, end_label, rel_type = m.groups()
+            for row in rows:
+                start, end = (start_label, row['start']), (end_label, row['end'])
+                if start in self.nodes and end in self.nodes:
+                    self.relationships.setdefault((rel_type, start, end), {}).update(row['props'])
+        else:
+            raise ValueError(f"MemoryGraph 不支持的语句: {query[:80]}")
+
+    def count(self, label=None, rel_type=None):
+        if rel_type is not None:
+            return sum(1 for key in self.relationships if key[0] == rel_type)
+        return sum(1 for key in self.nodes if label is None or key[0] == label)
+
+
+def export_graph(graph, out_dir, fmt='admin', batch_size=DEFAULT_BATCH_SIZE):
+    """按格式导出并校验，返回输出说明"""
+    if fmt == 'admin':
+        command = write_admin_import(graph, out_dir)
+        errors = validate_admin_import(out_dir)
+        if errors:
+            raise ValueError("导出的 CSV 未通过校验：\n" + '\n'.join(errors[:20]))
+        return f"neo4j-admin 导入文件已写入 {out_dir}\n   {command}"
+    if fmt == 'cypher':
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, 'graph_import.cypher')
+        batches = write_unwind_cypher(graph, path, batch_size)
+        # 在本地替身上执行同一批语句，核对节点与关系数量
+        standin = MemoryGraph()
+        load_with_driver(standin, graph, batch_size)
+        for label, df in graph.nodes.items():
+            if standin.count(label=label) != len(df):
+                raise ValueError(f"替身图中 {label} 节点数 {standin.count(label=label)} != {len(df)}")
+        for rel_type, _, _, df in graph.relationships:
+            expected = len(df.drop_duplicates(['start', 'end']))
+            if standin.count(rel_type=rel_type) < expected:
+                raise ValueError(f"替身图中 :{rel_type} 关系数 {standin.count(rel_type=rel_type)} < {expected}")
+        return f"Cypher 脚本已写入 {path}（{batches} 条语句，每批最多 {batch_size} 行）"
+    raise ValueError(f"未知的导出格式: {fmt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='由分析结果生成 Neo4j 批量导入文件')
+    parser.add_argument('results', help='分析结果 CSV（citywalk_analysis_results.csv 或 打卡点情感分析结果.csv）')
+    parser.add_argument('--out', default='neo4j_import', help='输出目录（默认 neo4j_import）')
+    parser.add_argument('--format', choices=['admin', 'cypher'], default='admin', help='admin: neo4j-admin CSV；cypher: 分批 UNWIND 脚本')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'UNWIND 每批行数（默认 {DEFAULT_BATCH_SIZE}）')
+    args = parser.parse_args()
+
+    import pandas as pd
+    graph = graph_from_results(pd.read_csv(args.results, encoding='utf-8-sig'))
+    print(f"图规模：{graph.summary()}")
+    print(export_graph(graph, args.out, args.format, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+增量分析状态
+保存每打卡点的充分统计量（见 LandmarkAccumulator）、按日的趋势统计（见 trends.TrendAccumulator）、
+流程扩展的统计（见 pipeline.PipelineHook）和已处理评论的水位线，
+重复运行时只需为水位线之后新增的评论打分，再把结果原地合并进已有统计
+"""
+
+import hashlib
+import json
+import os
+
+
+DEFAULT_STATE_PATH = '打卡点情感分析状态.npz'
+STATE_FORMAT = 5
+
+
+class StaleStateError(ValueError):
+    """状态与当前输入不符（水位线之前的数据被改动或截短），需要全量重算"""
+
+
+def config_fingerprint(*parts):
+    """分析配置（打卡点库、词典等）的指纹，配置变化后旧状态作废"""
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ContentDigest:
+    """按顺序累积评论内容的摘要，与分块方式无关，用来确认水位线之前的数据没有变化"""
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    def update(self, values):
+        import numpy as np
+        import pandas as pd
+        values = np.asarray(values, dtype=object)
+        if len(values):
+            self._hash.update(pd.util.hash_array(values).tobytes())
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class IncrementalState:
+    """已处理前缀的统计快照
+
+    watermark:   已处理的评论条数（输入按行追加时，新评论即第 watermark 行之后的部分）
+    digest:      前 watermark 条评论内容的 ContentDigest
+    valid_count: 其中预处理后非空的条数
+    trends:      按 (打卡点, 日) 的 TrendAccumulator；输入没有发布时间列时为空
+    hooks:       {扩展名: PipelineHook.state_dict()}
+    as_of:       上次运行解析发布时间所用的抓取时间（ISO 字符串），数据本身定不出抓取时间时沿用
+    """
+
+    def __init__(self, accumulator, watermark, digest, valid_count, fingerprint, trends=None, hooks=None,
+                 as_of=None):
+        self.accumulator = accumulator
+        self.trends = trends
+        self.hooks = hooks or {}
+        self.as_of = as_of
+        self.watermark = watermark
+        self.digest = digest
+        self.valid_count = valid_count
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def load(cls, path, fingerprint, hooks=()):
+        """读取状态文件；文件不存在、格式或配置指纹不符时返回 None
+
+        hooks: 要恢复统计的扩展名
+        """
+        if not os.path.exists(path):
+            return None
+        import numpy as np
+        from .accumulators import LandmarkAccumulator
+        from .trends import TrendAccumulator
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != STATE_FORMAT or meta.get('fingerprint') != fingerprint:
+                return None
+            accumulator = LandmarkAccumulator.from_state_dict(data)
+            trends = None
+            if 'trend_day' in data.files:
+                trends = TrendAccumulator.from_state_dict({key[len('trend_'):]: data[key] for key in data.files
+                                                           if key.startswith('trend_')})
+            hook_states = {name: {key[len(f'hook_{name}_'):]: data[key] for key in data.files
+                                  if key.startswith(f'hook_{name}_')} for name in hooks}
+        return cls(accumulator, meta['watermark'], meta['digest'], meta['valid_count'], fingerprint, trends,
+                   hook_states, meta.get('as_of'))
+
+    def save(self, path):
+        """原子写入：先写临时文件再替换"""
+        import numpy as np
+        meta = {
+            'format': STATE_FORMAT,
+            'fingerprint': self.fingerprint,
+            'watermark': self.watermark,
+            'digest': self.digest,
+            'valid_count': self.valid_count,
+            'as_of': self.as_of,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        trends = self.trends.state_dict() if self.trends is not None else {}
+        hooks = {f'hook_{name}_{key}': value for name, state in self.hooks.items() for key, value in state.items()}
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), **self.accumulator.state_dict(),
+                 **{f'trend_{key}': value for key, value in trends.items()}, **hooks)
+        os.replace(tmp_path, path)
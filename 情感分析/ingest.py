@@ -0,0 +1,215 @@
+"""
+数据读取
+- 按固定行数分块读取 CSV / JSONL / Parquet / xlsx，任意大小的语料内存占用都有上限
+- xlsx 工作簿首次解析后转存为列式 Parquet 缓存（按源文件修改时间+大小失效），之后内存映射读取
+pandas / pyarrow / openpyxl 都在读写时才导入，只取常量（如命令行默认值）不会加载它们
+
+用法：python -m 情感分析.ingest 数据/*.xlsx   # 预先生成缓存并报告冷/热加载耗时
+"""
+
+import argparse
+import os
+import time
+
+
+DEFAULT_CHUNKSIZE = 50_000
+CACHE_DIR_NAME = '.citywalk_cache'
+_FINGERPRINT_KEY = b'citywalk_source'
+
+
+def find_content_column(columns):
+    """找出评论内容列：优先 content，其次含“内容/评论/文本”的列，找不到返回 None"""
+    if 'content' in columns:
+        return 'content'
+    cols = [c for c in columns if '内容' in str(c) or '评论' in str(c) or '文本' in str(c)]
+    return cols[0] if cols else None
+
+
+def find_time_column(columns):
+    """找出发布时间列：优先 time / date，其次含“时间/日期”的列，找不到返回 None"""
+    for name in ('time', 'date'):
+        if name in columns:
+            return name
+    cols = [c for c in columns if '时间' in str(c) or '日期' in str(c)]
+    return cols[0] if cols else None
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, sheet_name=None):
+    """逐块读取数据文件，每块为不超过 chunksize 行的 DataFrame"""
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        yield from pd.read_csv(path, encoding='utf-8', chunksize=chunksize)
+    elif ext in ('.jsonl', '.ndjson'):
+        yield from pd.read_json(path, lines=True, chunksize=chunksize)
+    elif ext == '.parquet':
+        yield from _iter_parquet(path, chunksize)
+    elif ext in ('.xlsx', '.xlsm'):
+        cache_path = excel_cache_path(path, sheet_name or 0)
+        if _cache_is_fresh(cache_path, _source_fingerprint(path)):
+            yield from _iter_parquet(cache_path, chunksize)
+        else:
+            yield from _iter_xlsx(path, chunksize, sheet_name)
+    else:
+        raise ValueError(f"不支持的文件格式: {path}")
+
+
+def _iter_parquet(path, chunksize):
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def _iter_xlsx(path, chunksize, sheet_name=None):
+    """openpyxl 只读模式逐行读取，不会把整个工作表载入内存"""
+    import pandas as pd
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f'Unnamed: {i}' for i, c in enumerate(header)]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def write_chunks(chunks, path):
+    """把逐块产生的 DataFrame 写入一个文件，返回写入的行数
+
+    CSV / JSONL / Parquet 边写边释放；xlsx 不支持追加，只能合并后一次写出（且受 Excel 行数上限约束）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    total = 0
+    if ext in ('.xlsx', '.xlsm'):
+        import pandas as pd
+        parts = list(chunks)
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        df.to_excel(path, index=False)
+        return len(df)
+
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            total += len(chunk)
+            if ext == '.csv':
+                chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False,
+                             encoding='utf-8-sig' if i == 0 else 'utf-8')
+            elif ext in ('.jsonl', '.ndjson'):
+                with open(path, 'w' if i == 0 else 'a', encoding='utf-8') as f:
+                    chunk.to_json(f, orient='records', lines=True, force_ascii=False)
+            elif ext == '.parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                raise ValueError(f"不支持的文件格式: {path}")
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def excel_cache_path(path, sheet_name=0, cache_dir=None):
+    """工作簿对应的 Parquet 缓存路径，默认放在源文件同目录的 .citywalk_cache 下"""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{sheet_name}.parquet")
+
+
+def _source_fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+
+def _cache_is_fresh(cache_path, fingerprint):
+    try:
+        import pyarrow.parquet as pq
+        metadata = pq.read_schema(cache_path, memory_map=True).metadata or {}
+    except Exception:
+        return False
+    return metadata.get(_FINGERPRINT_KEY) == fingerprint
+
+
+def _write_cache(df, cache_path, fingerprint):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _FINGERPRINT_KEY: fingerprint})
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def read_excel_cached(path, sheet_name=0, cache_dir=None, refresh=False):
+    """读取工作表，优先使用新鲜的 Parquet 缓存；未安装 pyarrow 时退化为直接读 Excel
+
+    返回的 DataFrame.attrs['cache'] 记录 {'hit': 是否命中缓存, 'seconds': 耗时, 'path': 缓存路径}，
+    attrs['source'] 为工作簿路径（pipeline 用它的修改时间作默认抓取时间）
+    """
+    start = time.perf_counter()
+    cache_path = excel_cache_path(path, sheet_name, cache_dir)
+    fingerprint = _source_fingerprint(path)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        pq = None
+
+    hit = pq is not None and not refresh and _cache_is_fresh(cache_path, fingerprint)
+    if hit:
+        df = pq.read_table(cache_path, memory_map=True).to_pandas()
+    else:
+        import pandas as pd
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        if pq is not None:
+            try:
+                _write_cache(df, cache_path, fingerprint)
+            except Exception as e:
+                print(f"⚠️  无法写入列式缓存 {cache_path}: {e}")
+
+    df.attrs['cache'] = {'hit': hit, 'seconds': time.perf_counter() - start, 'path': cache_path}
+    df.attrs['source'] = path
+    return df
+
+
+def describe_load(df):
+    """read_excel_cached 的加载情况说明"""
+    info = df.attrs.get('cache')
+    if not info:
+        return ''
+    source = '列式缓存' if info['hit'] else 'Excel 解析（已写入列式缓存）'
+    return f"{source}，耗时 {info['seconds']:.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把 xlsx 工作簿转存为 Parquet 缓存并报告冷/热加载耗时')
+    parser.add_argument('paths', nargs='+', help='xlsx 文件')
+    parser.add_argument('--sheet', default=0, help='工作表名或序号（默认第一个）')
+    args = parser.parse_args()
+    sheet = int(args.sheet) if str(args.sheet).isdigit() else args.sheet
+
+    for path in args.paths:
+        cold = read_excel_cached(path, sheet, refresh=True)
+        warm = read_excel_cached(path, sheet)
+        cold_s, warm_s = cold.attrs['cache']['seconds'], warm.attrs['cache']['seconds']
+        print(f"{path}: {len(warm)} 行 | 冷加载 {cold_s:.3f}s | 热加载 {warm_s:.3f}s "
+              f"({cold_s / max(warm_s, 1e-9):.0f}x) -> {warm.attrs['cache']['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+运行埋点
+分阶段计时、行数计数、各阶段内存变化，可选 cProfile / pyinstrument 采样，汇总成结构化的 JSON 运行报告；
+另提供带速率与剩余时间估计的进度显示
+"""
+
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+PROFILERS = ('cprofile', 'pyinstrument')
+PROFILE_TOP = 25
+
+
+def current_rss_mb():
+    """本进程当前常驻内存 (MB)，无法获取时为 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """本进程的峰值常驻内存 (MB)，无法获取时为 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 计，macOS 以字节计
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+        except ImportError:
+            return None
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class RunReport:
+    """一次运行的埋点记录
+
+    同名阶段多次进入时累加（例如逐块处理时每块的预处理），记录总耗时、次数、行数和内存变化；
+    profile 为 'cprofile' 或 'pyinstrument' 时整个运行期间开启采样，结束时写出到 profile_path
+    """
+
+    def __init__(self, name, profile=None, profile_path=None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"未知的采样器: {profile}，可选: {', '.join(PROFILERS)}")
+        self.name = name
+        self.started = datetime.now()
+        self.stages = {}
+        self.counters = {}
+        self.profile = profile
+        self.profile_path = profile_path
+        self.profile_summary = None
+        self._t0 = time.perf_counter()
+        self._rss0 = current_rss_mb()
+        self._current = None
+        self._elapsed = None
+        self._profiler = None
+        if profile:
+            self._start_profiler()
+
+    # -- 阶段 -----------------------------------------------------------------
+
+    def _record(self, name, seconds, rss_before, rows):
+        stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'rows': 0, 'rss_delta_mb': 0.0})
+        stage['seconds'] += seconds
+        stage['calls'] += 1
+        if rows is not None:
+            stage['rows'] += int(rows)
+        rss_after = current_rss_mb()
+        if rss_before is not None and rss_after is not None:
+            stage['rss_delta_mb'] += rss_after - rss_before
+
+    @contextmanager
+    def span(self, name, rows=None):
+        """计时一段代码：with run.span('score', rows=n): ..."""
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start, rss_before, rows)
+
+    def stage(self, name, rows=None):
+        """顺序阶段标记：结束上一个阶段并开始新阶段，适合线性的 main() 流程"""
+        self.end_stage()
+        self._current = (name, time.perf_counter(), current_rss_mb(), rows)
+
+    def end_stage(self):
+        if self._current is not None:
+            name, start, rss_before, rows = self._current
+            self._current = None
+            self._record(name, time.perf_counter() - start, rss_before, rows)
+
+    def iter(self, name, iterable):
+        """逐项计时迭代器的取数耗时（例如流式读取的每个数据块），行数按 len(item) 累加"""
+        iterator = iter(iterable)
+        while True:
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self._record(name, time.perf_counter() - start, rss_before, len(item) if hasattr(item, '__len__') else None)
+            yield item
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    # -- 采样 -----------------------------------------------------------------
+
+    def _start_profiler(self):
+        if self.profile == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("⚠️  未安装 pyinstrument，改用 cProfile")
+                self.profile = 'cprofile'
+            else:
+                self._profiler = Profiler()
+                self._profiler.start()
+                return
+        import cProfile
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def _stop_profiler(self):
+        if self._profiler is None:
+            return
+        if self.profile == 'pyinstrument':
+            self._profiler.stop()
+            path = self.profile_path or f"{self.name}.pyinstrument.html"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+            self.profile_summary = self._profiler.output_text(unicode=True, color=False)
+        else:
+            import pstats
+            self._profiler.disable()
+            path = self.profile_path or f"{self.name}.prof"
+            self._profiler.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            self.profile_summary = out.getvalue()
+        self.profile_path = path
+        self._profiler = None
+
+    # -- 汇总 -----------------------------------------------------------------
+
+    def finish(self):
+        """结束当前阶段和采样；可重复调用"""
+        self.end_stage()
+        self._stop_profiler()
+        if self._elapsed is None:
+            self._elapsed = time.perf_counter() - self._t0
+        return self
+
+    def to_dict(self):
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._t0
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = {
+                'seconds': round(stage['seconds'], 4),
+                'share': round(stage['seconds'] / elapsed, 4) if elapsed else None,
+                'calls': stage['calls'],
+                'rows': stage['rows'],
+                'rows_per_second': round(stage['rows'] / stage['seconds'], 1) if stage['rows'] and stage['seconds'] else None,
+                'rss_delta_mb': round(stage['rss_delta_mb'], 2),
+            }
+        return {
+            'name': self.name,
+            'started': self.started.isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 4),
+            'stages': stages,
+            'counters': dict(self.counters),
+            'rss_start_mb': self._rss0,
+            'rss_end_mb': current_rss_mb(),
+            'peak_rss_mb': peak_rss_mb(),
+            'profile': {'mode': self.profile, 'path': self.profile_path, 'top': self.profile_summary}
+                       if self.profile else None,
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_summary(self):
+        """各阶段耗时占比，一行一个阶段"""
+        report = self.to_dict()
+        lines = [f"⏱  {self.name} 用时 {report['elapsed_seconds']:.2f}s"
+                 + (f"，峰值内存 {report['peak_rss_mb']:.0f}MB" if report['peak_rss_mb'] else '')]
+        for name, stage in report['stages'].items():
+            rows = f"，{stage['rows']} 行" if stage['rows'] else ''
+            lines.append(f"   {name:12s} {stage['seconds']:8.3f}s {stage['share'] or 0:6.1%}"
+                         f"  内存 {stage['rss_delta_mb']:+.1f}MB{rows}")
+        return '\n'.join(lines)
+
+
+class Progress:
+    """进度显示：已完成数 / 总数、速率和剩余时间估计
+
+    终端中原地刷新一行，输出被重定向时每隔 min_interval 秒打印一行；total 未知时只显示数量和速率
+    """
+
+    def __init__(self, total=None, label='', unit='', stream=None, min_interval=1.0):
+        self.total = total
+        self.label = label
+        self.unit = unit
+        self.stream = stream or sys.stdout
+        self.min_interval = min_interval
+        self.done = 0
+        self._start = time.perf_counter()
+        self._last = None
+        self._drawn = None
+        self._tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+
+    def update(self, n=1, note=''):
+        self.done += n
+        now = time.perf_counter()
+        if self._last is None or now - self._last >= self.min_interval or self.done == self.total:
+            self._last = now
+            self._draw(now, note)
+
+    def _draw(self, now, note):
+        self._drawn = self.done
+        elapsed = now - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            eta = (self.total - self.done) / rate if rate else 0.0
+            text = (f"{self.label} {self.done}/{self.total}{self.unit} ({self.done / self.total:.0%}) "
+                    f"{rate:.0f}{self.unit}/s ETA {_format_duration(eta)}")
+        else:
+            text = f"{self.label} {self.done}{self.unit} {rate:.0f}{self.unit}/s {_format_duration(elapsed)}"
+        if note:
+            text += f" {note}"
+        if self._tty:
+            self.stream.write('\r' + text + '\x1b[K')
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._drawn != self.done:
+            self._draw(time.perf_counter(), '')
+        if self._tty:
+            self.stream.write('\n')
+            self.stream.flush()
@@ -0,0 +1,309 @@
+"""
+打卡点自动发现
+从整个语料中挖掘地名表（gazetteer.py）之外的候选地名：以 路/公园/寺/里/新所/广场 等后缀结尾的 n-gram，
+按频次、内部凝固度（PMI）和左右边界熵打分排序，供人工确认后补进地名表。
+
+两遍流式扫描，耗时与语料规模成线性、内存有上限：
+1. 在每个后缀出现处取前面 2-4 个汉字组成候选，统计候选的频次与左右邻字；
+   候选表超过 max_candidates 时按有损计数（lossy counting）淘汰低频候选
+2. 对候选及其各种切分的两部分精确计数：把评论拼成码点数组，用 numpy 滚动哈希一次算出某一长度的全部窗口，
+   先经直接寻址的位图滤掉绝大多数窗口，剩下的再与所需子串的哈希有序表比对，不逐字循环
+
+用法：python -m 情感分析.landmark_discovery [数据文件] [--top 50] [--output 候选打卡点.csv]
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+
+DEFAULT_SUFFIXES = ('路', '公园', '寺', '里', '新所', '广场', '公馆', '古镇', '弄', '街', '桥')
+MIN_STEM = 2
+MAX_STEM = 4
+# 以这些字开头的多半是“在这里”“一条街”之类的短语而不是地名
+STOP_CHARS = frozenset('这那哪在来去到从往过条个一的了是和与及很也都就还')
+DEFAULT_MIN_COUNT = 5
+# PMI 以 bit 计；边界熵取左右两侧较小者，同样以 bit 计
+DEFAULT_MIN_PMI = 1.0
+DEFAULT_MIN_ENTROPY = 1.0
+DEFAULT_MAX_CANDIDATES = 200_000
+DEFAULT_TOP = 50
+# 第二遍每批拼接的字符数上限，决定滚动哈希数组的内存占用
+BATCH_CHARS = 2_000_000
+DEFAULT_OUTPUT = '候选打卡点.csv'
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据', '去重后的数据.xlsx')
+
+_CJK_RUN = re.compile(r'[一-龥]+')
+# 多项式滚动哈希（mod 2^64），按长度分表，不同子串相撞的概率可以忽略
+_BASE = np.uint64(0x100000001B3)
+# 位图预筛：哈希再乘一个奇数常量取高位作为槽位，不在位图中的窗口不必二分查找
+_FILTER_BITS = 20
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BOUNDARY = ''
+
+
+def _codes(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+
+def _window_hashes(codes, length):
+    """codes 中每个长度为 length 的窗口的哈希"""
+    n = len(codes) - length + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64)
+    h = codes[:n].copy()
+    for j in range(1, length):
+        h *= _BASE
+        h += codes[j:j + n]
+    return h
+
+
+def _slots(hashes):
+    return ((hashes * _MIX) >> np.uint64(64 - _FILTER_BITS)).astype(np.intp)
+
+
+def _entropy(neighbors):
+    """邻字分布的熵（bit）；评论/汉字片段边界每次出现都算作不同的邻字"""
+    boundary = neighbors.get(_BOUNDARY, 0)
+    counts = [c for ch, c in neighbors.items() if ch != _BOUNDARY]
+    total = sum(counts) + boundary
+    if not total:
+        return 0.0
+    h = -sum(c / total * math.log2(c / total) for c in counts)
+    return h + boundary / total * math.log2(total)
+
+
+class LandmarkDiscovery:
+    """候选地名统计：add_texts（第一遍）-> count_texts（第二遍）-> candidates()"""
+
+    def __init__(self, suffixes=DEFAULT_SUFFIXES, min_stem=MIN_STEM, max_stem=MAX_STEM,
+                 max_candidates=DEFAULT_MAX_CANDIDATES):
+        self.suffixes = tuple(suffixes)
+        self.min_stem = min_stem
+        self.max_stem = max_stem
+        self.max_candidates = max_candidates
+        # 长后缀优先，“公园”不会被拆成“园”
+        ordered = sorted(self.suffixes, key=len, reverse=True)
+        self._suffix_re = re.compile('|'.join(re.escape(s) for s in ordered))
+        self.count = Counter()
+        self.left = {}
+        self.right = {}
+        self.suffix_of = {}
+        # 有损计数的淘汰线：被淘汰候选的真实频次不超过它
+        self.floor = 0
+        self._parts = None
+        self._part_counts = None
+        self._filters = None
+        self.total_chars = 0
+
+    # ---- 第一遍：候选与邻字 ----
+
+    def add_texts(self, texts):
+        count, left, right, suffix_of = self.count, self.left, self.right, self.suffix_of
+        lo, hi = self.min_stem, self.max_stem
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            for run in _CJK_RUN.findall(text):
+                for m in self._suffix_re.finditer(run):
+                    start, end = m.span()
+                    after = run[end] if end < len(run) else _BOUNDARY
+                    for k in range(lo, min(hi, start) + 1):
+                        if run[start - k] in STOP_CHARS:
+                            continue
+                        candidate = run[start - k:end]
+                        count[candidate] += 1
+                        before = run[start - k - 1] if start - k > 0 else _BOUNDARY
+                        if candidate not in left:
+                            left[candidate] = Counter()
+                            right[candidate] = Counter()
+                            suffix_of[candidate] = m.group()
+                        left[candidate][before] += 1
+                        right[candidate][after] += 1
+            if len(count) > self.max_candidates:
+                self._prune()
+
+    def _prune(self):
+        """抬高淘汰线直到候选表降到上限的一半"""
+        while len(self.count) > self.max_candidates // 2:
+            self.floor += 1
+            for candidate in [c for c, n in self.count.items() if n <= self.floor]:
+                del self.count[candidate], self.left[candidate], self.right[candidate], self.suffix_of[candidate]
+
+    # ---- 第二遍：精确计数 ----
+
+    def _prepare_parts(self, min_count):
+        """候选及其每种切分的左右两部分 -> 按长度分组的哈希有序表"""
+        parts = set()
+        for candidate, n in self.count.items():
+            if n >= min_count:
+                parts.add(candidate)
+                parts.update(candidate[:i] for i in range(1, len(candidate)))
+                parts.update(candidate[i:] for i in range(1, len(candidate)))
+        by_length = {}
+        for part in parts:
+            by_length.setdefault(len(part), []).append(part)
+        self._parts = {}
+        self._part_counts = {}
+        self._filters = {}
+        for length, strings in by_length.items():
+            codes = _codes(''.join(strings)).reshape(len(strings), length)
+            hashes = codes[:, 0].copy()
+            for j in range(1, length):
+                hashes *= _BASE
+                hashes += codes[:, j]
+            order = np.argsort(hashes)
+            self._parts[length] = (hashes[order], [strings[i] for i in order])
+            self._part_counts[length] = np.zeros(len(strings), dtype=np.int64)
+            self._filters[length] = np.zeros(1 << _FILTER_BITS, dtype=bool)
+            self._filters[length][_slots(hashes)] = True
+
+    def count_texts(self, texts, min_count=DEFAULT_MIN_COUNT):
+        """第二遍：统计候选及其切分部分在语料中的出现次数（首次调用时按 min_count 确定需要计数的子串）"""
+        if self._parts is None:
+            self._prepare_parts(min_count)
+        batch, size = [], 0
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            batch.append(text)
+            size += len(text) + 1
+            if size >= BATCH_CHARS:
+                self._count_batch(batch)
+                batch, size = [], 0
+        if batch:
+            self._count_batch(batch)
+
+    def _count_batch(self, texts):
+        # 换行分隔各条评论，需要计数的子串都是汉字，不会跨评论命中
+        codes = _codes('\n'.join(texts))
+        self.total_chars += len(codes) - (len(texts) - 1)
+        for length, (keys, _) in self._parts.items():
+            if length == 1:
+                # 单字的“哈希”就是码点本身，直接按码点计数
+                counts = np.bincount(codes.astype(np.intp))
+                inside = keys < len(counts)
+                self._part_counts[1][inside] += counts[keys[inside].astype(np.intp)]
+                continue
+            hashes = _window_hashes(codes, length)
+            hashes = hashes[self._filters[length][_slots(hashes)]]
+            idx = np.searchsorted(keys, hashes)
+            idx[idx == len(keys)] = 0
+            hit = idx[keys[idx] == hashes]
+            self._part_counts[length] += np.bincount(hit, minlength=len(keys))
+
+    def frequency(self, part):
+        """第二遍统计的子串出现次数"""
+        keys, strings = self._parts[len(part)]
+        h = _window_hashes(_codes(part), len(part))[0]
+        i = int(np.searchsorted(keys, h))
+        return int(self._part_counts[len(part)][i]) if i < len(keys) and keys[i] == h and strings[i] == part else 0
+
+    # ---- 打分 ----
+
+    def candidates(self, min_count=DEFAULT_MIN_COUNT, min_pmi=DEFAULT_MIN_PMI, min_entropy=DEFAULT_MIN_ENTROPY,
+                   known=None):
+        """候选地名排行（DataFrame）
+
+        PMI 取各种切分中最小者：log2(f(w)·N / (f(左)·f(右)))，衡量候选是否“粘”成一个词；
+        边界熵取左右邻字熵的较小者，衡量候选能否自由地出现在不同上下文中；
+        得分 = log2(1+频次) × PMI × 边界熵。known(名称) 为真的候选（如地名表已收录）被排除，
+        以已收录地名结尾、前面多出几个字的候选（“穿梭富民路”）同样排除
+        """
+        import pandas as pd
+        if self._parts is None:
+            raise RuntimeError("请先用 count_texts 完成第二遍计数")
+        lookup = {}
+        for length, (_, strings) in self._parts.items():
+            counts = self._part_counts[length]
+            lookup.update(zip(strings, counts.tolist()))
+        n = max(self.total_chars, 1)
+
+        rows = []
+        for candidate, first_pass in self.count.items():
+            f = lookup.get(candidate, 0)
+            if first_pass < min_count or f < min_count:
+                continue
+            if known and any(known(candidate[i:]) for i in range(len(candidate) - 1)):
+                continue
+            pmi = min(math.log2(f * n / (lookup[candidate[:i]] * lookup[candidate[i:]]))
+                      for i in range(1, len(candidate)))
+            h_left, h_right = _entropy(self.left[candidate]), _entropy(self.right[candidate])
+            entropy = min(h_left, h_right)
+            if pmi < min_pmi or entropy < min_entropy:
+                continue
+            rows.append({
+                '候选地名': candidate,
+                '后缀': self.suffix_of[candidate],
+                '频次': f,
+                'PMI': round(pmi, 3),
+                '左熵': round(h_left, 3),
+                '右熵': round(h_right, 3),
+                '得分': round(math.log2(1 + f) * pmi * entropy, 3),
+            })
+        columns = ['候选地名', '后缀', '频次', 'PMI', '左熵', '右熵', '得分']
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values(['得分', '频次'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def iter_texts(path, chunksize=None):
+    """逐块读取数据文件，生成评论内容列的文本"""
+    from .ingest import DEFAULT_CHUNKSIZE, find_content_column, iter_chunks
+    for chunk in iter_chunks(path, chunksize or DEFAULT_CHUNKSIZE):
+        column = find_content_column(chunk.columns) or chunk.columns[-1]
+        yield from chunk[column].tolist()
+
+
+def discover(open_texts, min_count=DEFAULT_MIN_COUNT, min_pmi=DEFAULT_MIN_PMI, min_entropy=DEFAULT_MIN_ENTROPY,
+             include_known=False, **options):
+    """两遍扫描语料，返回候选地名排行
+
+    open_texts: 无参函数，每次调用返回一个新的评论文本迭代器（会被调用两次）
+    options:    传给 LandmarkDiscovery（suffixes、min_stem、max_stem、max_candidates）
+    """
+    discovery = LandmarkDiscovery(**options)
+    discovery.add_texts(open_texts())
+    discovery.count_texts(open_texts(), min_count)
+    known = None
+    if not include_known:
+        from .gazetteer import GAZETTEER
+        known = GAZETTEER.__contains__
+    return discovery.candidates(min_count, min_pmi, min_entropy, known)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog=f'python -m {__package__}.landmark_discovery',
+                                     description='从语料中挖掘地名表之外的候选打卡点')
+    parser.add_argument('input', nargs='?', default=SAMPLE_PATH, help='数据文件（csv/jsonl/parquet/xlsx）')
+    parser.add_argument('--suffixes', default=','.join(DEFAULT_SUFFIXES), help='地名后缀（逗号分隔）')
+    parser.add_argument('--min-count', type=int, default=DEFAULT_MIN_COUNT, help=f'最低频次（默认 {DEFAULT_MIN_COUNT}）')
+    parser.add_argument('--min-pmi', type=float, default=DEFAULT_MIN_PMI, help=f'最低 PMI，bit（默认 {DEFAULT_MIN_PMI}）')
+    parser.add_argument('--min-entropy', type=float, default=DEFAULT_MIN_ENTROPY,
+                        help=f'最低边界熵，bit（默认 {DEFAULT_MIN_ENTROPY}）')
+    parser.add_argument('--max-candidates', type=int, default=DEFAULT_MAX_CANDIDATES,
+                        help=f'第一遍候选表上限（默认 {DEFAULT_MAX_CANDIDATES}）')
+    parser.add_argument('--include-known', action='store_true', help='排行中保留地名表已收录的地名')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'打印前若干个候选（默认 {DEFAULT_TOP}）')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'完整排行写入的 CSV（默认 {DEFAULT_OUTPUT}）')
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    ranked = discover(lambda: iter_texts(args.input), args.min_count, args.min_pmi, args.min_entropy,
+                      args.include_known, suffixes=[s for s in args.suffixes.split(',') if s],
+                      max_candidates=args.max_candidates)
+    print(f"发现 {len(ranked)} 个候选地名，耗时 {time.perf_counter() - t:.2f}s")
+    if len(ranked):
+        print(ranked.head(args.top).to_string(index=False))
+    ranked.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"完整排行: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
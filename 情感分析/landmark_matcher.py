@@ -0,0 +1,75 @@
+"""
+打卡点匹配器
+由打卡点关键词表（及别名）构建一次自动机，单次扫描评论即可得到所有打卡点及其位置，别名在同一次扫描中归一为标准名
+"""
+
+import re
+
+from .aho_corasick import AhoCorasick
+
+
+# 打卡点关键词表（标准名；别名与上下级见 gazetteer.py，各分析脚本经地名表匹配）
+LANDMARK_KEYWORDS = [
+    '外滩', '南京路', '豫园', '城隍庙', '田子坊', '新天地',
+    '武康路', '安福路', '思南公馆', '静安寺', '陆家嘴',
+    '迪士尼', '朱家角', '枫泾', '七宝', 'M50',
+    '上生新所', '愚园路', '淮海路', '甜爱路', '多伦路',
+    '徐家汇', '龙华寺', '长乐路', '乌鲁木齐路', '陕西南路',
+    '复兴路', '嘉陵路', '淮海中路', '黄陂南路', '泰康路',
+    '湖南路', '天平路', '衡山路', '山阴路', '霍山路',
+    '茅台路', '永康路', '汾阳路', '巨鹿路', '富民路',
+    '建国西路', '建国中路', '建国路', '复兴中路', '复兴西路',
+    '陕西北路', '西康路', '威海路', '万航渡路', '昭化路',
+    '铜仁路', '华山路', '东平路', '古美路', '南阳路',
+    '凯旋路', '百乐门', '福州路', '兆丰路', '冠生园',
+    '北京东路', '北京西路', '人民广场', '人民公园',
+    '东方明珠', '世纪大道', '浦东', '浦西', '浦北',
+    '北外滩', '外白渡桥', '皇家园林', '四川北路',
+    '共青团', '虹口', '黄浦江', '长风',
+    '瑞金医院', '长海医院', '静安别墅', '常德公馆',
+    '仁德里', '三十二弄', '吴昌硕公园', '长宁公园',
+    '江南造船厂', '文采里', '恒丰路',
+]
+
+
+# 纯 ASCII 且含字母的名称（英文名、拼音）按整词匹配，避免 bund 命中 bundle
+_LATIN_WORD = re.compile(r'[\x00-\x7f]*[A-Za-z][\x00-\x7f]*')
+_ASCII_ALNUM = re.compile(r'[A-Za-z0-9]')
+
+
+def _word_bounded(text, start, end):
+    return not ((start > 0 and _ASCII_ALNUM.match(text[start - 1])) or
+                (end < len(text) and _ASCII_ALNUM.match(text[end])))
+
+
+class LandmarkMatcher:
+    """打卡点匹配器 - 最左最长匹配，重叠地名（外滩/北外滩）取最长者
+
+    aliases: {别名: 标准名}，命中别名时返回标准名（通常来自 gazetteer.Gazetteer.matcher）；
+             名称中有拉丁字母时整个匹配不区分大小写
+    """
+
+    def __init__(self, landmarks=LANDMARK_KEYWORDS, aliases=None):
+        aliases = dict(aliases or {})
+        surfaces = list(dict.fromkeys(list(landmarks) + list(aliases)))
+        self._fold = any(_LATIN_WORD.fullmatch(s) for s in surfaces)
+        keys = [s.lower() for s in surfaces] if self._fold else surfaces
+        canonical = {}
+        for key, surface in zip(keys, surfaces):
+            canonical.setdefault(key, aliases.get(surface, surface))
+        self._automaton = AhoCorasick(keys)
+        self._canonical = [canonical[p] for p in self._automaton.patterns]
+        self._latin = [bool(_LATIN_WORD.fullmatch(p)) for p in self._automaton.patterns]
+        self.landmarks = list(dict.fromkeys(aliases.get(lm, lm) for lm in landmarks))
+
+    def find(self, text):
+        """返回所有命中 [(打卡点标准名, 起始位置), ...]，按出现位置排序"""
+        if self._fold and isinstance(text, str):
+            text = text.lower()
+        names, latin = self._canonical, self._latin
+        return [(names[pid], start) for start, end, pid in self._automaton.find_longest(text)
+                if not latin[pid] or _word_bounded(text, start, end)]
+
+    def match(self, text):
+        """返回评论中提及的打卡点（去重，按首次出现顺序）"""
+        return list(dict.fromkeys(landmark for landmark, _ in self.find(text)))
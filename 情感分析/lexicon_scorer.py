@@ -0,0 +1,240 @@
+"""
+编译型情感词典打分器
+情感词表编译一次，每条文本只扫描一遍即可得到正/负面权重合计
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from .aho_corasick import AhoCorasick
+
+
+# 批量打分结果：每个字段都是与输入等长的连续 NumPy 数组
+BatchScores = namedtuple('BatchScores', ['score', 'pos_total', 'neg_total', 'matched'])
+
+
+def make_batch_scores(pos_total, neg_total, matched):
+    """由正/负面权重和计算情感得分，组装成 BatchScores"""
+    pos_total = np.ascontiguousarray(pos_total, dtype=np.float64)
+    neg_total = np.ascontiguousarray(neg_total, dtype=np.float64)
+    total = pos_total + neg_total
+    score = np.full(len(total), 0.5)
+    np.divide(pos_total, total, out=score, where=total != 0)
+    np.clip(score, 0.0, 1.0, out=score)
+    return BatchScores(score, pos_total, neg_total, np.ascontiguousarray(matched, dtype=np.int32))
+
+
+class CompiledLexicon:
+    """编译后的情感词典
+
+    mode:
+        'scan'      - 默认。单次最左最长扫描，每次出现都计分，
+                      紧跟在否定词之后的积极词计为负面
+        'substring' - 兼容 情感分析.py：词典中每个词只要在文本中出现即计分一次
+        'token'     - 兼容 citywalk_analysis.py：按中文/英文连续片段整体查词典
+    neutral_words: 'scan' 模式下的普通词（通常取打标词表），本身不计分；
+                   单字情感词/否定词落在其中时（特别、宝贵、别墅、贵州）不再单独计分。
+                   这些词作为单字词分支后的否定环视并入同一个正则，扫描仍是一遍，不逐个命中回查
+    """
+
+    MODES = ('scan', 'substring', 'token')
+
+    def __init__(self, positive_words, negative_words, negation_words=(), mode='scan', neutral_words=()):
+        if mode not in self.MODES:
+            raise ValueError(f"未知的打分模式: {mode}，可选: {', '.join(self.MODES)}")
+        self.mode = mode
+        self.positive_words = dict(positive_words)
+        self.negative_words = dict(negative_words)
+        self.negation_words = set(negation_words)
+
+        self.neutral_words = frozenset()
+        if mode == 'scan':
+            terms = set(self.positive_words) | set(self.negative_words) | self.negation_words
+            # 只保留含单字词、且不含多字词的普通词：含多字词的（如“不喜欢”）仍按原规则计分
+            single = {t for t in terms if len(t) == 1}
+            multi = [t for t in terms if len(t) > 1]
+            candidates = (w for w in neutral_words
+                          if len(w) > 1 and w not in terms and any(c in single for c in w))
+            self.neutral_words = frozenset(w for w in candidates if not any(t in w for t in multi))
+            self._compile_scan(terms)
+        elif mode == 'substring':
+            self._automaton = AhoCorasick(list(self.positive_words) + list(self.negative_words))
+            patterns = self._automaton.patterns
+            # 保留原词典顺序累加，保证浮点结果与逐词 `in` 判断完全一致
+            self._positive_items = [(patterns.index(w), s) for w, s in self.positive_words.items()]
+            self._negative_items = [(patterns.index(w), s) for w, s in self.negative_words.items()]
+        else:
+            self._token_re = re.compile(r'[\u4e00-\u9fa5]+|[a-zA-Z]+')
+
+    def score_terms(self, text):
+        """返回 (积极权重和, 消极权重和, 命中词数)"""
+        if self.mode == 'scan':
+            return self._score_scan(text)
+        if self.mode == 'substring':
+            return self._score_substring(text)
+        return self._score_token(text)
+
+    def score(self, text):
+        """情感得分 (0-1)，无情感词时为 0.5"""
+        positive_score, negative_score, _ = self.score_terms(text)
+        total = positive_score + negative_score
+        if total == 0:
+            return 0.5
+        return min(1.0, max(0.0, positive_score / total))
+
+    def score_many(self, texts):
+        """批量打分，返回 BatchScores；'scan' 模式整批拼接后扫描一遍，计分按命中数组向量化"""
+        if self.mode == 'scan':
+            return self._scan_many(texts)
+        rows = [self.score_terms(t) for t in texts]
+        if not rows:
+            return make_batch_scores([], [], [])
+        return make_batch_scores(*zip(*rows))
+
+    def _compile_scan(self, terms):
+        """编译扫描正则与按词条编号的权重数组
+
+        按长度降序排列的备选分支即为最左最长匹配，由 re 在 C 层完成扫描；
+        单字词后接否定环视：该字落在某个普通词中（如“宝贵”的“贵”）时这一分支不匹配，扫描越过该字
+        """
+        contexts = {}
+        for word in self.neutral_words:
+            for i, ch in enumerate(word):
+                if ch in terms:
+                    contexts.setdefault(ch, []).append((word[:i + 1], word[i + 1:]))
+        ordered = sorted(terms, key=lambda t: (-len(t), t))
+        branches = []
+        for term in ordered:
+            branch = re.escape(term)
+            if term in contexts:
+                guards = '|'.join(f'(?<={re.escape(head)}){re.escape(tail)}' for head, tail in sorted(contexts[term]))
+                branch += f'(?!{guards})'
+            branches.append(branch)
+        self._term_re = re.compile('|'.join(branches)) if branches else None
+
+        # 词条编号 -> 权重；同时是积极词和否定词的按积极词计（与逐条扫描的判断顺序一致）
+        self._term_ids = {t: k for k, t in enumerate(ordered)}
+        self._positive = np.array([self.positive_words.get(t, 0.0) for t in ordered], dtype=np.float64)
+        self._is_positive = np.array([t in self.positive_words for t in ordered], dtype=bool)
+        self._is_negation = np.array([t in self.negation_words for t in ordered], dtype=bool) & ~self._is_positive
+        self._negative = np.array([self.negative_words.get(t, 0.0) for t in ordered], dtype=np.float64)
+        self._negative[self._is_positive] = 0.0
+
+    def _scan_many(self, texts):
+        """'scan' 模式的批量打分，规则与 _score_scan 相同：
+
+        积极词计入积极，紧跟在否定词之后时整体计入消极（该否定词本身不再计分）；
+        其余否定词与消极词计入消极；同一评论内按出现顺序累加，浮点结果与逐条扫描一致
+        """
+        texts = [t if isinstance(t, str) else '' for t in texts]
+        n = len(texts)
+        if self._term_re is None or not n:
+            return make_batch_scores(np.zeros(n), np.zeros(n), np.zeros(n))
+        # 分隔符不在任何词条中，匹配不会跨评论；普通词的环视也只看同一评论内的字符
+        term_ids = self._term_ids
+        hits = [(m.start(), m.end(), term_ids[m.group()]) for m in self._term_re.finditer('\0'.join(texts))]
+        if not hits:
+            return make_batch_scores(np.zeros(n), np.zeros(n), np.zeros(n))
+        starts, ends, ids = (np.array(col, dtype=np.int64) for col in zip(*hits))
+        text_starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+        rows = np.searchsorted(text_starts, starts, side='right') - 1
+
+        is_positive, is_negation = self._is_positive[ids], self._is_negation[ids]
+        adjacent = (starts[1:] == ends[:-1]) & (rows[1:] == rows[:-1])
+        negated = np.zeros(len(ids), dtype=bool)
+        negated[1:] = adjacent & is_negation[:-1] & is_positive[1:]
+        # 被后面紧挨的积极词吸收的否定词不计分
+        absorbed = np.zeros(len(ids), dtype=bool)
+        absorbed[:-1] = negated[1:]
+
+        positive = self._positive[ids]
+        negative = np.where(absorbed, 0.0, self._negative[ids])
+        counted = is_positive | (negative != 0)
+        pos_total = np.bincount(rows, weights=np.where(negated, 0.0, positive), minlength=n)
+        neg_total = np.bincount(rows, weights=np.where(negated, positive, negative), minlength=n)
+        matched = np.bincount(rows, weights=counted, minlength=n)
+        return make_batch_scores(pos_total, neg_total, matched)
+
+    def _score_scan(self, text):
+        if self._term_re is None or not isinstance(text, str):
+            return 0, 0, 0
+        positive_words, negative_words = self.positive_words, self.negative_words
+        negation_words = self.negation_words
+
+        positive_score = 0
+        negative_score = 0
+        matched = 0
+        negation_end = -1
+        pending = 0  # 尚未确定是否修饰后续积极词的否定词自身的消极权重
+
+        for m in self._term_re.finditer(text):
+            word = m.group()
+            if word in positive_words:
+                matched += 1
+                if m.start() == negation_end:
+                    # 否定词 + 积极词（如“不推荐”）整体计为负面，否定词本身不再计分
+                    negative_score += positive_words[word]
+                    pending = 0
+                else:
+                    positive_score += positive_words[word]
+                negation_end = -1
+                continue
+
+            if pending:
+                negative_score += pending
+                matched += 1
+                pending = 0
+            if word in negation_words:
+                negation_end = m.end()
+                pending = negative_words.get(word, 0)
+            else:
+                negation_end = -1
+                if word in negative_words:
+                    negative_score += negative_words[word]
+                    matched += 1
+
+        if pending:
+            negative_score += pending
+            matched += 1
+        return positive_score, negative_score, matched
+
+    def _score_substring(self, text):
+        text = str(text)
+        found = {pid for _, _, pid in self._automaton.iter_matches(text)}
+        if not found:
+            return 0, 0, 0
+        positive_score = 0
+        negative_score = 0
+        matched = 0
+        for pid, score in self._positive_items:
+            if pid in found:
+                positive_score += score
+                matched += 1
+        for pid, score in self._negative_items:
+            if pid in found:
+                negative_score += score
+                matched += 1
+        return positive_score, negative_score, matched
+
+    def _score_token(self, text):
+        if not text or not isinstance(text, str):
+            return 0, 0, 0
+        words = self._token_re.findall(text.lower())
+        positive_words, negative_words = self.positive_words, self.negative_words
+
+        positive_score = 0
+        negative_score = 0
+        matched = 0
+        for i, word in enumerate(words):
+            if word in positive_words:
+                matched += 1
+                if i > 0 and words[i-1] in self.negation_words:
+                    negative_score += positive_words[word]
+                else:
+                    positive_score += positive_words[word]
+            elif word in negative_words:
+                matched += 1
+                negative_score += negative_words[word]
+        return positive_score, negative_score, matched
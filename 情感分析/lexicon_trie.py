@@ -0,0 +1,432 @@
+"""
+全量词表情感打分
+打标词表（微词云-中文通用分析-打标词表）中的全部分词结果去重后编译成双数组 Trie：
+base / check / value 三个 int32 数组加一个字符编码表，词条文本拼接成一个字符串按偏移量存放，权重为 float32 数组。
+匹配时每个字符只做一次数组下标转移，耗时取决于文本长度和最长词长，与词表规模无关
+
+打标词表只有分词、没有情感极性：词条的极性由内置情感词（种子词）推出——
+包含多字种子词的词条继承其中最长种子词的权重，“否定词 + 积极种子词”组成的词条计为负面；
+其余词条（包括只含单字种子词的“宝贵”“贵州”“特别”）不带情感，切分时整体匹配，其中的单字不再单独计分
+"""
+
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from .lexicon_scorer import make_batch_scores
+
+
+DEFAULT_TAGGING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据',
+                                    '微词云-中文通用分析-打标词表.xlsx (1).xlsx')
+
+
+def load_tagging_vocabulary(path=DEFAULT_TAGGING_PATH, column='单词', sep=','):
+    """读取打标词表（经列式缓存，每个进程只解析一次），返回 {词条: 出现次数}"""
+    return Counter(_tagging_vocabulary(path, column, sep))
+
+
+@lru_cache(maxsize=None)
+def _tagging_vocabulary(path, column, sep):
+    from .ingest import read_excel_cached
+    df = read_excel_cached(path)
+    words = df[column].dropna().astype(str).str.split(sep).explode().str.strip()
+    return dict(Counter(w for w in words if w))
+
+
+@lru_cache(maxsize=None)
+def tagging_words(path=DEFAULT_TAGGING_PATH):
+    """打标词表的全部词条（每个进程只读一次），文件缺失时为空集合"""
+    if not os.path.exists(path):
+        return frozenset()
+    return frozenset(_tagging_vocabulary(path, '单词', ','))
+
+
+def tagging_version(path=DEFAULT_TAGGING_PATH):
+    """打标词表文件的大小与修改时间，用于词典指纹（不读取文件内容）；文件缺失时为 'missing'"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 'missing'
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+
+class DoubleArrayTrie:
+    """双数组 Trie
+
+    节点 s 经字符编码 c 转移到 t = base[s] + c，当且仅当 0 < t 且 check[t] == s（base 可以为负）；
+    value[t] 为以该节点结尾的词条编号（-1 表示不是词尾）
+    """
+
+    def __init__(self, terms):
+        self._blob = ''.join(terms)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in terms], out=offsets[1:])
+        self._offsets = array('i', offsets.tolist())
+        # 高频字符编码小，子节点集中在 base 附近，数组更紧凑
+        alphabet = {ch: i + 1 for i, (ch, _) in enumerate(Counter(self._blob).most_common())}
+        # 字符编码表按码位直接索引（BMP 内），BMP 以外的字符（表情等）放在小字典里
+        self._table = np.zeros(0x10000, dtype=np.uint16 if len(alphabet) < 0xFFFF else np.uint32)
+        self._astral = {}
+        for ch, code in alphabet.items():
+            if ord(ch) < 0xFFFF:
+                self._table[ord(ch)] = code
+            else:
+                self._astral[ord(ch)] = code
+        self._build([[alphabet[ch] for ch in t] for t in terms], len(alphabet))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def encode(self, text):
+        """文本 -> 字符编码列表（不在词表字符集中的字符为 0）"""
+        points = np.frombuffer(text.encode('utf-32-le', errors='replace'), dtype=np.uint32)
+        codes = self._table[np.minimum(points, 0xFFFF)]
+        if self._astral:
+            for i in np.flatnonzero(points >= 0xFFFF):
+                codes[i] = self._astral.get(int(points[i]), 0)
+        return codes.tolist()
+
+    def term(self, term_id):
+        return self._blob[self._offsets[term_id]:self._offsets[term_id + 1]]
+
+    def _build(self, encoded, alphabet_size):
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        capacity = max(64, alphabet_size + 2)
+        base = [0] * capacity
+        check = [-1] * capacity
+        value = [-1] * capacity
+        # 空闲槽位双向链表：nxt[0] 为第一个空闲槽位（槽位 0 是根，始终占用），tail 为最后一个
+        nxt = list(range(1, capacity + 1))
+        prv = list(range(-1, capacity - 1))
+        tail = capacity - 1
+        dense_until = 0
+        check[0] = 0
+
+        # 栈中每项：(节点位置, 词条在 order 中的区间 [lo, hi), 深度)；区间内词条共享长度为 depth 的前缀
+        stack = [(0, 0, len(order), 0)]
+        while stack:
+            node, lo, hi, depth = stack.pop()
+            children = []  # (字符编码, 子区间 lo, 子区间 hi)
+            i = lo
+            while i < hi:
+                word = encoded[order[i]]
+                if len(word) == depth:
+                    value[node] = order[i]
+                    i += 1
+                    continue
+                code = word[depth]
+                j = i + 1
+                while j < hi and len(encoded[order[j]]) > depth and encoded[order[j]][depth] == code:
+                    j += 1
+                children.append((code, i, j))
+                i = j
+            if not children:
+                continue
+
+            # 沿空闲链表找第一个能放下全部子节点的 base（第一个子节点落在空闲槽位 p 上）
+            # 多子节点跳过已被证明很难放下的前段（dense_until 之前），单子节点仍可填补其中的空位
+            first = children[0][0]
+            rest = [c for c, _, _ in children[1:]]
+            p = nxt[0]
+            if rest and p < dense_until:
+                p = dense_until
+                while p < capacity and check[p] >= 0:
+                    p += 1
+            attempts = 0
+            while True:
+                b = p - first
+                if all(b + c >= capacity or check[b + c] < 0 for c in rest):
+                    break
+                attempts += 1
+                p = nxt[p] if p < capacity else p + 1
+            if attempts > 256:
+                dense_until = p
+
+            top = b + children[-1][0]
+            if top >= capacity:
+                grow = max(top + 1, 2 * capacity) - capacity
+                base.extend([0] * grow)
+                check.extend([-1] * grow)
+                value.extend([-1] * grow)
+                nxt.extend(range(capacity + 1, capacity + grow + 1))
+                prv.extend(range(capacity - 1, capacity + grow - 1))
+                prv[capacity] = tail
+                capacity += grow
+                tail = capacity - 1
+
+            base[node] = b
+            for code, clo, chi in children:
+                slot = b + code
+                check[slot] = node
+                # 从空闲链表摘除
+                nxt[prv[slot]] = nxt[slot]
+                if nxt[slot] < capacity:
+                    prv[nxt[slot]] = prv[slot]
+                if slot == tail:
+                    tail = prv[slot]
+                stack.append((slot, clo, chi, depth + 1))
+
+        check[0] = -1
+        last = max((i for i in range(capacity - 1, -1, -1) if check[i] >= 0), default=0) + 1
+        # 运行期用 array（紧凑且逐元素访问与列表相当）
+        self.base = array('i', base[:last])
+        self.check = array('i', check[:last])
+        self.value = array('i', value[:last])
+
+    def longest_matches(self, text):
+        """最左最长、互不重叠地匹配文本，依次产生 (起点, 终点, 词条编号)"""
+        base, check, value = self.base, self.check, self.value
+        size = len(check)
+        codes = self.encode(text)
+        n = len(codes)
+        i = 0
+        while i < n:
+            node = 0
+            best_end = -1
+            best_id = -1
+            j = i
+            while j < n:
+                c = codes[j]
+                if not c:
+                    break
+                t = base[node] + c
+                if not 0 < t < size or check[t] != node:
+                    break
+                node = t
+                j += 1
+                if value[node] >= 0:
+                    best_end = j
+                    best_id = value[node]
+            if best_id >= 0:
+                yield i, best_end, best_id
+                i = best_end
+            else:
+                i += 1
+
+    def match_at(self, text, i):
+        """从位置 i 开始的最长词条，返回 (终点, 词条编号)，没有时返回 None"""
+        base, check, value = self.base, self.check, self.value
+        node = 0
+        found = None
+        for j, c in enumerate(self.encode(text[i:]), i):
+            t = base[node] + c
+            if not c or not 0 < t < len(check) or check[t] != node:
+                break
+            node = t
+            if value[node] >= 0:
+                found = (j + 1, value[node])
+        return found
+
+    def nbytes(self):
+        """常驻内存字节数：三个 int32 数组 + 偏移数组 + 拼接词条 + 字符编码表"""
+        arrays = sum(a.itemsize * len(a) for a in (self.base, self.check, self.value, self._offsets))
+        return arrays + sys.getsizeof(self._blob) + self._table.nbytes + _dict_nbytes(self._astral)
+
+
+def _dict_nbytes(mapping):
+    """字典及其键值对象的大致内存（sys.getsizeof 累加）"""
+    return sys.getsizeof(mapping) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in mapping.items())
+
+
+def expand_polarity(terms, positive_words, negative_words, negation_words=()):
+    """由种子情感词推出词条的 (积极权重, 消极权重)
+
+    词条本身是种子词时直接取种子权重；否则取其中最长（并列取最靠前）的多字种子词的权重，
+    只含单字种子词（贵、无、别）的词条不带情感；积极种子词前紧挨否定词（如“不值得”）时，其权重计入消极
+    """
+    seeds = list(positive_words) + [w for w in negative_words if w not in positive_words]
+    seed_trie = DoubleArrayTrie(seeds)
+    n_pos = len(positive_words)
+    pos_weights = list(positive_words.values())
+    negation_words = set(negation_words)
+
+    positive = np.zeros(len(terms), dtype=np.float32)
+    negative = np.zeros(len(terms), dtype=np.float32)
+    for k, term in enumerate(terms):
+        if term in positive_words:
+            positive[k] = positive_words[term]
+            continue
+        if term in negative_words:
+            negative[k] = negative_words[term]
+            continue
+        best = None
+        for start, end, seed_id in _all_seed_matches(seed_trie, term):
+            if end - start < 2:
+                continue
+            if best is None or end - start > best[1] - best[0]:
+                best = (start, end, seed_id)
+        if best is None:
+            continue
+        start, _, seed_id = best
+        if seed_id < n_pos:
+            if start > 0 and term[start - 1] in negation_words:
+                negative[k] = pos_weights[seed_id]
+            else:
+                positive[k] = pos_weights[seed_id]
+        else:
+            negative[k] = negative_words[seed_trie.term(seed_id)]
+    return positive, negative
+
+
+def _all_seed_matches(trie, text):
+    """文本中每个起点处的最长种子词匹配（允许重叠）"""
+    for i in range(len(text)):
+        found = trie.match_at(text, i)
+        if found is not None:
+            yield i, found[0], found[1]
+
+
+class TrieLexicon:
+    """双数组 Trie 情感词典，打分规则与 CompiledLexicon 的 'scan' 模式相同
+
+    terms:          全部词条（包括无情感的普通词，用于正确切分文本）
+    positive/negative: 与 terms 对齐的权重数组
+    negation_words: 否定词，紧跟其后的积极词计为负面
+    """
+
+    def __init__(self, terms, positive, negative, negation_words=()):
+        terms = list(dict.fromkeys(list(terms) + list(negation_words)))
+        positive = np.concatenate((np.asarray(positive, dtype=np.float32),
+                                   np.zeros(len(terms) - len(positive), dtype=np.float32)))
+        negative = np.concatenate((np.asarray(negative, dtype=np.float32),
+                                   np.zeros(len(terms) - len(negative), dtype=np.float32)))
+        self.trie = DoubleArrayTrie(terms)
+        self.positive = array('f', positive.tobytes())
+        self.negative = array('f', negative.tobytes())
+        negation_words = set(negation_words)
+        self.is_negation = array('b', [1 if t in negation_words else 0 for t in terms])
+
+    def __len__(self):
+        return len(self.trie)
+
+    def score_terms(self, text):
+        """返回 (积极权重和, 消极权重和, 命中词数)"""
+        if not isinstance(text, str):
+            return 0, 0, 0
+        positive, negative, is_negation = self.positive, self.negative, self.is_negation
+
+        positive_score = 0.0
+        negative_score = 0.0
+        matched = 0
+        negation_end = -1
+        pending = 0.0
+
+        for start, end, k in self.trie.longest_matches(text):
+            if positive[k]:
+                matched += 1
+                if start == negation_end:
+                    negative_score += positive[k]
+                    pending = 0.0
+                else:
+                    positive_score += positive[k]
+                negation_end = -1
+                continue
+
+            if pending:
+                negative_score += pending
+                matched += 1
+                pending = 0.0
+            if is_negation[k]:
+                negation_end = end
+                pending = negative[k]
+            else:
+                negation_end = -1
+                if negative[k]:
+                    negative_score += negative[k]
+                    matched += 1
+
+        if pending:
+            negative_score += pending
+            matched += 1
+        return positive_score, negative_score, matched
+
+    def score(self, text):
+        """情感得分 (0-1)，无情感词时为 0.5"""
+        positive_score, negative_score, _ = self.score_terms(text)
+        total = positive_score + negative_score
+        if total == 0:
+            return 0.5
+        return min(1.0, max(0.0, positive_score / total))
+
+    def score_many(self, texts):
+        """批量打分，返回 BatchScores"""
+        rows = [self.score_terms(t) for t in texts]
+        if not rows:
+            return make_batch_scores([], [], [])
+        return make_batch_scores(*zip(*rows))
+
+    def memory_report(self):
+        """Trie 常驻内存与等价的 {词条: (积极, 消极)} Python 字典对比（字节）"""
+        trie_bytes = self.trie.nbytes() + sum(a.itemsize * len(a) for a in (self.positive, self.negative, self.is_negation))
+        as_dict = {self.trie.term(k): (float(self.positive[k]), float(self.negative[k])) for k in range(len(self))}
+        dict_bytes = _dict_nbytes(as_dict) + sum(sys.getsizeof(p) + sys.getsizeof(n) for p, n in as_dict.values())
+        return {'terms': len(self), 'trie_bytes': trie_bytes, 'dict_bytes': dict_bytes,
+                'ratio': trie_bytes / dict_bytes if dict_bytes else 0.0}
+
+
+def build_full_lexicon(positive_words, negative_words, negation_words=(), path=DEFAULT_TAGGING_PATH):
+    """打标词表全部词条 + 种子情感词 -> TrieLexicon"""
+    vocabulary = load_tagging_vocabulary(path)
+    terms = list(dict.fromkeys(list(positive_words) + list(negative_words) + list(vocabulary)))
+    positive, negative = expand_polarity(terms, positive_words, negative_words, negation_words)
+    return TrieLexicon(terms, positive, negative, negation_words)
+
+
+def _synthetic_terms(n, seed=0):
+    """随机常用汉字组成的 2-6 字词条，用于规模测试"""
+    rng = np.random.default_rng(seed)
+    chars = np.array([chr(c) for c in range(0x4e00, 0x4e00 + 3000)])
+    lengths = rng.integers(2, 7, size=n * 2)
+    picks = rng.integers(0, len(chars), size=int(lengths.sum()))
+    words, pos = [], 0
+    for length in lengths:
+        words.append(''.join(chars[picks[pos:pos + length]]))
+        pos += length
+    return list(dict.fromkeys(words))[:n]
+
+
+def main():
+    """打印全量词表的规模、内存对比，以及词表增长时的匹配耗时"""
+    import argparse
+    parser = argparse.ArgumentParser(description='打标词表双数组 Trie：内存与匹配耗时')
+    parser.add_argument('--input', default=DEFAULT_TAGGING_PATH, help='打标词表路径')
+    parser.add_argument('--sizes', default='10000,100000', help='合成词表规模（逗号分隔）')
+    parser.add_argument('--texts', type=int, default=2000, help='用于测速的正文条数')
+    args = parser.parse_args()
+
+    from .情感分析 import SimpleSentimentAnalyzer
+    seeds = SimpleSentimentAnalyzer()
+    t = time.perf_counter()
+    lexicon = build_full_lexicon(seeds.positive_words, seeds.negative_words, seeds.negation_words, args.input)
+    report = lexicon.memory_report()
+    polar = sum(1 for k in range(len(lexicon)) if lexicon.positive[k] or lexicon.negative[k])
+    print(f"全量词表: {report['terms']} 个词条（{polar} 个带情感权重），构建 {time.perf_counter() - t:.2f}s")
+    print(f"  Trie {report['trie_bytes'] / 1024:.0f} KiB / 等价字典 {report['dict_bytes'] / 1024:.0f} KiB"
+          f"（{report['ratio']:.1%}）")
+
+    from .ingest import read_excel_cached
+    texts = read_excel_cached(args.input)['正文'].dropna().astype(str).tolist()[:args.texts]
+    t = time.perf_counter()
+    lexicon.score_many(texts)
+    print(f"  扫描 {len(texts)} 条正文 {(time.perf_counter() - t) * 1000:.0f}ms")
+
+    for n in [int(s) for s in args.sizes.split(',') if s]:
+        terms = _synthetic_terms(n)
+        t = time.perf_counter()
+        trie = TrieLexicon(terms, np.full(len(terms), 0.5), np.zeros(len(terms)))
+        build = time.perf_counter() - t
+        t = time.perf_counter()
+        trie.score_many(texts)
+        scan = time.perf_counter() - t
+        report = trie.memory_report()
+        print(f"合成 {len(terms)} 词: 构建 {build:.2f}s，扫描 {len(texts)} 条 {scan * 1000:.0f}ms，"
+              f"Trie {report['trie_bytes'] / 1024:.0f} KiB / 字典 {report['dict_bytes'] / 1024:.0f} KiB（{report['ratio']:.1%}）")
+
+
+if __name__ == '__main__':
+    main()
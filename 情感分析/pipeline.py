@@ -0,0 +1,507 @@
+"""
+CityWalk 打卡点分析流程
+三个分析脚本共用：逐块预处理 -> 提取打卡点 -> 情感打分 -> 累加统计 -> 汇总、保存、出图。
+脚本之间只差默认的打分后端（见 backends.py）、地名表、示例数据和输出路径，进程数、批大小、得分缓存都由后端的成本特征决定；
+情感分析.py 的区域汇总和知识图谱导出经 PipelineHook 接入，与流式读取、增量模式、趋势表共用同一流程
+"""
+
+import os
+from collections import namedtuple
+
+from .accumulators import LandmarkAccumulator
+from .backends import ScoringEngine, get_backend
+from .clause_sentiment import DEFAULT_WINDOW, score_mentions
+from .comment_table import build_incidence, score_comments
+from .incremental_state import DEFAULT_STATE_PATH, ContentDigest, IncrementalState, StaleStateError, config_fingerprint
+from .gazetteer import GAZETTEER
+from .ingest import DEFAULT_CHUNKSIZE, find_content_column, find_time_column, iter_chunks
+from .instrumentation import Progress, RunReport
+from .rendering import DEFAULT_MAX_LANDMARKS, load_results, render_report
+from .text_normalizer import normalize_series
+from .trends import TRENDS_PATH, TrendAccumulator, latest_dated, parse_post_times, sudden_drops, trend_tables
+
+CSV_PATH = '打卡点情感分析结果.csv'
+PNG_PATH = '打卡点情感分析结果.png'
+
+# 打卡点库（标准名，别名与上下级见 gazetteer.py）
+LANDMARKS = [
+    '外滩', '南京路', '豫园', '城隍庙', '田子坊', '新天地',
+    '武康路', '安福路', '思南公馆', '静安寺', '陆家嘴',
+    '迪士尼', '朱家角', '枫泾', '七宝', 'M50', '1933',
+    '上生新所', '愚园路', '淮海路', '甜爱路', '多伦路',
+    '徐家汇', '龙华寺', '共青森林公园', '东平国家森林公园'
+]
+
+# 一个数据块（水位线之后的部分）的打卡点归因结果，交给 PipelineHook.add_chunk
+# incidence:      该块的评论 -> 打卡点关联表
+# comment_scores: 该块每条评论的得分（未提及打卡点的为 NaN）
+# pair_scores:    与 incidence.pairs() 对齐的每对得分
+# contents/processed: 该块的原文与预处理后的文本
+# first_row:      该块第一条评论在整个语料中的行号
+ChunkScores = namedtuple('ChunkScores', ['incidence', 'comment_scores', 'pair_scores', 'contents', 'processed',
+                                         'first_row'])
+
+
+class PipelineHook:
+    """流程扩展点：逐块收到打卡点归因结果，结果表写出后再做汇总或导出
+
+    name:     增量状态中的键前缀；config() 计入增量状态的配置指纹
+    增量模式下 state_dict() 随状态保存，下次运行由 load_state() 恢复后只收到新增评论；
+    load_state({}) 表示从头开始（没有可用状态或需要全量重算时）
+    """
+
+    name = 'hook'
+
+    def config(self):
+        return self.name
+
+    def add_chunk(self, chunk):
+        """每个数据块调用一次，chunk 为 ChunkScores"""
+
+    def finish(self, run, results_df):
+        """结果表写出后调用，返回写出的文件路径列表"""
+        return []
+
+    def state_dict(self):
+        return {}
+
+    def load_state(self, state):
+        pass
+
+
+def accumulate_chunks(chunks, matcher, score_many, state=None, verbose=False, run=None, text='processed',
+                      attribution='post', clause_window=DEFAULT_WINDOW, trends=None, as_of=None,
+                      match='processed', hooks=()):
+    """逐块：文本预处理 -> 提取打卡点 -> 情感分析 -> 累加统计
+
+    state: IncrementalState 时在其统计上继续累加，水位线之前的评论只核对内容摘要、不再打分
+    run:   RunReport，各步骤按阶段累计耗时
+    text:  'processed' 对预处理后的文本打分，'raw' 对原文打分（见 Backend.text）
+    attribution/clause_window: 'clause' 时每个打卡点取其所在分句（及前后 clause_window 个分句）的得分，
+                               'post' 时取整条评论的得分（见 clause_sentiment）
+    trends: TrendAccumulator 时，数据有发布时间列的块按 (打卡点, 日) 累加趋势统计；as_of 见 trends.parse_post_times
+    match:  'processed' 在预处理后的文本上匹配打卡点，'raw' 在原文上匹配
+    hooks:  PipelineHook 列表，每块的归因结果依次交给它们
+    返回 (accumulator, total_count, valid_count, digest)；找不到内容列时返回 None
+    """
+    import numpy as np
+    run = run or RunReport('accumulate_chunks')
+    progress = Progress(label='   已处理', unit=' 条') if verbose else None
+    accumulator = state.accumulator if state else LandmarkAccumulator()
+    watermark = state.watermark if state else 0
+    valid_count = state.valid_count if state else 0
+    digest = ContentDigest()
+    total_count = 0
+    verified = state is None or watermark == 0
+
+    for chunk in run.iter('load', chunks):
+        content_col = find_content_column(chunk.columns)
+        if content_col is None:
+            print(f"❌ 错误：无法找到内容列\n可用字段: {chunk.columns.tolist()}")
+            return None
+
+        contents = chunk[content_col].to_numpy()
+        first_row = total_count
+        total_count += len(contents)
+
+        # 水位线之前的部分已在状态中，只用于核对数据没有被改动
+        skip = min(max(watermark - first_row, 0), len(contents))
+        digest.update(contents[:skip])
+        if not verified and first_row + skip == watermark:
+            if digest.hexdigest() != state.digest:
+                raise StaleStateError("水位线之前的评论内容已变化")
+            verified = True
+        digest.update(contents[skip:])
+        if skip == len(contents):
+            continue
+
+        contents = contents[skip:]
+        with run.span('preprocess', rows=len(contents)):
+            processed = normalize_series(chunk[content_col].iloc[skip:]).to_numpy()
+        valid_count += int(np.count_nonzero(processed != ''))
+
+        with run.span('extract', rows=len(processed)):
+            incidence = build_incidence(contents if match == 'raw' else processed, matcher)
+        mentioned = incidence.mentioned_rows()
+        pair_scores = None
+        if attribution == 'clause':
+            # 分句级归因：只切分提及打卡点的评论，每个打卡点取自己所在分句的得分
+            mentions = score_mentions(contents, matcher, score_many, text, clause_window, match=match,
+                                      rows=mentioned, run=run)
+            incidence, chunk_scores, pair_scores = mentions.incidence, mentions.comment_scores, mentions.pair_scores
+            run.count('clauses_scored', mentions.n_scored)
+        else:
+            # 每条提及打卡点的评论只打分一次，再经关联表汇总到各打卡点
+            score_input = contents if text == 'raw' else processed
+            chunk_scores = np.full(len(processed), np.nan)
+            with run.span('score', rows=len(mentioned)):
+                chunk_scores[mentioned] = score_comments(score_input[mentioned], score_many)
+        mentioned = incidence.mentioned_rows()
+        with run.span('accumulate', rows=len(mentioned)):
+            accumulator.add_chunk(incidence, chunk_scores, contents, first_row + skip, pair_scores=pair_scores)
+        run.count('mentioned', len(mentioned))
+        if pair_scores is None:
+            pair_scores = chunk_scores[incidence.pairs()[0]]
+
+        time_col = find_time_column(chunk.columns)
+        if trends is not None and time_col is not None:
+            with run.span('trend', rows=len(mentioned)):
+                times = parse_post_times(chunk[time_col].iloc[skip:], as_of)
+                trends.add_chunk(incidence, pair_scores, times)
+
+        if hooks:
+            scores = ChunkScores(incidence, chunk_scores, pair_scores, contents, processed, first_row + skip)
+            for hook in hooks:
+                with run.span(hook.name, rows=len(mentioned)):
+                    hook.add_chunk(scores)
+
+        if progress:
+            progress.update(len(chunk), note=f"识别到 {len(accumulator)} 个打卡点")
+
+    if progress:
+        progress.close()
+    if not verified:
+        raise StaleStateError(f"数据只有 {total_count} 条，少于水位线 {watermark} 条")
+    return accumulator, total_count, valid_count, digest
+
+
+def run_analysis(name, load_data, analyzer, workers=None, input_path=None, chunksize=DEFAULT_CHUNKSIZE,
+                 incremental=False, state_path=None, report_path=None, profile=None,
+                 plot=True, plot_only=False, max_landmarks=DEFAULT_MAX_LANDMARKS, paginate=False,
+                 attribution='post', clause_window=DEFAULT_WINDOW, trends=True, as_of=None,
+                 places=None, match='processed', hooks=(), csv_path=CSV_PATH, png_path=PNG_PATH,
+                 trends_path=TRENDS_PATH):
+    """运行一次分析
+
+    name:        运行报告名称（脚本名）
+    load_data:   未指定 input_path 时加载整份数据的函数
+    analyzer:    打分后端名称，见 backends.BACKENDS
+    workers:     打分进程数；None 时按后端成本自动选择（词典类进程内，SnowNLP 用全部 CPU），0 表示全部 CPU
+    input_path:  指定后按块流式读取该文件（csv/jsonl/parquet/xlsx），内存占用与文件大小无关
+    chunksize:   流式读取时每块的行数
+    incremental: 读取并更新 state_path（默认 DEFAULT_STATE_PATH）中的增量状态，只为上次运行之后新增的评论打分；
+                 输出与全量重算一致（输入需按行追加，水位线之前的数据有改动时自动全量重算）
+    report_path: 指定后把分阶段运行报告写成 JSON
+    profile:     'cprofile' 或 'pyinstrument'，对整个运行采样
+    plot:        False 时不生成图表
+    plot_only:   不重跑分析，直接用上次保存的结果 CSV 重新出图
+    max_landmarks/paginate: 每张图最多显示的打卡点数；paginate 为 True 时分页输出全部打卡点
+    attribution: 'post'（默认）时每个打卡点取整条评论的得分，'clause' 时取其所在分句的得分（见 clause_sentiment）
+    clause_window: 分句级归因时再加权纳入前后几个分句，权重按距离衰减
+    trends:      数据有发布时间列时输出日/周/月趋势表（trends_path）并提示情感骤降；增量模式下日统计随状态保存
+    as_of:       抓取时间，用于换算“今天11:28”“5分钟前”和补全不带年份的日期；默认由数据确定（见 resolve_as_of）
+    places:      打卡点地名表（gazetteer.Gazetteer），默认为地名表中的 LANDMARKS
+    match:       'processed' 在预处理后的文本上匹配打卡点，'raw' 在原文上匹配
+    hooks:       PipelineHook 列表：逐块收到归因结果，结果表写出后各自输出（如区域汇总、知识图谱）
+    csv_path/png_path/trends_path: 结果表、图表、趋势表的输出路径
+    """
+    run = RunReport(name, profile=profile)
+    try:
+        if plot_only:
+            if not os.path.exists(csv_path):
+                print(f"❌ 找不到 {csv_path}，请先完整运行一次分析")
+                return
+            return render(run, load_results(csv_path), max_landmarks, paginate, png_path)
+        return run_pipeline(run, load_data, analyzer, workers, input_path, chunksize, incremental,
+                            state_path or DEFAULT_STATE_PATH, plot, max_landmarks, paginate, attribution,
+                            clause_window, trends, as_of, places, match, hooks, csv_path, png_path, trends_path)
+    finally:
+        run.finish()
+        print(run.format_summary())
+        if run.profile_path:
+            print(f"🔬 采样结果: {run.profile_path}")
+        if report_path:
+            run.save(report_path)
+            print(f"📝 运行报告: {report_path}")
+
+
+def resolve_as_of(as_of=None, df=None, input_path=None, state=None):
+    """确定解析发布时间所用的抓取时间，返回 (pd.Timestamp, 来源说明)
+
+    未指定 as_of 时依次取：增量状态中记录的抓取时间（已累加的日统计按它解析，续算时保持一致）、
+    数据文件（input_path，或 read_excel_cached 记录的工作簿）的修改时间、数据中带年份的最晚发布时间（整份载入时），
+    都没有时才用当前时间；因此同一份数据重复运行时，不带年份的日期归到的年份不随运行日期变化
+    """
+    import pandas as pd
+    if as_of is not None:
+        return pd.Timestamp(as_of), '--as-of'
+    if state is not None and state.as_of:
+        return pd.Timestamp(state.as_of), '增量状态'
+    path = input_path or (df.attrs.get('source') if df is not None else None)
+    if path and os.path.exists(path):
+        return pd.Timestamp.fromtimestamp(os.path.getmtime(path)).floor('s'), f'{path} 的修改时间'
+    time_col = find_time_column(df.columns) if df is not None else None
+    latest = latest_dated(df[time_col]) if time_col is not None else None
+    if latest is not None:
+        return latest, '数据中带年份的最晚发布时间'
+    return pd.Timestamp.now().floor('s'), '当前时间'
+
+
+def render(run, results_df, max_landmarks, paginate, png_path=PNG_PATH):
+    """生成可视化图表，返回写出的图片路径"""
+    run.stage('plot', rows=len(results_df))
+    print("\n📊 生成可视化图表...", end=" ", flush=True)
+    png_paths = render_report(results_df, png_path, max_landmarks=max_landmarks, paginate=paginate)
+    print(f"✓")
+    print(f"✅ PNG 文件: {', '.join(png_paths)}\n")
+    return png_paths
+
+
+def write_trends(run, trend_acc, trends_path=TRENDS_PATH):
+    """日/周/月趋势表写入 trends_path 并列出情感骤降的时间段，返回写出的路径"""
+    run.stage('trends', rows=len(trend_acc))
+    table = trend_tables(trend_acc.frame())
+    table.to_csv(trends_path, index=False, encoding='utf_8_sig')
+    print(f"✅ 趋势表: {trends_path}（{len(table)} 行）")
+    drops = sudden_drops(table)
+    if len(drops):
+        print(f"⚠️  情感骤降 {len(drops)} 处:")
+        for row in drops.head(10).itertuples(index=False):
+            print(f"   • {row.打卡点} {row.粒度} {row.时间段:%Y-%m-%d}: {row.情感得分:.3f}"
+                  f"（基线 {row.基线得分:.3f}，z={row.z值:.1f}，{row.样本量} 条）")
+    return trends_path
+
+
+def result_table(accumulator, verbose=True):
+    """由累加统计生成结果表：每个打卡点一行，按收缩后的稳健得分降序"""
+    import pandas as pd
+    counts = accumulator.count
+    order = accumulator.ranked()
+    mean = accumulator.mean()
+    # 稳健排名：收缩得分、平均得分的 bootstrap 区间、积极率的 Wilson 区间，全部打卡点一次算出
+    robust = accumulator.robust()
+    if verbose:
+        print(f"📐 收缩先验强度: 相当于 {robust.prior_strength:.1f} 条均分评论\n")
+    results = []
+    progress = Progress(len(order), '分析打卡点') if verbose else None
+    for idx, lid in enumerate(order):
+        landmark = accumulator.landmarks[lid]
+
+        # 统计指标
+        avg_sentiment = mean[lid]
+        positive_count = int(accumulator.positive[lid])
+        negative_count = int(accumulator.negative[lid])
+        positive_rate = positive_count / counts[lid]
+
+        # 最具代表性的评论
+        sample_text = accumulator.best_sample[lid][:45]
+
+        # 情感等级
+        if avg_sentiment >= 0.7:
+            grade = '强正面'
+        elif avg_sentiment >= 0.6:
+            grade = '正面'
+        elif avg_sentiment >= 0.4:
+            grade = '中立'
+        else:
+            grade = '负面'
+
+        results.append({
+            '打卡点': landmark,
+            '情感得分': round(avg_sentiment, 4),
+            '情感等级': grade,
+            '积极评论数': positive_count,
+            '负面评论数': negative_count,
+            '积极率': round(positive_rate, 3),
+            '样本量': int(counts[lid]),
+            '稳健得分': round(robust.shrunk[lid], 4),
+            '得分下限': round(robust.score_low[lid], 4),
+            '得分上限': round(robust.score_high[lid], 4),
+            '积极率下限': round(robust.pos_low[lid], 3),
+            '积极率上限': round(robust.pos_high[lid], 3),
+            '示例': sample_text
+        })
+
+        if progress:
+            progress.update(note=f"{landmark} ✓ {avg_sentiment:.3f}")
+    if progress:
+        progress.close()
+
+    # 按收缩后的得分排名，样本少的打卡点不会只凭几条好评排到前面
+    return pd.DataFrame(results).sort_values('稳健得分', ascending=False, kind='stable')
+
+
+def run_pipeline(run, load_data, analyzer, workers, input_path, chunksize, incremental, state_path,
+                 plot, max_landmarks, paginate, attribution='post', clause_window=DEFAULT_WINDOW, trends=True,
+                 as_of=None, places=None, match='processed', hooks=(), csv_path=CSV_PATH, png_path=PNG_PATH,
+                 trends_path=TRENDS_PATH):
+    """分析流程本身，各步骤记录为 run 的阶段"""
+    backend = get_backend(analyzer)
+
+    # 1. 加载数据
+    with run.span('load'):
+        df = None if input_path else load_data()
+
+    def open_chunks():
+        if input_path:
+            print(f"\n📂 流式读取: {input_path} (每块 {chunksize} 行)")
+            return iter_chunks(input_path, chunksize)
+        return [df]
+
+    # 2. 打卡点库：地名表中的这些打卡点及其别名，命中别名时归一为标准名
+    if places is None:
+        places = GAZETTEER.subset(LANDMARKS)
+    matcher = places.matcher()
+
+    state = None
+    if incremental:
+        fingerprint = config_fingerprint(places.fingerprint(), backend.name, backend.model_version(),
+                                         attribution, clause_window, trends, match,
+                                         [hook.config() for hook in hooks])
+        state = IncrementalState.load(state_path, fingerprint, [hook.name for hook in hooks])
+        if state is not None:
+            print(f"♻️  增量模式：已有 {state.watermark} 条评论的统计 ({state_path})，只处理新增部分")
+        else:
+            print(f"♻️  增量模式：没有可用的状态文件，本次全量计算并保存到 {state_path}")
+
+    # 按日的趋势统计和各扩展的统计随增量状态保存，只为新增评论累加
+    trend_acc = ((state.trends if state and state.trends is not None else TrendAccumulator())
+                 if trends else None)
+    for hook in hooks:
+        hook.load_state(state.hooks.get(hook.name, {}) if state else {})
+    if trends:
+        as_of, source = resolve_as_of(as_of, df, input_path, state)
+        print(f"🕒 抓取时间: {as_of:%Y-%m-%d %H:%M}（{source}），用于补全不带年份的发布时间")
+
+    # 3. 逐块：文本预处理 -> 提取打卡点 -> 情感分析 -> 累加统计
+    print("🔄 正在预处理文本、提取打卡点并执行情感分析...")
+    options = dict(verbose=bool(input_path), run=run, text=backend.text, attribution=attribution,
+                   clause_window=clause_window, as_of=as_of, match=match, hooks=hooks)
+    with ScoringEngine(backend, workers) as engine:
+        print(f"   {engine.describe()}")
+        try:
+            result = accumulate_chunks(open_chunks(), matcher, engine, state, trends=trend_acc, **options)
+        except StaleStateError as e:
+            print(f"⚠️  {e}，改为全量重算")
+            state = None
+            trend_acc = TrendAccumulator() if trends else None
+            for hook in hooks:
+                hook.load_state({})
+            result = accumulate_chunks(open_chunks(), matcher, engine, trends=trend_acc, **options)
+        if engine.cache and result is not None:
+            print(f"💾 {engine.report()}")
+    if result is None:
+        return
+    accumulator, total_count, valid_count, digest = result
+    run.count('comments', total_count)
+    run.count('valid', valid_count)
+
+    if incremental:
+        run.stage('save_state')
+        new_count = total_count - (state.watermark if state else 0)
+        IncrementalState(accumulator, total_count, digest.hexdigest(), valid_count, fingerprint, trend_acc,
+                         {hook.name: hook.state_dict() for hook in hooks},
+                         as_of.isoformat() if as_of is not None else None).save(state_path)
+        print(f"💾 增量状态已更新：本次新增 {new_count} 条，水位线 {total_count} 条")
+
+    print(f"📊 数据量: {total_count} 条评论")
+    print(f"✓ 有效文本: {valid_count}/{total_count} ({100*valid_count/max(total_count, 1):.1f}%)\n")
+
+    if not len(accumulator):
+        print("❌ 未找到任何打卡点")
+        return
+
+    # 按数量排序
+    counts = accumulator.count
+    order = accumulator.ranked()
+
+    print(f"✓ 识别到 {len(order)} 个打卡点:")
+    for i, lid in enumerate(order[:10], 1):
+        print(f"   {i:2d}. {accumulator.landmarks[lid]:10s} ({counts[lid]:3d} 条评论)")
+    if len(order) > 10:
+        print(f"   ... 等共 {len(order)} 个")
+
+    # 4. 情感汇总
+    run.stage('aggregate', rows=len(order))
+    run.count('landmarks', len(order))
+    print("\n" + "=" * 70)
+    print("🚀 情感分析汇总...".center(70))
+    print("=" * 70 + "\n")
+    results_df = result_table(accumulator)
+
+    # 5. 保存结果
+    run.stage('write_csv')
+    print("\n" + "=" * 70)
+    print("💾 保存结果".center(70))
+    print("=" * 70 + "\n")
+
+    results_df.to_csv(csv_path, index=False, encoding='utf_8_sig')
+    print(f"✅ CSV 文件: {csv_path}")
+    trend_path = write_trends(run, trend_acc, trends_path) if trend_acc is not None and len(trend_acc) else None
+    hook_paths = [path for hook in hooks for path in hook.finish(run, results_df)]
+    # 6. 显示表格结果
+    run.stage('report')
+    print("\n📋 情感分析结果汇总：\n")
+    print(f"{'排名':^4} | {'打卡点':^12} | {'得分':^6} | {'等级':^6} | {'积极率':^7} | {'样本':^5} | {'示例':^20}")
+    print("-" * 80)
+
+    for i, (_, row) in enumerate(results_df.iterrows(), 1):
+        print(f"{i:4d} | {row['打卡点']:12s} | {row['情感得分']:6.3f} | {row['情感等级']:6s} | {row['积极率']:6.1%} | {row['样本量']:5d} | {row['示例']:20s}")
+
+    # 7. Top5推荐
+    print("\n" + "=" * 70)
+    print("🏆 最值得推荐的TOP5打卡点".center(70))
+    print("=" * 70 + "\n")
+
+    top5 = results_df.head(5)
+    for i, (_, row) in enumerate(top5.iterrows(), 1):
+        stars = "⭐" * int(row['情感得分'] * 5)
+        print(f"{i}. {row['打卡点']:12s} | 得分: {row['情感得分']:.3f} {stars} | 稳健得分: {row['稳健得分']:.3f} "
+              f"(95% 区间 {row['得分下限']:.3f}–{row['得分上限']:.3f}) | 评论数: {row['样本量']}")
+
+    # 8. 可视化
+    png_paths = render(run, results_df, max_landmarks, paginate, png_path) if plot else []
+
+    # 9. 深度洞察
+    run.stage('report')
+    print("=" * 70)
+    print("💡 深度洞察分析".center(70))
+    print("=" * 70 + "\n")
+
+    overall_score = results_df['情感得分'].mean()
+    overall_positive_rate = results_df['积极率'].mean()
+
+    if overall_score >= 0.7:
+        desc = "🌟 高度推荐"
+    elif overall_score >= 0.6:
+        desc = "😊 值得体验"
+    elif overall_score >= 0.5:
+        desc = "😐 一般"
+    else:
+        desc = "😞 需谨慎"
+
+    print(f"📊 整体评估:")
+    print(f"   • 综合情感得分: {overall_score:.3f}/1.0 - {desc}")
+    print(f"   • 整体积极率: {overall_positive_rate:.1%}")
+    print(f"   • 分析打卡点: {len(results_df)} 个")
+    print(f"   • 总评论数: {results_df['样本量'].sum()} 条")
+
+    print(f"\n🏅 排名概览:")
+    print(f"   • 🥇 最佳: {results_df.iloc[0]['打卡点']} ({results_df.iloc[0]['情感得分']:.3f})")
+    if len(results_df) > 1:
+        most_comments = results_df.nlargest(1, '样本量').iloc[0]
+        print(f"   • 🔥 热门: {most_comments['打卡点']} ({most_comments['样本量']} 条评论)")
+        print(f"   • ❌ 需改: {results_df.iloc[-1]['打卡点']} ({results_df.iloc[-1]['情感得分']:.3f})")
+
+    print(f"\n📈 按等级统计:")
+    for grade in ['强正面', '正面', '中立', '负面']:
+        items = results_df[results_df['情感等级'] == grade]
+        if len(items) > 0:
+            names = items['打卡点'].tolist()
+            print(f"   • {grade:6s}: {', '.join(names[:5])}", end="")
+            if len(names) > 5:
+                print(f" 等 ({len(names)} 个)")
+            else:
+                print()
+
+    print("\n" + "=" * 70)
+    print("✨ 分析完成！".center(70))
+    print("=" * 70)
+    print(f"\n📁 生成的文件:")
+    print(f"   1. 详细结果: {csv_path}")
+    print(f"   2. 可视化: {', '.join(png_paths) if png_paths else '未生成 (--no-plot)'}")
+    print(f"   3. 情感趋势: {trend_path or '未生成（数据没有发布时间列或 --no-trends）'}")
+    for i, path in enumerate(hook_paths, 4):
+        print(f"   {i}. {path}")
+    print(f"\n" + "=" * 70 + "\n")
+    run.end_stage()
@@ -0,0 +1,148 @@
+"""
+稳健排名
+原始均分在样本少时波动很大，几条评论的打卡点会排到几百条评论的前面。这里对全部打卡点一次性计算：
+经验贝叶斯收缩得分、积极率的 Wilson 区间、平均得分的 bootstrap 区间，都是整列的 NumPy 运算。
+bootstrap 在可合并的得分直方图（0.01 一格）上做 Poisson 重抽样：所有打卡点的非空格子拼成一个扁平数组，
+每批重抽样一次 poisson + reduceat 完成，不逐打卡点循环
+"""
+
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+from .aggregate import POSITIVE_THRESHOLD
+
+
+HIST_BINS = 101             # 得分直方图：格子 k 代表得分 k/100
+CONFIDENCE = 0.95
+N_RESAMPLES = 1000
+_MAX_DRAWS = 1 << 23        # 每批重抽样的随机数个数上限，限制内存
+
+# 各字段均为长度 n_landmarks 的数组（prior_strength 为标量）；无样本的打卡点为 NaN
+RobustStats = namedtuple('RobustStats', ['shrunk', 'prior_strength', 'score_low', 'score_high', 'pos_low', 'pos_high'])
+
+
+def score_bins(scores):
+    """得分 -> 直方图格子编号（四舍五入到 0.01，[0, 1] 之外的截断到两端）"""
+    bins = np.rint(np.asarray(scores, dtype=np.float64) * (HIST_BINS - 1))
+    return np.clip(bins, 0, HIST_BINS - 1).astype(np.intp)
+
+
+def score_histogram(codes, scores, n_landmarks):
+    """按打卡点编号分组的得分直方图，形状 (n_landmarks, HIST_BINS)"""
+    flat = np.asarray(codes, dtype=np.intp) * HIST_BINS + score_bins(scores)
+    return np.bincount(flat, minlength=n_landmarks * HIST_BINS).reshape(n_landmarks, HIST_BINS)
+
+
+def shrunk_scores(count, total, sumsq, prior_strength=None):
+    """经验贝叶斯收缩得分 (total + C·m) / (count + C)，返回 (得分, C)
+
+    m 为全部记录的均分；先验强度 C 相当于“虚拟评论数”，默认按正态-正态模型做矩估计：
+    组内方差 / 各打卡点真实均分之间的方差；组间方差不超过抽样噪声时取样本量的中位数
+    """
+    count = np.asarray(count, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    sumsq = np.asarray(sumsq, dtype=np.float64)
+    has = count > 0
+    if not has.any():
+        return np.full(len(count), np.nan), np.nan
+    prior = total.sum() / count.sum()
+    if prior_strength is None:
+        means = total[has] / count[has]
+        within = (sumsq[has] - total[has] * means).sum() / max(count.sum() - has.sum(), 1)
+        between = means.var() - (within / count[has]).mean()
+        prior_strength = within / between if between > 0 else float(np.median(count[has]))
+    shrunk = (total + prior_strength * prior) / (count + prior_strength)
+    return np.where(has, shrunk, np.nan), prior_strength
+
+
+def wilson_interval(positive, count, confidence=CONFIDENCE):
+    """积极率的 Wilson 得分区间，返回 (下限, 上限)；样本量为 0 时为 NaN"""
+    positive = np.asarray(positive, dtype=np.float64)
+    count = np.asarray(count, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = positive / count
+        denom = 1 + z * z / count
+        center = (p + z * z / (2 * count)) / denom
+        half = z * np.sqrt(p * (1 - p) / count + z * z / (4 * count * count)) / denom
+    return center - half, center + half
+
+
+def _nan_quantiles(samples, qs):
+    """逐列分位数（线性插值，忽略 NaN）：整列排序后按每列的有效个数取位置，代替逐列的 np.nanquantile"""
+    samples = np.sort(samples, axis=0)
+    valid = np.count_nonzero(~np.isnan(samples), axis=0)
+    out = []
+    for q in qs:
+        pos = q * np.maximum(valid - 1, 0)
+        lower = np.floor(pos).astype(np.intp)
+        upper = np.minimum(lower + 1, np.maximum(valid - 1, 0))
+        lo = np.take_along_axis(samples, lower[None], axis=0)[0]
+        hi = np.take_along_axis(samples, upper[None], axis=0)[0]
+        out.append(np.where(valid > 0, lo + (hi - lo) * (pos - lower), np.nan))
+    return out
+
+
+def bootstrap_mean_ci(hist, means=None, n_resamples=N_RESAMPLES, confidence=CONFIDENCE, seed=0):
+    """平均得分的 bootstrap 百分位区间，返回 (下限, 上限)
+
+    hist:  score_histogram 得到的 (n_landmarks, HIST_BINS) 计数
+    means: 各打卡点的精确均分；给出时区间平移 (精确均分 - 直方图均分)，抵消 0.01 分格的误差
+    Poisson bootstrap：每条评论在一次重抽样中出现 Poisson(1) 次，同一格子的 c 条评论合计为 Poisson(c)，
+    因此只需为每个非空格子抽一个数；权重全为 0 的重抽样不计入
+    """
+    hist = np.asarray(hist)
+    n_landmarks = hist.shape[0]
+    low = np.full(n_landmarks, np.nan)
+    high = np.full(n_landmarks, np.nan)
+    rows, bins = np.nonzero(hist)
+    if not len(rows):
+        return low, high
+    lam = hist[rows, bins].astype(np.float64)
+    grid = np.arange(HIST_BINS) / (HIST_BINS - 1)
+    values = grid[bins]
+    present, starts = np.unique(rows, return_index=True)
+
+    rng = np.random.default_rng(seed)
+    estimates = np.empty((n_resamples, len(present)))
+    batch = max(1, _MAX_DRAWS // len(lam))
+    for first in range(0, n_resamples, batch):
+        weights = rng.poisson(lam, size=(min(batch, n_resamples - first), len(lam)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            estimates[first:first + len(weights)] = (np.add.reduceat(weights * values, starts, axis=1)
+                                                     / np.add.reduceat(weights, starts, axis=1))
+
+    alpha = (1 - confidence) / 2
+    lo, hi = _nan_quantiles(estimates, (alpha, 1 - alpha))
+    if means is not None:
+        counts = hist[present]
+        shift = np.asarray(means, dtype=np.float64)[present] - counts @ grid / counts.sum(axis=1)
+        lo, hi = lo + shift, hi + shift
+    low[present] = lo
+    high[present] = hi
+    return low, high
+
+
+def rank_landmarks(count, total, sumsq, positive, hist, prior_strength=None, n_resamples=N_RESAMPLES,
+                   confidence=CONFIDENCE, seed=0):
+    """由各打卡点的充分统计量（见 LandmarkAccumulator）计算 RobustStats"""
+    count = np.asarray(count)
+    shrunk, prior_strength = shrunk_scores(count, total, sumsq, prior_strength)
+    mean = np.full(len(count), np.nan)
+    np.divide(total, count, out=mean, where=count > 0)
+    score_low, score_high = bootstrap_mean_ci(hist, mean, n_resamples, confidence, seed)
+    pos_low, pos_high = wilson_interval(positive, count, confidence)
+    return RobustStats(shrunk, prior_strength, score_low, score_high, pos_low, pos_high)
+
+
+def robust_stats(codes, scores, n_landmarks, **options):
+    """直接由 (打卡点编号, 得分) 记录计算 RobustStats；options 见 rank_landmarks"""
+    codes = np.asarray(codes, dtype=np.intp)
+    scores = np.asarray(scores, dtype=np.float64)
+    count = np.bincount(codes, minlength=n_landmarks)
+    total = np.bincount(codes, weights=scores, minlength=n_landmarks)
+    sumsq = np.bincount(codes, weights=scores * scores, minlength=n_landmarks)
+    positive = np.bincount(codes[scores > POSITIVE_THRESHOLD], minlength=n_landmarks)
+    return rank_landmarks(count, total, sumsq, positive, score_histogram(codes, scores, n_landmarks), **options)
@@ -0,0 +1,128 @@
+"""
+结果图表渲染
+matplotlib（以及 numpy / pandas）只在真正绘图时才导入，默认使用 Agg 后端（不依赖图形界面）；
+每张图最多显示 max_landmarks 个打卡点（按样本量取前若干个），也可以分页输出全部打卡点。
+绘图只依赖结果 CSV，可以不重跑分析直接重新出图（各脚本的 --plot-only）
+"""
+
+import os
+
+
+DEFAULT_DPI = 120
+DEFAULT_MAX_LANDMARKS = 30
+# 子图标题位置固定，matplotlib 就不必为避让刻度标签而逐个测量文字范围
+TITLE_Y = 1.01
+GRADE_ORDER = ['强正面', '正面', '中立', '负面']
+GRADE_COLORS = ['#2ca02c', '#ffdd57', '#ff7f0e', '#d62728']
+
+
+def pyplot():
+    """延迟导入 pyplot；尚未选择后端时使用 Agg"""
+    import matplotlib
+    import sys
+    if 'matplotlib.pyplot' not in sys.modules:
+        matplotlib.use('Agg')
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def load_results(csv_path):
+    """读取分析脚本保存的结果 CSV"""
+    import pandas as pd
+    return pd.read_csv(csv_path, encoding='utf-8-sig')
+
+
+def _pages(results_df, max_landmarks, paginate, count_column):
+    """切出每张图要显示的打卡点：分页时按原顺序每页 max_landmarks 个，否则只保留样本量最多的 max_landmarks 个"""
+    if not max_landmarks or len(results_df) <= max_landmarks:
+        return [results_df]
+    if paginate:
+        return [results_df.iloc[i:i + max_landmarks] for i in range(0, len(results_df), max_landmarks)]
+    keep = results_df[count_column].astype(int).nlargest(max_landmarks, keep='first').index
+    return [results_df.loc[results_df.index.isin(keep)]]
+
+
+def _page_paths(png_path, n_pages):
+    if n_pages == 1:
+        return [png_path]
+    stem, ext = os.path.splitext(png_path)
+    return [png_path] + [f"{stem}_p{k}{ext}" for k in range(2, n_pages + 1)]
+
+
+def render_report(results_df, png_path, max_landmarks=DEFAULT_MAX_LANDMARKS, paginate=False, dpi=DEFAULT_DPI):
+    """citywalk_analysis.py / sentiment_analysis.py 的 2×2 报告图：得分排行、评论数量、积极率、等级分布
+
+    results_df: 含 打卡点 / 情感得分 / 情感等级 / 积极率 / 样本量 列，按排名顺序；
+                有 得分下限 / 得分上限 列时在得分排行上画出置信区间
+    返回写出的图片路径列表（分页时多张）
+    """
+    import numpy as np
+    import matplotlib
+    plt = pyplot()
+    cmap = matplotlib.colormaps['RdYlGn']
+
+    # 等级分布始终按全部打卡点统计
+    grade_counts = results_df['情感等级'].value_counts()
+    grade_counts = grade_counts.reindex([g for g in GRADE_ORDER if g in grade_counts.index])
+
+    pages = _pages(results_df, max_landmarks, paginate, '样本量')
+    paths = _page_paths(png_path, len(pages))
+    for k, (page, path) in enumerate(zip(pages, paths), 1):
+        names = page['打卡点'].astype(str).tolist()
+        scores = page['情感得分'].to_numpy(dtype=float)
+        positions = np.arange(len(page))
+
+        fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+        title = '上海CityWalk打卡点情感分析报告'
+        if len(pages) > 1:
+            title += f'（第 {k}/{len(pages)} 页）'
+        elif len(page) < len(results_df):
+            title += f'（样本量前 {len(page)} 个打卡点，共 {len(results_df)} 个）'
+        fig.suptitle(title, fontsize=18, fontweight='bold')
+
+        # 图1：情感得分排行
+        ax1 = axes[0, 0]
+        bars = ax1.barh(names, scores, color=cmap(scores), edgecolor='grey', linewidth=1.5)
+        ax1.set_xlabel('情感得分', fontsize=11)
+        ax1.set_title('情感得分排行', fontsize=12, fontweight='bold', y=TITLE_Y)
+        ax1.set_xlim(0.3, 1.0)
+        ax1.grid(axis='x', linestyle='--', alpha=0.5)
+        ax1.bar_label(bars, labels=[f'{s:.3f}' for s in scores], padding=3, fontsize=8)
+        if '得分下限' in page.columns:
+            err = np.vstack((scores - page['得分下限'].to_numpy(dtype=float),
+                             page['得分上限'].to_numpy(dtype=float) - scores)).clip(min=0)
+            ax1.errorbar(scores, positions, xerr=err, fmt='none', ecolor='dimgrey', elinewidth=1, capsize=2)
+
+        # 图2：样本量对比
+        ax2 = axes[0, 1]
+        ax2.bar(positions, page['样本量'], color='skyblue', edgecolor='navy', linewidth=1.5)
+        ax2.set_xticks(positions)
+        ax2.set_xticklabels(names, rotation=45, ha='right', fontsize=9)
+        ax2.set_ylabel('评论数量', fontsize=11)
+        ax2.set_title('评论数量分布', fontsize=12, fontweight='bold', y=TITLE_Y)
+        ax2.grid(axis='y', linestyle='--', alpha=0.5)
+
+        # 图3：积极率
+        ax3 = axes[1, 0]
+        ax3.bar(positions, page['积极率'], color='lightgreen', edgecolor='darkgreen', linewidth=1.5)
+        ax3.set_xticks(positions)
+        ax3.set_xticklabels(names, rotation=45, ha='right', fontsize=9)
+        ax3.set_ylabel('积极评论比例', fontsize=11)
+        ax3.set_ylim(0, 1)
+        ax3.set_title('积极评论率', fontsize=12, fontweight='bold', y=TITLE_Y)
+        ax3.grid(axis='y', linestyle='--', alpha=0.5)
+
+        # 图4：等级分布饼图
+        ax4 = axes[1, 1]
+        ax4.pie(grade_counts.values, labels=grade_counts.index, autopct='%1.0f%%',
+                colors=GRADE_COLORS[:len(grade_counts)], startangle=90)
+        ax4.set_title('情感等级分布', fontsize=12, fontweight='bold', y=TITLE_Y)
+
+        # 固定边距代替 tight_layout（后者要多做一遍全部文字的排版）；PNG 用低压缩级别换取编码速度
+        fig.subplots_adjust(left=0.1, right=0.97, top=0.92, bottom=0.1, hspace=0.4, wspace=0.25)
+        fig.savefig(path, dpi=dpi, pil_kwargs={'compress_level': 1})
+        plt.close(fig)
+    return paths
+
@@ -3,6 +3,6 @@ REM CityWalk Sentiment Analysis
 cd /d "%~dp0"
 
 echo Starting CityWalk Sentiment Analysis...
-python run_analysis.py
+REM The analysis is a package run from the repository root's entry script (default command: analyze)
+python "%~dp0..\run_main.py" %*
 echo Analysis complete!
-
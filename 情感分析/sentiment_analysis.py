@@ -7,43 +7,67 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
-from snownlp import SnowNLP
-import re
-from collections import defaultdict
 import warnings
 import os
+from functools import partial
 
-# 设置中文字体
-matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-matplotlib.rcParams['axes.unicode_minus'] = False
+from .ingest import describe_load, read_excel_cached
+from .lexicon_scorer import BatchScores
+from .pipeline import run_analysis
 
 # 忽略警告
 warnings.filterwarnings('ignore')
 
 
-def preprocess_text(text):
-    """文本预处理：去除特殊字符"""
-    if not isinstance(text, str):
-        return ""
-    text = re.sub(r'http[s]?://\S+', '', text)  # 移除URL
-    text = re.sub(r'[^\w\u4e00-\u9fa5]', ' ', text)  # 保留中文和字母数字
-    text = re.sub(r'\s+', ' ', text).strip()  # 合并空格
-    return text
-
-
-def analyze_sentiment(text):
-    """中文情感分析 (0-1分，1=最积极)"""
+def analyze_sentiment(text, model=None):
+    """中文情感分析 (0-1分，1=最积极)；model 为已导入的 snownlp.SnowNLP，缺省时在此导入"""
     if not text:
         return 0.5
+    if model is None:
+        # SnowNLP 导入时就要加载分词/情感模型（数秒），只在真正打分时才导入
+        from snownlp import SnowNLP as model
     try:
-        return SnowNLP(text).sentiments
+        return model(text).sentiments
     except:
         return 0.5
 
 
+def snownlp_model_version():
+    """SnowNLP 版本 + 情感模型文件指纹，作为得分缓存键的一部分"""
+    from importlib.metadata import version, PackageNotFoundError
+    from importlib.util import find_spec
+    try:
+        lib_version = version('snownlp')
+    except PackageNotFoundError:
+        lib_version = 'unknown'
+    # 按路径定位模型文件而不导入 snownlp，全部命中缓存时整个运行都不必加载模型
+    spec = find_spec('snownlp')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError('未安装 snownlp')
+    data_path = os.path.join(spec.submodule_search_locations[0], 'sentiment', 'sentiment.marshal')
+    model_path = data_path + '.3'
+    if not os.path.exists(model_path):
+        model_path = data_path
+    try:
+        stat = os.stat(model_path)
+        fingerprint = f"{stat.st_size}-{int(stat.st_mtime)}"
+    except OSError:
+        fingerprint = 'nomodel'
+    return f"snownlp-{lib_version}-{fingerprint}"
+
+
+def analyze_many(texts, model=None):
+    """批量情感分析，返回 BatchScores（pos_total/neg_total 为 SnowNLP 的正/负类概率）"""
+    scores = np.fromiter((analyze_sentiment(t, model) for t in texts), dtype=np.float64)
+    return BatchScores(scores, scores.copy(), 1.0 - scores, np.zeros(len(scores), dtype=np.int32))
+
+
+def make_scorer():
+    """返回批量打分函数（多进程时每个 worker 调用一次，SnowNLP 模型在此加载）"""
+    from snownlp import SnowNLP  # 导入即加载分词与情感模型
+    return partial(analyze_many, model=SnowNLP)
+
+
 def load_data():
     """加载数据"""
     print("=" * 70)
@@ -62,12 +86,15 @@ def load_data():
     for path in possible_paths:
         try:
             if path.endswith('.xlsx'):
-                df = pd.read_excel(path)
+                df = read_excel_cached(path)
             elif path.endswith('.csv'):
                 df = pd.read_csv(path, encoding='utf-8')
+                df.attrs['source'] = path
             
             if df is not None and len(df) > 0:
                 print(f"\n✅ 成功加载数据: {path}")
+                if path.endswith('.xlsx'):
+                    print(f"   {describe_load(df)}")
                 return df
         except:
             continue
@@ -111,244 +138,16 @@ def create_sample_data():
     return pd.DataFrame(sample_data)
 
 
-def main():
-    """主函数"""
-    
-    # 1. 加载数据
-    df = load_data()
-    
-    if 'content' not in df.columns:
-        cols = [c for c in df.columns if '内容' in c or '评论' in c or '文本' in c]
-        if cols:
-            df.rename(columns={cols[0]: 'content'}, inplace=True)
-        else:
-            print(f"❌ 错误：无法找到内容列\n可用字段: {df.columns.tolist()}")
-            return
-    
-    print(f"📊 数据量: {len(df)} 条评论\n")
-    
-    # 2. 文本预处理
-    print("🔄 正在预处理文本...")
-    df['processed'] = df['content'].apply(preprocess_text)
-    valid_count = len(df[df['processed'] != ''])
-    print(f"✓ 有效文本: {valid_count}/{len(df)} ({100*valid_count/len(df):.1f}%)\n")
-    
-    # 3. 打卡点库
-    landmarks = [
-        '外滩', '南京路', '豫园', '城隍庙', '田子坊', '新天地',
-        '武康路', '安福路', '思南公馆', '静安寺', '陆家嘴',
-        '迪士尼', '朱家角', '枫泾', '七宝', 'M50', '1933',
-        '上生新所', '愚园路', '淮海路', '甜爱路', '多伦路',
-        '徐家汇', '龙华寺', '共青森林公园', '东平国家森林公园'
-    ]
-    
-    # 4. 提取打卡点
-    print("🔍 正在提取打卡点...")
-    landmark_data = defaultdict(list)
-    landmark_raw = defaultdict(list)
-    
-    for idx, row in df.iterrows():
-        processed = row['processed']
-        original = row['content']
-        for landmark in landmarks:
-            if landmark in processed:
-                landmark_data[landmark].append(processed)
-                landmark_raw[landmark].append(original)
-    
-    if not landmark_data:
-        print("❌ 未找到任何打卡点")
-        return
-    
-    # 按数量排序
-    sorted_landmarks = sorted(landmark_data.items(), key=lambda x: len(x[1]), reverse=True)
-    
-    print(f"\n✓ 识别到 {len(sorted_landmarks)} 个打卡点:")
-    for i, (lm, comments) in enumerate(sorted_landmarks[:10], 1):
-        print(f"   {i:2d}. {lm:10s} ({len(comments):3d} 条评论)")
-    if len(sorted_landmarks) > 10:
-        print(f"   ... 等共 {len(sorted_landmarks)} 个")
-    
-    # 5. 情感分析
-    print("\n" + "=" * 70)
-    print("🚀 执行情感分析...".center(70))
-    print("=" * 70 + "\n")
-    
-    results = []
-    for idx, (landmark, comments) in enumerate(sorted_landmarks, 1):
-        print(f"[{idx}/{len(sorted_landmarks)}] 分析 {landmark:12s}", end=" ", flush=True)
-        
-        # 分析每条评论
-        sentiments = [analyze_sentiment(c) for c in comments]
-        
-        # 统计指标
-        avg_sentiment = np.mean(sentiments)
-        positive_count = sum(1 for s in sentiments if s > 0.6)
-        negative_count = sum(1 for s in sentiments if s < 0.4)
-        positive_rate = positive_count / len(sentiments) if sentiments else 0
-        
-        # 找最具代表性的评论
-        best_idx = np.argmax(sentiments)
-        sample_text = landmark_raw[landmark][best_idx][:45]
-        
-        # 情感等级
-        if avg_sentiment >= 0.7:
-            grade = '强正面'
-        elif avg_sentiment >= 0.6:
-            grade = '正面'
-        elif avg_sentiment >= 0.4:
-            grade = '中立'
-        else:
-            grade = '负面'
-        
-        results.append({
-            '打卡点': landmark,
-            '情感得分': round(avg_sentiment, 4),
-            '情感等级': grade,
-            '积极评论数': positive_count,
-            '负面评论数': negative_count,
-            '积极率': round(positive_rate, 3),
-            '样本量': len(comments),
-            '示例': sample_text
-        })
-        
-        # 进度条
-        print(f"✓ {avg_sentiment:.3f}")
-    
-    # 创建结果DataFrame
-    results_df = pd.DataFrame(results)
-    results_df = results_df.sort_values('情感得分', ascending=False)
-    
-    # 6. 保存结果
-    print("\n" + "=" * 70)
-    print("💾 保存结果".center(70))
-    print("=" * 70 + "\n")
-    
-    csv_path = '打卡点情感分析结果.csv'
-    results_df.to_csv(csv_path, index=False, encoding='utf_8_sig')
-    print(f"✅ CSV 文件: {csv_path}")
-    
-    # 7. 显示表格结果
-    print("\n📋 情感分析结果汇总：\n")
-    print(f"{'排名':^4} | {'打卡点':^12} | {'得分':^6} | {'等级':^6} | {'积极率':^7} | {'样本':^5} | {'示例':^20}")
-    print("-" * 80)
-    
-    for i, (_, row) in enumerate(results_df.iterrows(), 1):
-        print(f"{i:4d} | {row['打卡点']:12s} | {row['情感得分']:6.3f} | {row['情感等级']:6s} | {row['积极率']:6.1%} | {row['样本量']:5d} | {row['示例']:20s}")
-    
-    # 8. Top5推荐
-    print("\n" + "=" * 70)
-    print("🏆 最值得推荐的TOP5打卡点".center(70))
-    print("=" * 70 + "\n")
-    
-    top5 = results_df.head(5)
-    for i, (_, row) in enumerate(top5.iterrows(), 1):
-        stars = "⭐" * int(row['情感得分'] * 5)
-        print(f"{i}. {row['打卡点']:12s} | 得分: {row['情感得分']:.3f} {stars} | 评论数: {row['样本量']}")
-    
-    # 9. 可视化
-    print("\n📊 生成可视化图表...", end=" ", flush=True)
-    
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-    fig.suptitle('🌆 上海CityWalk打卡点情感分析报告', fontsize=18, fontweight='bold')
-    
-    # 图1：情感得分排行
-    ax1 = axes[0, 0]
-    cmap = plt.cm.get_cmap('RdYlGn')
-    colors = [cmap(s) for s in results_df['情感得分']]
-    bars = ax1.barh(results_df['打卡点'], results_df['情感得分'], color=colors, edgecolor='grey', linewidth=1.5)
-    ax1.set_xlabel('情感得分', fontsize=11)
-    ax1.set_title('📊 情感得分排行', fontsize=12, fontweight='bold')
-    ax1.set_xlim(0.3, 1.0)
-    ax1.grid(axis='x', linestyle='--', alpha=0.5)
-    
-    for bar, score in zip(bars, results_df['情感得分']):
-        ax1.text(score + 0.02, bar.get_y() + bar.get_height()/2, f'{score:.3f}', 
-                va='center', fontsize=8)
-    
-    # 图2：样本量对比
-    ax2 = axes[0, 1]
-    ax2.bar(range(len(results_df)), results_df['样本量'], color='skyblue', edgecolor='navy', linewidth=1.5)
-    ax2.set_xticks(range(len(results_df)))
-    ax2.set_xticklabels(results_df['打卡点'], rotation=45, ha='right', fontsize=9)
-    ax2.set_ylabel('评论数量', fontsize=11)
-    ax2.set_title('📈 评论数量分布', fontsize=12, fontweight='bold')
-    ax2.grid(axis='y', linestyle='--', alpha=0.5)
-    
-    # 图3：积极率
-    ax3 = axes[1, 0]
-    ax3.bar(range(len(results_df)), results_df['积极率'], color='lightgreen', edgecolor='darkgreen', linewidth=1.5)
-    ax3.set_xticks(range(len(results_df)))
-    ax3.set_xticklabels(results_df['打卡点'], rotation=45, ha='right', fontsize=9)
-    ax3.set_ylabel('积极评论比例', fontsize=11)
-    ax3.set_ylim(0, 1)
-    ax3.set_title('😊 积极评论率', fontsize=12, fontweight='bold')
-    ax3.grid(axis='y', linestyle='--', alpha=0.5)
-    
-    # 图4：等级分布饼图
-    ax4 = axes[1, 1]
-    grade_counts = results_df['情感等级'].value_counts()
-    colors_pie = ['#2ca02c', '#ffdd57', '#ff7f0e', '#d62728']
-    grade_order = ['强正面', '正面', '中立', '负面']
-    grade_counts = grade_counts.reindex([g for g in grade_order if g in grade_counts.index])
-    ax4.pie(grade_counts.values, labels=grade_counts.index, autopct='%1.0f%%',
-            colors=colors_pie[:len(grade_counts)], startangle=90)
-    ax4.set_title('🎯 情感等级分布', fontsize=12, fontweight='bold')
-    
-    plt.tight_layout()
-    png_path = '打卡点情感分析结果.png'
-    plt.savefig(png_path, dpi=300, bbox_inches='tight')
-    print(f"✓")
-    print(f"✅ PNG 文件: {png_path}\n")
-    
-    # 10. 深度洞察
-    print("=" * 70)
-    print("💡 深度洞察分析".center(70))
-    print("=" * 70 + "\n")
-    
-    overall_score = results_df['情感得分'].mean()
-    overall_positive_rate = results_df['积极率'].mean()
-    
-    if overall_score >= 0.7:
-        desc = "🌟 高度推荐"
-    elif overall_score >= 0.6:
-        desc = "😊 值得体验"
-    elif overall_score >= 0.5:
-        desc = "😐 一般"
-    else:
-        desc = "😞 需谨慎"
-    
-    print(f"📊 整体评估:")
-    print(f"   • 综合情感得分: {overall_score:.3f}/1.0 - {desc}")
-    print(f"   • 整体积极率: {overall_positive_rate:.1%}")
-    print(f"   • 分析打卡点: {len(results_df)} 个")
-    print(f"   • 总评论数: {results_df['样本量'].sum()} 条")
-    
-    print(f"\n🏅 排名概览:")
-    print(f"   • 🥇 最佳: {results_df.iloc[0]['打卡点']} ({results_df.iloc[0]['情感得分']:.3f})")
-    if len(results_df) > 1:
-        most_comments = results_df.nlargest(1, '样本量').iloc[0]
-        print(f"   • 🔥 热门: {most_comments['打卡点']} ({most_comments['样本量']} 条评论)")
-        print(f"   • ❌ 需改: {results_df.iloc[-1]['打卡点']} ({results_df.iloc[-1]['情感得分']:.3f})")
-    
-    print(f"\n📈 按等级统计:")
-    for grade in ['强正面', '正面', '中立', '负面']:
-        items = results_df[results_df['情感等级'] == grade]
-        if len(items) > 0:
-            names = items['打卡点'].tolist()
-            print(f"   • {grade:6s}: {', '.join(names[:5])}", end="")
-            if len(names) > 5:
-                print(f" 等 ({len(names)} 个)")
-            else:
-                print()
-    
-    print("\n" + "=" * 70)
-    print("✨ 分析完成！".center(70))
-    print("=" * 70)
-    print(f"\n📁 生成的文件:")
-    print(f"   1. 详细结果: {csv_path}")
-    print(f"   2. 可视化: {png_path}")
-    print(f"\n" + "=" * 70 + "\n")
+def main(analyzer='snownlp', **options):
+    """主函数
+
+    analyzer: 打分后端，默认 SnowNLP（昂贵，自动用全部 CPU 并经持久化得分缓存；见 backends.py）
+    其余参数（workers、input_path、chunksize、incremental、state_path、report_path、profile、
+    plot、plot_only、max_landmarks、paginate、attribution、clause_window、trends、as_of）见 pipeline.run_analysis
+    """
+    return run_analysis('sentiment_analysis', load_data, analyzer, **options)
 
 
 if __name__ == "__main__":
-    main()
+    from .cli import parse_command
+    main(**parse_command('snownlp'))
@@ -0,0 +1,139 @@
+"""
+情感得分持久化缓存 (SQLite)
+以“分析器/模型版本 + 预处理后文本”的哈希为键，重复运行时只需为新增或改动的评论打分
+容量有上限，超出后按最近使用时间 (LRU) 淘汰
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from .lexicon_scorer import BatchScores
+
+
+DEFAULT_CACHE_PATH = 'sentiment_cache.sqlite'
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+# SQLite 单条语句的参数个数有限，批量查询时分块
+_QUERY_CHUNK = 500
+
+
+class SentimentCache:
+    """评论得分缓存
+
+    model_version 应包含分析器名称及模型/词典版本，版本变化后旧条目自然失效（随后被 LRU 淘汰）。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, model_version='', max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS scores (
+                key BLOB PRIMARY KEY,
+                score REAL NOT NULL,
+                pos_total REAL NOT NULL,
+                neg_total REAL NOT NULL,
+                matched INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)')
+        self._conn.commit()
+        # 条目数只在打开时统计一次，之后随插入/淘汰的行数增减，写入时不再 COUNT(*) 全表
+        (self._size,) = self._conn.execute('SELECT COUNT(*) FROM scores').fetchone()
+
+    def key(self, text):
+        """缓存键：模型版本与文本内容的 SHA-1 摘要"""
+        return hashlib.sha1(f'{self.model_version}\0{text}'.encode('utf-8')).digest()
+
+    def get_many(self, keys):
+        """查询一批键，返回 {key: (score, pos_total, neg_total, matched)}，并刷新命中条目的使用时间"""
+        found = {}
+        for i in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT key, score, pos_total, neg_total, matched FROM scores WHERE key IN ({placeholders})',
+                chunk)
+            for key, *values in rows:
+                found[key] = tuple(values)
+        if found:
+            now = time.time()
+            self._conn.executemany('UPDATE scores SET last_used = ? WHERE key = ?',
+                                   ((now, key) for key in found))
+            self._conn.commit()
+        return found
+
+    def put_many(self, items):
+        """写入 [(key, (score, pos_total, neg_total, matched)), ...]，超出容量时淘汰最久未用的条目"""
+        now = time.time()
+        rows = [(key, *values, now) for key, values in items]
+        # 逐行插入以得知哪些键已存在（如另一进程刚写入），只对这些键改为更新，不增加条目数
+        insert = 'INSERT OR IGNORE INTO scores VALUES (?, ?, ?, ?, ?, ?)'
+        skipped = [row for row in rows if not self._conn.execute(insert, row).rowcount]
+        if skipped:
+            self._conn.executemany(
+                'UPDATE scores SET score = ?, pos_total = ?, neg_total = ?, matched = ?, last_used = ? WHERE key = ?',
+                (row[1:] + row[:1] for row in skipped))
+        self._size += len(rows) - len(skipped)
+        if self._size > self.max_entries:
+            self._evict(self._size - self.max_entries)
+        self._conn.commit()
+
+    def _evict(self, excess):
+        deleted = self._conn.execute(
+            'DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)',
+            (excess,)).rowcount
+        self._size -= deleted
+
+    def wrap(self, score_many):
+        """包装批量打分函数：命中缓存的文本直接取值，只对未命中的文本调用 score_many"""
+        def cached_score_many(texts):
+            texts = list(texts)
+            keys = [self.key(t) for t in texts]
+            found = self.get_many(keys)
+
+            missing = [i for i, key in enumerate(keys) if key not in found]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            if missing:
+                fresh = score_many([texts[i] for i in missing])
+                new_items = {}
+                for j, i in enumerate(missing):
+                    new_items[keys[i]] = (float(fresh.score[j]), float(fresh.pos_total[j]),
+                                          float(fresh.neg_total[j]), int(fresh.matched[j]))
+                self.put_many(new_items.items())
+                found.update(new_items)
+
+            rows = [found[key] for key in keys]
+            if not rows:
+                return BatchScores(np.empty(0), np.empty(0), np.empty(0), np.empty(0, dtype=np.int32))
+            score, pos_total, neg_total, matched = (np.array(col) for col in zip(*rows))
+            return BatchScores(score, pos_total, neg_total, matched.astype(np.int32))
+        return cached_score_many
+
+    def report(self):
+        """命中统计"""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f"缓存命中 {self.hits}/{total} ({rate:.1%})，新打分 {self.misses} 条，"
+                f"缓存条目 {self._size} ({os.path.basename(self.path)})")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
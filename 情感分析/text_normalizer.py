@@ -0,0 +1,119 @@
+"""
+文本规范化
+去 URL、非文字字符替换为空格、合并空白，三步融合为一个预编译正则、单次替换完成
+可选：全角 -> 半角、繁体 -> 简体（需要安装 opencc）
+
+用法：python -m 情感分析.text_normalizer [数据文件]   # 在真实语料上与旧的三次 re.sub 实现对比耗时并校验结果一致
+"""
+
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+
+# URL 只会以空白或文本结尾收尾，因此“删除 URL 再把非文字字符变空格、合并空白”
+# 与“把 URL 和非文字字符组成的连续片段整体替换为一个空格”结果相同
+_NOISE = re.compile(r'(?:http[s]?://\S+|[^\w\u4e00-\u9fa5])+')
+
+# 全角 ASCII (U+FF01-U+FF5E) 与全角空格 -> 半角
+_FULL_TO_HALF = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_FULL_TO_HALF[0x3000] = 0x20
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据', '去重后的数据.xlsx')
+
+_t2s = None
+
+
+def _traditional_to_simplified(text):
+    global _t2s
+    if _t2s is None:
+        try:
+            import opencc
+        except ImportError:
+            raise ImportError("繁体转简体需要安装 opencc：pip install opencc-python-reimplemented") from None
+        _t2s = opencc.OpenCC('t2s')
+    return _t2s.convert(text)
+
+
+def fold_text(text, fold_width=False, fold_traditional=False):
+    """字符折叠：全角转半角、繁体转简体"""
+    if fold_width:
+        text = text.translate(_FULL_TO_HALF)
+    if fold_traditional:
+        text = _traditional_to_simplified(text)
+    return text
+
+
+def preprocess_text(text, fold_width=False, fold_traditional=False):
+    """文本预处理：去除 URL 与特殊字符，只保留中文、字母和数字，以单个空格分隔"""
+    if not isinstance(text, str):
+        return ""
+    if fold_width or fold_traditional:
+        text = fold_text(text, fold_width, fold_traditional)
+    return _NOISE.sub(' ', text).strip()
+
+
+def normalize_series(series, fold_width=False, fold_traditional=False):
+    """preprocess_text 的批量版本：pandas 向量化字符串操作，结果逐元素相同，非字符串元素得到空字符串"""
+    series = pd.Series(series)
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return pd.Series("", index=series.index, dtype=object)
+    # 非字符串元素先置为缺失值，最后统一填为空字符串
+    text = series.where(series.map(type) == str) if pd.api.types.is_object_dtype(series) else series
+    if fold_width:
+        text = text.str.translate(_FULL_TO_HALF)
+    if fold_traditional:
+        text = text.map(_traditional_to_simplified, na_action='ignore')
+    return text.str.replace(_NOISE, ' ', regex=True).str.strip().fillna("").astype(object)
+
+
+def _legacy_preprocess_text(text):
+    """旧实现（三次 re.sub），仅用于基准对比"""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r'http[s]?://\S+', '', text)
+    text = re.sub(r'[^\w\u4e00-\u9fa5]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def benchmark(series, repeat=10):
+    """对比旧实现、融合正则逐条调用、normalize_series 三种方式，返回 {名称: 最短耗时秒数}"""
+    candidates = {
+        '旧实现 (3× re.sub + apply)': lambda: series.apply(_legacy_preprocess_text),
+        '融合正则 + apply': lambda: series.apply(preprocess_text),
+        'normalize_series': lambda: normalize_series(series),
+    }
+    expected = series.apply(_legacy_preprocess_text).tolist()
+    timings = {}
+    for name, run in candidates.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            best = min(best, time.perf_counter() - start)
+        if list(result) != expected:
+            raise AssertionError(f"{name} 的结果与旧实现不一致")
+        timings[name] = best
+    return timings
+
+
+def main():
+    from .ingest import find_content_column, read_excel_cached
+
+    path = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_PATH
+    df = pd.read_csv(path, encoding='utf-8') if path.endswith('.csv') else read_excel_cached(path)
+    series = df[find_content_column(df.columns) or df.columns[-1]]
+    print(f"{path}: {len(series)} 条, 平均 {series.astype(str).str.len().mean():.0f} 字")
+
+    timings = benchmark(series)
+    baseline = timings['旧实现 (3× re.sub + apply)']
+    for name, seconds in timings.items():
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms  ({baseline / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
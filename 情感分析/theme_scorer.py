@@ -0,0 +1,136 @@
+"""
+主题打分
+特征词表（上海 Citywalk 相关特征词表）加载一次，编译成单个最左最长匹配正则；
+每条评论只扫描一遍得到“评论 × 特征词”计数，再乘以“特征词 × 主题”权重矩阵得到所有主题的得分。
+新增主题只是给权重矩阵加一列，不会增加对语料的扫描次数。
+
+特征词按主题线索词归类：线索词是特征词的子串即归入该主题（可同时属于多个主题），权重取该词的 TF-IDF
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .landmark_matcher import LANDMARK_KEYWORDS
+
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '数据',
+                                    '上海 Citywalk 相关特征词表_筛选后.xlsx')
+
+# 主题 -> 线索词；主题名沿用原 neo4j/theme_*.cypher
+THEME_CUES = {
+    '文化场馆/历史街区': ['历史', '文化', '博物馆', '寺', '庙', '古', '教堂', '石库门', '弄堂', '里弄', '洋房',
+                   '遗产', '风貌', '怀旧', '海派', '红色', '名人', '老街', '建筑'],
+    '购物/商业街区': ['逛街', '商业', '步行街', '购物', '时尚', '商品', '女装', '品牌', '路易威登', '商场'],
+    '特色街巷/酒吧街': ['马路', '街巷', '巷', '街角', '街头', '街景', '扫街', '漫步', '散步', '小众', '酒吧', '梧桐'],
+    '现代摩天楼/地标': ['现代', '摩天', '大厦', '观光', '滨江', '夜景', '地标', '上海滩', '金融'],
+    '公园/绿色空间': ['公园', '风景', '景色', '美景', '自然', '生态', '园林', '骑行', '徒步', '季节', '绿'],
+    '艺术区/创意园': ['艺术', '美术馆', '画廊', '展', '文艺', '创意', '文创', '设计', '书店', '摄影'],
+    '美食/小吃': ['美食', '咖啡', '面包', '小吃', '餐厅', '奶茶', '甜点', '下午茶', '探店', '茶餐厅', '吃'],
+}
+
+# 地名类特征词不作为主题依据（否则打卡点名称本身会主导主题）
+EXCLUDED_POS = ('地名',)
+
+DEFAULT_MIN_SHARE = 0.2
+DEFAULT_MIN_COMMENTS = 3
+
+
+def load_feature_lexicon(path=DEFAULT_LEXICON_PATH):
+    """读取特征词表（经列式缓存），返回 单词 / 词性 / TF-IDF 三列"""
+    from .ingest import read_excel_cached
+    df = read_excel_cached(path)
+    return df[['单词', '词性', 'TF-IDF']].dropna(subset=['单词'])
+
+
+class ThemeScorer:
+    """特征词表 -> 主题得分
+
+    lexicon:   含 单词 / 词性 / TF-IDF 列的 DataFrame（见 load_feature_lexicon）
+    themes:    {主题: [线索词, ...]}
+    landmarks: 打卡点名称；包含打卡点名称的特征词被排除
+    """
+
+    def __init__(self, lexicon, themes=THEME_CUES, landmarks=LANDMARK_KEYWORDS):
+        self.themes = list(themes)
+        words, rows, cols, weights = [], [], [], []
+        for word, pos, tfidf in lexicon[['单词', '词性', 'TF-IDF']].itertuples(index=False):
+            word = str(word)
+            if pos in EXCLUDED_POS or any(lm in word for lm in landmarks):
+                continue
+            matched = [t for t, theme in enumerate(self.themes) if any(cue in word for cue in themes[theme])]
+            if matched and word not in words:
+                for t in matched:
+                    rows.append(len(words))
+                    cols.append(t)
+                    weights.append(float(tfidf))
+                words.append(word)
+
+        from scipy import sparse
+        self.words = words
+        self._word_index = {w: i for i, w in enumerate(words)}
+        self.word_themes = sparse.csr_matrix((weights, (rows, cols)), shape=(len(words), len(self.themes)))
+        # 按长度降序的备选分支即最左最长匹配，由 re 在 C 层完成扫描
+        ordered = sorted(words, key=lambda w: (-len(w), w))
+        self._word_re = re.compile('|'.join(re.escape(w) for w in ordered)) if ordered else None
+
+    def word_counts(self, texts):
+        """评论 × 特征词 计数矩阵 (scipy CSR)"""
+        from scipy import sparse
+        indptr, indices = [0], []
+        index = self._word_index
+        for text in texts:
+            if self._word_re is not None and isinstance(text, str):
+                indices.extend(index[m.group()] for m in self._word_re.finditer(text))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        # 同一评论内重复出现的词在 CSR 中保留为多个条目，矩阵运算时自然累加
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(texts), len(self.words)))
+
+    def score_many(self, texts):
+        """评论 × 主题 得分矩阵 (scipy CSR)，一次扫描覆盖全部主题"""
+        return (self.word_counts(texts) @ self.word_themes).tocsr()
+
+    def landmark_themes(self, incidence, texts, relative=True):
+        """各打卡点的主题分布
+
+        incidence: 评论 -> 打卡点关联表（与 texts 行对齐）
+        texts:     评论文本（通常为预处理后的文本）
+        relative:  先除以全语料的主题占比再归一化，避免“历史”“文化”这类高频主题压过所有打卡点的特色
+        返回 DataFrame：行为打卡点，列为主题，值为各主题所占份额（行和为 1，无主题信号时为 0）
+        """
+        totals, corpus = self.theme_totals(incidence, texts)
+        return self.theme_shares(totals, corpus, incidence.landmarks, relative)
+
+    def theme_totals(self, incidence, texts):
+        """各打卡点的主题得分和 (打卡点 × 主题) 与全语料的主题得分和；分块计算后逐块相加即为整体结果"""
+        comment_themes = self.score_many(texts)
+        totals = np.asarray((incidence.to_scipy().T @ comment_themes).todense())
+        return totals, np.asarray(comment_themes.sum(axis=0)).ravel()
+
+    def theme_shares(self, totals, corpus, landmarks, relative=True):
+        """由 theme_totals 的结果得到 landmark_themes 的主题分布表"""
+        if relative:
+            totals = np.divide(totals, corpus, out=np.zeros_like(totals), where=corpus > 0)
+        row_sum = totals.sum(axis=1, keepdims=True)
+        shares = np.divide(totals, row_sum, out=np.zeros_like(totals), where=row_sum > 0)
+        return pd.DataFrame(shares, index=landmarks, columns=self.themes)
+
+
+def theme_memberships(shares, counts=None, min_share=DEFAULT_MIN_SHARE, min_comments=DEFAULT_MIN_COMMENTS):
+    """由主题分布得到主题归属 [(主题, 打卡点, 权重), ...]，可直接传给 graph_export.graph_from_results
+
+    shares:       ThemeScorer.landmark_themes 的结果
+    counts:       各打卡点评论数（与 shares 行对齐），评论少于 min_comments 的打卡点不归类
+    min_share:    主题份额达到该值才算归属
+    """
+    members = []
+    for i, (landmark, row) in enumerate(shares.iterrows()):
+        if counts is not None and counts[i] < min_comments:
+            continue
+        for theme, share in row.items():
+            if share >= min_share:
+                members.append((theme, landmark, round(float(share), 4)))
+    return members
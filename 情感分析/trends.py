@@ -0,0 +1,228 @@
+"""
+打卡点情感趋势
+保留评论的发布时间，按 (打卡点, 日) 累加充分统计量（样本数、得分和、平方和、积极/负面数）；
+日、周、月各粒度的得分与声量由日统计经一次 groupby-resample 得到，滚动窗口和骤降检测也在分组后的整列上完成。
+日统计可合并、可保存进增量状态，每天的运行只需为新增评论累加
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import NEGATIVE_THRESHOLD, POSITIVE_THRESHOLD
+
+
+TRENDS_PATH = '打卡点情感趋势.csv'
+# 粒度 -> (resample 频率, 默认滚动窗口期数)
+GRANULARITIES = {'day': ('D', 7), 'week': ('W', 4), 'month': ('MS', 3)}
+# 骤降：本期均分比之前 window 期的基线低 DROP_MIN_DELTA 以上，且 z 值低于 -DROP_Z，两边样本都不少于 DROP_MIN_COUNT
+DROP_Z = 2.0
+DROP_MIN_COUNT = 5
+DROP_MIN_DELTA = 0.1
+
+_STATS = ['count', 'total', 'sumsq', 'positive', 'negative']
+
+# 导出的发布时间形如 “08月18日20:57\xa0来自iPhone客户端”、“06月08日 07:02”、“今天11:28”、“5分钟前转赞人数超过99”，
+# 也兼容带年份的 “2024-05-01 12:00”
+_TIME = re.compile(
+    r'(?:(?P<year>\d{4})\s*[年/.-]\s*)?(?P<month>\d{1,2})\s*[月/.-]\s*(?P<day>\d{1,2})\s*日?'
+    r'(?:\s*(?P<hour>\d{1,2}):(?P<minute>\d{2}))?'
+    r'|(?P<relative>今天|昨天|前天)\s*(?P<rel_hour>\d{1,2}):(?P<rel_minute>\d{2})'
+    r'|(?P<ago>\d+)\s*(?P<unit>秒|分钟|小时)前'
+)
+_DAYS_BACK = {'今天': 0, '昨天': 1, '前天': 2}
+_UNIT_SECONDS = {'秒': 1, '分钟': 60, '小时': 3600}
+
+
+def parse_post_times(values, as_of=None):
+    """发布时间列 -> datetime64 数组（无法解析的为 NaT），与输入等长
+
+    as_of: 抓取时间，“今天”“N分钟前”相对它换算；不带年份的日期取 as_of 的年份，晚于 as_of 的归到上一年。
+           默认为当前时间（pipeline 传入由数据确定的抓取时间，见 pipeline.resolve_as_of）
+    """
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    series = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[s]')
+
+    # 去掉 “\xa0来自…” 客户端后缀后，取第一个形如时间的片段
+    text = series.where(series.notna(), '').astype(str).str.split('\xa0', n=1).str[0]
+    parts = text.str.extract(_TIME)
+    num = parts.drop(columns=['relative', 'unit']).apply(pd.to_numeric)
+
+    fields = pd.DataFrame({'month': num['month'], 'day': num['day'],
+                           'hour': num['hour'].fillna(0), 'minute': num['minute'].fillna(0)})
+    no_year = num['year'].isna()
+    times = pd.to_datetime(fields.assign(year=num['year'].fillna(as_of.year)), errors='coerce')
+    rollback = no_year & (times > as_of)
+    if rollback.any():
+        times[rollback] = pd.to_datetime(fields[rollback].assign(year=as_of.year - 1), errors='coerce')
+
+    days_back = parts['relative'].map(_DAYS_BACK)
+    relative = (as_of.normalize() - pd.to_timedelta(days_back, unit='D')
+                + pd.to_timedelta(num['rel_hour'] * 60 + num['rel_minute'], unit='min'))
+    ago = as_of - pd.to_timedelta(num['ago'] * parts['unit'].map(_UNIT_SECONDS), unit='s')
+    return times.fillna(relative).fillna(ago).to_numpy(dtype='datetime64[s]')
+
+
+def latest_dated(values):
+    """发布时间中带年份的最晚时间（pd.Timestamp）；没有带年份的发布时间时为 None"""
+    series = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        latest = series.max()
+    else:
+        text = series.where(series.notna(), '').astype(str).str.split('\xa0', n=1).str[0]
+        parts = text.str.extract(_TIME)
+        parts = parts[parts['year'].notna()]
+        if parts.empty:
+            return None
+        num = parts[['year', 'month', 'day', 'hour', 'minute']].apply(pd.to_numeric).fillna({'hour': 0, 'minute': 0})
+        latest = pd.to_datetime(num, errors='coerce').max()
+    return None if pd.isna(latest) else pd.Timestamp(latest)
+
+
+class TrendAccumulator:
+    """按 (打卡点, 日) 的可合并运行统计
+
+    每个日桶记录样本数、得分和、平方和、积极/负面数；得分按记录顺序逐条累加，
+    因此增量累加与全量重算逐位一致（与 LandmarkAccumulator 相同）
+    """
+
+    def __init__(self):
+        self.landmarks = []
+        self._index = {}
+        self._bins = {}
+        self.landmark = np.zeros(0, dtype=np.int64)
+        self.day = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0, dtype=np.float64)
+        self.sumsq = np.zeros(0, dtype=np.float64)
+        self.positive = np.zeros(0, dtype=np.int64)
+        self.negative = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.day)
+
+    def _bin_ids(self, landmarks, days):
+        """(打卡点名称, 日) -> 日桶编号，新日桶按出现顺序追加"""
+        for lm in landmarks:
+            if lm not in self._index:
+                self._index[lm] = len(self.landmarks)
+                self.landmarks.append(lm)
+        lids = np.array([self._index[lm] for lm in landmarks], dtype=np.int64)
+        keys = list(zip(lids.tolist(), days.tolist()))
+        new = [key for key in dict.fromkeys(keys) if key not in self._bins]
+        if new:
+            for key in new:
+                self._bins[key] = len(self._bins)
+            grow = len(new)
+            self.landmark = np.concatenate((self.landmark, [lid for lid, _ in new]))
+            self.day = np.concatenate((self.day, [day for _, day in new]))
+            for name in _STATS:
+                values = getattr(self, name)
+                setattr(self, name, np.concatenate((values, np.zeros(grow, dtype=values.dtype))))
+        return np.array([self._bins[key] for key in keys], dtype=np.intp)
+
+    def add_chunk(self, incidence, pair_scores, times):
+        """累加一个数据块
+
+        incidence:   该块的评论 -> 打卡点关联表
+        pair_scores: 与 incidence.pairs() 对齐的每对得分
+        times:       该块每条评论的发布时间（datetime64，NaT 不计入趋势）
+        """
+        comment_ids, landmark_ids = incidence.pairs()
+        times = np.asarray(times, dtype='datetime64[s]')[comment_ids]
+        dated = ~np.isnat(times)
+        if not dated.any():
+            return
+        scores = np.asarray(pair_scores, dtype=np.float64)[dated]
+        days = times[dated].astype('datetime64[D]').astype(np.int64)
+        landmark_ids = landmark_ids[dated]
+
+        # 每块的 (打卡点, 日) 组合很少，先去重再查编号
+        pairs, inverse = np.unique(np.stack((landmark_ids, days)), axis=1, return_inverse=True)
+        bins = self._bin_ids([incidence.landmarks[i] for i in pairs[0]], pairs[1])[inverse.ravel()]
+        np.add.at(self.count, bins, 1)
+        np.add.at(self.total, bins, scores)
+        np.add.at(self.sumsq, bins, scores * scores)
+        np.add.at(self.positive, bins, scores > POSITIVE_THRESHOLD)
+        np.add.at(self.negative, bins, scores < NEGATIVE_THRESHOLD)
+
+    def frame(self):
+        """日统计表：landmark, date, count, total, sumsq, positive, negative"""
+        return pd.DataFrame({
+            'landmark': np.array(self.landmarks, dtype=object)[self.landmark] if len(self) else [],
+            'date': self.day.astype('datetime64[D]').astype('datetime64[s]'),
+            **{name: getattr(self, name) for name in _STATS},
+        })
+
+    def state_dict(self):
+        """导出为 {名称: numpy 数组}，可直接用 np.savez 保存"""
+        return {
+            'landmarks': np.array(self.landmarks, dtype=str),
+            'landmark': self.landmark,
+            'day': self.day,
+            **{name: getattr(self, name) for name in _STATS},
+        }
+
+    @classmethod
+    def from_state_dict(cls, state):
+        acc = cls()
+        acc.landmarks = [str(lm) for lm in state['landmarks']]
+        acc._index = {lm: i for i, lm in enumerate(acc.landmarks)}
+        for name in ['landmark', 'day'] + _STATS:
+            setattr(acc, name, np.array(state[name]))
+        acc._bins = {key: i for i, key in enumerate(zip(acc.landmark.tolist(), acc.day.tolist()))}
+        return acc
+
+
+def trend_table(daily, granularity='week', window=None, drop_z=DROP_Z, min_count=DROP_MIN_COUNT,
+                min_delta=DROP_MIN_DELTA):
+    """某一粒度下各打卡点逐期的声量、得分、滚动得分与骤降标记
+
+    daily:  TrendAccumulator.frame() 的日统计表
+    window: 滚动窗口期数，默认见 GRANULARITIES；基线为本期之前 window 期的合并统计
+    空白期样本量为 0、得分为 NaN，保留在表中以便看出声量的起落
+    """
+    freq, default_window = GRANULARITIES[granularity]
+    window = window or default_window
+    binned = daily.set_index('date').groupby('landmark', sort=False)[_STATS].resample(freq).sum()
+    grouped = binned.groupby(level='landmark', sort=False)
+    rolling = grouped.rolling(window, min_periods=1).sum().droplevel(0)
+    baseline = grouped.shift(1).groupby(level='landmark', sort=False).rolling(window, min_periods=1).sum().droplevel(0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = binned['total'] / binned['count']
+        base_mean = baseline['total'] / baseline['count']
+        base_var = (baseline['sumsq'] / baseline['count'] - base_mean ** 2).clip(lower=0)
+        # 本期均值与基线均值之差的标准误，方差都用基线的（本期样本通常较少）
+        se = np.sqrt(base_var * (1 / binned['count'] + 1 / baseline['count']))
+        z = (mean - base_mean) / se.where(se > 0)
+    drop = ((binned['count'] >= min_count) & (baseline['count'] >= min_count)
+            & (base_mean - mean >= min_delta) & (z.fillna(-np.inf) <= -drop_z))
+
+    table = pd.DataFrame({
+        '打卡点': binned.index.get_level_values('landmark'),
+        '粒度': granularity,
+        '时间段': binned.index.get_level_values('date'),
+        '样本量': binned['count'].to_numpy(),
+        '情感得分': mean.round(4).to_numpy(),
+        '积极率': (binned['positive'] / binned['count']).round(3).to_numpy(),
+        '滚动样本量': rolling['count'].to_numpy(),
+        '滚动得分': (rolling['total'] / rolling['count']).round(4).to_numpy(),
+        '基线得分': base_mean.round(4).to_numpy(),
+        'z值': z.round(2).to_numpy(),
+        '骤降': drop.to_numpy(),
+    })
+    return table
+
+
+def trend_tables(daily, granularities=tuple(GRANULARITIES), **options):
+    """多个粒度的趋势表纵向拼接；options 见 trend_table"""
+    return pd.concat([trend_table(daily, g, **options) for g in granularities], ignore_index=True)
+
+
+def sudden_drops(table):
+    """趋势表中被标记为骤降的行，按 z 值从低到高"""
+    return table[table['骤降']].sort_values('z值')
@@ -2,122 +2,111 @@
 # -*- coding: utf-8 -*-
 """
 Shanghai CityWalk Sentiment Analysis System
-Analyze: Extract Landmarks -> Sentiment Analysis -> Overall Scoring
+Analyze: Extract Landmarks -> Sentiment Analysis -> Overall Scoring (the shared flow in pipeline.py)
+This module shares its name with the package, so `python -m 情感分析 analyze` must run from the repository root:
+inside 情感分析/ the -m lookup finds this file instead of the package and the relative imports fail.
 """
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-import re
-from collections import defaultdict
 import warnings
 import os
-import sys
 
-# Set Chinese font
-matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-matplotlib.rcParams['axes.unicode_minus'] = False
-warnings.filterwarnings('ignore')
+from .accumulators import LandmarkAccumulator
+from .co_mention import co_mention_products, edges_from_products
+from .comment_table import LandmarkIncidence
+from .gazetteer import GAZETTEER
+from .graph_export import DEFAULT_BATCH_SIZE, DEFAULT_THEMES, add_co_mentions, export_graph, graph_from_results
+from .incremental_state import config_fingerprint
+from .ingest import read_excel_cached
+from .lexicon_scorer import CompiledLexicon
+from .lexicon_trie import build_full_lexicon, tagging_version, tagging_words
+from .pipeline import PipelineHook, result_table, run_analysis
+from .theme_scorer import ThemeScorer, load_feature_lexicon, theme_memberships
 
+OUTPUT_DIR = r'c:\Users\27885\Desktop\citywalk\情感分析'
+CSV_PATH = os.path.join(OUTPUT_DIR, 'citywalk_analysis_results.csv')
+PNG_PATH = os.path.join(OUTPUT_DIR, 'citywalk_analysis_results.png')
+AREAS_PATH = os.path.join(OUTPUT_DIR, 'citywalk_analysis_areas.csv')
+TRENDS_PATH = os.path.join(OUTPUT_DIR, 'citywalk_analysis_trends.csv')
+STATE_PATH = os.path.join(OUTPUT_DIR, 'citywalk_analysis_state.npz')
 
-def extract_landmarks_from_data(df):
-    """从数据中自动提取所有出现的地名"""
-    landmark_keywords = [
-        '外滩', '南京路', '豫园', '城隍庙', '田子坊', '新天地',
-        '武康路', '安福路', '思南公馆', '静安寺', '陆家嘴',
-        '迪士尼', '朱家角', '枫泾', '七宝', 'M50',
-        '上生新所', '愚园路', '淮海路', '甜爱路', '多伦路',
-        '徐家汇', '龙华寺', '长乐路', '乌鲁木齐路', '陕西南路',
-        '复兴路', '嘉陵路', '淮海中路', '黄陂南路', '泰康路',
-        '湖南路', '天平路', '衡山路', '山阴路', '霍山路',
-        '茅台路', '永康路', '汾阳路', '巨鹿路', '富民路',
-        '建国西路', '建国中路', '建国路', '复兴中路', '复兴西路',
-        '陕西北路', '西康路', '威海路', '万航渡路', '昭化路',
-        '铜仁路', '华山路', '东平路', '古美路', '南阳路',
-        '凯旋路', '百乐门', '福州路', '兆丰路', '冠生园',
-        '北京东路', '北京西路', '人民广场', '人民公园',
-        '东方明珠', '世纪大道', '浦东', '浦西', '浦北',
-        '北外滩', '外白渡桥', '皇家园林', '四川北路',
-        '共青团', '虹口', '黄浦江', '长风',
-        '瑞金医院', '长海医院', '静安别墅', '常德公馆',
-        '仁德里', '三十二弄', '吴昌硕公园', '长宁公园',
-        '江南造船厂', '文采里', '恒丰路',
-    ]
-    
-    all_content = ' '.join(df['content'].dropna().astype(str).tolist())
-    found_landmarks = set()
-    
-    for keyword in landmark_keywords:
-        if keyword in all_content:
-            found_landmarks.add(keyword)
-    
-    return sorted(list(found_landmarks))
+warnings.filterwarnings('ignore')
 
 
 class SimpleSentimentAnalyzer:
     """Simple Chinese Sentiment Analyzer - Keyword-based"""
     
-    def __init__(self):
-        self.positive_words = {
-            '很棒': 0.9, '很好': 0.85, '很美': 0.85, '很漂亮': 0.9, '不错': 0.8,
-            '值得': 0.85, '推荐': 0.9, '喜欢': 0.85, '满意': 0.8, '开心': 0.85,
-            '舒服': 0.8, '优雅': 0.85, '特色': 0.75, '有趣': 0.85, '完美': 0.95,
-            '精妙': 0.85, '精致': 0.8, '亮点': 0.75, '亮丽': 0.8, '生机': 0.8,
-            '壮观': 0.8, '雄伟': 0.85, '古朴': 0.75, '气息': 0.7, '浓厚': 0.7,
-            '独特': 0.75, '创意': 0.8, '艺术': 0.75, '文化': 0.7, '历史': 0.7,
-            '安静': 0.75, '清幽': 0.8, '宁静': 0.8, '祥和': 0.85, '浪漫': 0.85,
-            '繁华': 0.7, '热闹': 0.7, '活力': 0.75, '欢乐': 0.85, '有意思': 0.8,
-            '亲近': 0.75, '底蕴': 0.7, '品味': 0.75, '迷人': 0.85, '梦幻': 0.85,
-            '高级': 0.75, '设计感': 0.8, '韵味': 0.8, '风情': 0.75, '气质': 0.75,
-        }
-        
-        self.negative_words = {
-            '很差': 0.15, '不好': 0.2, '很丑': 0.1, '讨厌': 0.05, '失望': 0.25,
-            '后悔': 0.15, '浪费': 0.2, '不满': 0.25, '难过': 0.2, '伤心': 0.15,
-            '生气': 0.2, '不舒服': 0.25, '拥挤': 0.3, '排队': 0.35, '费钱': 0.3,
-            '太高': 0.35, '过度': 0.3, '贵': 0.35, '昂贵': 0.3, '坑': 0.15,
-            '骗': 0.1, '缺少': 0.35, '没有': 0.4, '无': 0.4, '冷清': 0.35,
-            '荒凉': 0.25, '破旧': 0.2, '陈旧': 0.35, '落后': 0.3, '不方便': 0.3,
-        }
-        
-        self.negation_words = {'不', '没', '无', '别', '莫'}
+    positive_words = {
+        '很棒': 0.9, '很好': 0.85, '很美': 0.85, '很漂亮': 0.9, '不错': 0.8,
+        '值得': 0.85, '推荐': 0.9, '喜欢': 0.85, '满意': 0.8, '开心': 0.85,
+        '舒服': 0.8, '优雅': 0.85, '特色': 0.75, '有趣': 0.85, '完美': 0.95,
+        '精妙': 0.85, '精致': 0.8, '亮点': 0.75, '亮丽': 0.8, '生机': 0.8,
+        '壮观': 0.8, '雄伟': 0.85, '古朴': 0.75, '气息': 0.7, '浓厚': 0.7,
+        '独特': 0.75, '创意': 0.8, '艺术': 0.75, '文化': 0.7, '历史': 0.7,
+        '安静': 0.75, '清幽': 0.8, '宁静': 0.8, '祥和': 0.85, '浪漫': 0.85,
+        '繁华': 0.7, '热闹': 0.7, '活力': 0.75, '欢乐': 0.85, '有意思': 0.8,
+        '亲近': 0.75, '底蕴': 0.7, '品味': 0.75, '迷人': 0.85, '梦幻': 0.85,
+        '高级': 0.75, '设计感': 0.8, '韵味': 0.8, '风情': 0.75, '气质': 0.75,
+    }
+
+    negative_words = {
+        '很差': 0.15, '不好': 0.2, '很丑': 0.1, '讨厌': 0.05, '失望': 0.25,
+        '后悔': 0.15, '浪费': 0.2, '不满': 0.25, '难过': 0.2, '伤心': 0.15,
+        '生气': 0.2, '不舒服': 0.25, '拥挤': 0.3, '排队': 0.35, '费钱': 0.3,
+        '太高': 0.35, '过度': 0.3, '贵': 0.35, '昂贵': 0.3, '坑': 0.15,
+        '骗': 0.1, '缺少': 0.35, '没有': 0.4, '无': 0.4, '冷清': 0.35,
+        '荒凉': 0.25, '破旧': 0.2, '陈旧': 0.35, '落后': 0.3, '不方便': 0.3,
+    }
+
+    negation_words = {'不', '没', '无', '别', '莫'}
+
+    def __init__(self, compat=False, full_lexicon=False):
+        # Compile the lexicon once. The default scan segments with the tagging lexicon's words, so
+        # single characters inside them (别 in 特别, 贵 in 宝贵) do not score; compat=True, or a
+        # missing tagging lexicon, keeps the old per-word substring check.
+        # full_lexicon=True matches every term of the tagging lexicon through a double-array trie,
+        # with polarities propagated from the words above
+        if full_lexicon:
+            self.lexicon = build_full_lexicon(self.positive_words, self.negative_words, self.negation_words)
+        else:
+            neutral_words = () if compat else tagging_words()
+            self.lexicon = CompiledLexicon(self.positive_words, self.negative_words, self.negation_words,
+                                           mode='scan' if neutral_words else 'substring',
+                                           neutral_words=neutral_words)
     
     def analyze(self, text):
         """Analyze sentiment score (0-1)"""
-        text = str(text)
-        # For Chinese text, we don't use .lower() and split by space
-        # Instead, we check each word in our dictionary directly in the text
-        
-        positive_score = 0
-        negative_score = 0
-        
-        # Check for positive words
-        for word, score in self.positive_words.items():
-            if word in text:
-                positive_score += score
-        
-        # Check for negative words
-        for word, score in self.negative_words.items():
-            if word in text:
-                negative_score += score
-        
-        total = positive_score + negative_score
-        if total == 0:
-            return 0.5
-        
-        sentiment = positive_score / total
-        return min(1.0, max(0.0, sentiment))
-
-
-def preprocess_text(text):
-    """Text preprocessing"""
-    if not isinstance(text, str):
-        return ""
-    text = re.sub(r'http[s]?://\S+', '', text)
-    text = re.sub(r'[^\w\u4e00-\u9fa5]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+        return self.lexicon.score(text)
+    
+    def analyze_many(self, texts):
+        """Batch analysis -> BatchScores (score, pos/neg totals, matched terms)"""
+        return self.lexicon.score_many(texts)
+
+
+def make_scorer():
+    """Create the batch scorer (called once per worker process)"""
+    return SimpleSentimentAnalyzer().analyze_many
+
+
+def make_full_scorer():
+    """Batch scorer backed by the full tagging lexicon (called once per worker process)"""
+    return SimpleSentimentAnalyzer(full_lexicon=True).analyze_many
+
+
+def lexicon_version():
+    """Fingerprint of the inline sentiment words and the tagging lexicon file (version of the 'builtin' backend)
+
+    Hashes the sources only; no scorer is compiled and the tagging lexicon is not read.
+    """
+    words = SimpleSentimentAnalyzer
+    return config_fingerprint(words.positive_words, words.negative_words, sorted(words.negation_words),
+                              tagging_version())
+
+
+def full_lexicon_version():
+    """Version of the 'full' backend: the same sources, matched through the full trie"""
+    return f"{lexicon_version()}-full"
 
 
 def load_data():
@@ -125,8 +114,10 @@ def load_data():
     data_path = r'c:\Users\27885\Desktop\citywalk\去重后的数据.xlsx'
     
     try:
-        df = pd.read_excel(data_path)
+        df = read_excel_cached(data_path)
         if len(df) > 0:
+            print(f"Loaded via {'columnar cache' if df.attrs['cache']['hit'] else 'Excel (columnar cache written)'} "
+                  f"in {df.attrs['cache']['seconds']:.2f}s")
             return df
     except Exception as e:
         print(f"Error loading file: {e}")
@@ -141,163 +132,196 @@ def load_data():
     })
 
 
-def main():
-    """Main analysis function"""
-    
-    print("="*70)
-    print("Shanghai CityWalk Sentiment Analysis System")
-    print("="*70)
-    
-    # Load data
-    print("\nLoading data...")
-    df = load_data()
-    
-    # Rename columns if needed
-    if 'content' not in df.columns and len(df.columns) >= 2:
-        old_col = df.columns[1]
-        df.rename(columns={old_col: 'content'}, inplace=True)
-    
-    print(f"Loaded {len(df)} comments")
-    
-    # Preprocess
-    print("Preprocessing...")
-    df['processed'] = df['content'].apply(preprocess_text)
-    valid_count = len(df[df['processed'] != ''])
-    print(f"Valid: {valid_count}/{len(df)} ({100*valid_count/len(df):.1f}%)")
-    
-    # Extract landmarks
-    print("\nExtracting landmarks...")
-    landmarks = extract_landmarks_from_data(df)
-    
-    if not landmarks:
-        print("No landmarks found")
-        return
-    
-    print(f"Found {len(landmarks)} landmarks")
-    
-    # Extract comments for each landmark
-    print("Processing landmarks...")
-    landmark_data = defaultdict(list)
-    landmark_raw = defaultdict(list)
-    
-    for idx, row in df.iterrows():
-        content = row['content']
-        for landmark in landmarks:
-            if landmark in content:
-                landmark_data[landmark].append(content)
-                landmark_raw[landmark].append(content)
-    
-    sorted_landmarks = sorted(landmark_data.items(), key=lambda x: len(x[1]), reverse=True)
-    
-    # Analyze sentiment
-    print(f"\nAnalyzing sentiment for {len(sorted_landmarks)} landmarks...")
-    analyzer = SimpleSentimentAnalyzer()
-    results = []
-    
-    for idx, (landmark, comments) in enumerate(sorted_landmarks, 1):
-        sentiments = [analyzer.analyze(c) for c in comments]
-        
-        avg_sentiment = np.mean(sentiments)
-        positive_count = sum(1 for s in sentiments if s > 0.6)
-        negative_count = sum(1 for s in sentiments if s < 0.4)
-        positive_rate = positive_count / len(sentiments) if sentiments else 0
-        
-        if sentiments:
-            best_idx = np.argmax(sentiments)
-            sample_text = comments[best_idx][:40]
-        else:
-            sample_text = ""
-        
-        if avg_sentiment > 0.7:
-            grade = "Excellent"
-        elif avg_sentiment > 0.6:
-            grade = "Good"
-        elif avg_sentiment > 0.4:
-            grade = "Average"
+class AreaRollup(PipelineHook):
+    """Roll the landmark scores up the place hierarchy (浦东 ⊃ 陆家嘴 ⊃ 东方明珠) and save them to `path`
+
+    A comment naming both 陆家嘴 and 东方明珠 counts once toward 浦东, with the mean of their scores;
+    only places that have sub-places are written.
+    """
+
+    name = 'areas'
+
+    def __init__(self, path=AREAS_PATH):
+        self.path = path
+        self.accumulator = LandmarkAccumulator()
+
+    def add_chunk(self, chunk):
+        areas, area_scores = GAZETTEER.roll_up_scores(chunk.incidence, chunk.pair_scores)
+        self.accumulator.add_chunk(areas, chunk.comment_scores, chunk.contents, chunk.first_row,
+                                   pair_scores=area_scores)
+
+    def finish(self, run, results_df):
+        run.stage(self.name, rows=len(self.accumulator))
+        # Areas are numbered as chunks first roll them up; renumber them in gazetteer order so the
+        # bootstrap intervals do not depend on how the input was chunked
+        acc = self.accumulator
+        rank = {name: i for i, name in enumerate(GAZETTEER.names)}
+        order = np.argsort([rank[name] for name in acc.landmarks], kind='stable')
+        ordered = LandmarkAccumulator()
+        ordered.add([acc.landmarks[i] for i in order], acc.count[order], acc.total[order], acc.sumsq[order],
+                    acc.positive[order], acc.negative[order], acc.best_score[order], acc.best_row[order],
+                    [acc.best_sample[i] for i in order], acc.hist[order])
+        areas = result_table(ordered, verbose=False)
+        areas = areas[[bool(GAZETTEER.children(name)) for name in areas['打卡点']]]
+        for row in areas.head(5).itertuples(index=False):
+            print(f"  Area {row.打卡点}: {row.样本量} comments, score {row.情感得分:.2f}")
+        areas.to_csv(self.path, index=False, encoding='utf-8-sig')
+        print(f"Area roll-up saved: {self.path}")
+        return [self.path]
+
+    def state_dict(self):
+        return self.accumulator.state_dict()
+
+    def load_state(self, state):
+        self.accumulator = LandmarkAccumulator.from_state_dict(state) if state else LandmarkAccumulator()
+
+
+class GraphExportHook(PipelineHook):
+    """Export the Neo4j knowledge graph after the results are written
+
+    Per chunk it adds up the feature-lexicon theme totals, the mention counts and the co-mention products
+    X^T X, X^T diag(s) X of every landmark (see co_mention.co_mention_products). All of them are additive
+    over comments, so memory and the incremental state grow with the landmarks, not the corpus, and the
+    theme memberships and co-mention edges match a single pass over the whole corpus.
+    """
+
+    name = 'graph'
+
+    def __init__(self, graph_dir, graph_format='admin', batch_size=DEFAULT_BATCH_SIZE):
+        self.graph_dir = graph_dir
+        self.graph_format = graph_format
+        self.batch_size = batch_size
+        try:
+            self.themes = ThemeScorer(load_feature_lexicon())
+        except (FileNotFoundError, KeyError) as e:
+            print(f"Feature lexicon unavailable ({e}), using built-in theme lists")
+            self.themes = None
+        self.load_state({})
+
+    def config(self):
+        if self.themes is None:
+            return [self.name, None]
+        return [self.name, self.themes.themes, self.themes.words, self.themes.word_themes.data.tolist()]
+
+    def _ids(self, landmarks):
+        """Landmark names -> ids in first-seen order; new landmarks start from zero totals"""
+        new = [lm for lm in landmarks if lm not in self._index]
+        for lm in new:
+            self._index[lm] = len(self.landmarks)
+            self.landmarks.append(lm)
+        if new:
+            grow = len(new)
+            self.theme_totals = np.vstack((self.theme_totals, np.zeros((grow, self.theme_totals.shape[1]))))
+            self.mentions = np.concatenate((self.mentions, np.zeros(grow, dtype=np.int64)))
+            n_landmarks = len(self.landmarks)
+            for product in self.products:
+                product.resize((n_landmarks, n_landmarks))
+        return np.array([self._index[lm] for lm in landmarks], dtype=np.intp)
+
+    def add_chunk(self, chunk):
+        incidence = chunk.incidence
+        ids = self._ids(incidence.landmarks)
+        self.n_comments += incidence.n_comments
+        if not len(incidence.indices):
+            return
+        # Renumber the chunk's table to the global ids so its products add straight onto the totals
+        relabelled = LandmarkIncidence(self.landmarks, incidence.indptr, ids[incidence.indices])
+        self.mentions += relabelled.counts()
+        products = co_mention_products(relabelled, chunk.comment_scores)
+        self.products = [total + part for total, part in zip(self.products, products)]
+        if self.themes is not None:
+            totals, corpus = self.themes.theme_totals(incidence, chunk.processed)
+            self.theme_totals[ids] += totals
+            self.corpus += corpus
+
+    def finish(self, run, results_df):
+        run.stage(self.name)
+        print("Exporting graph...")
+        if self.themes is None:
+            members = DEFAULT_THEMES
         else:
-            grade = "Poor"
-        
-        results.append({
-            'Landmark': landmark,
-            'Score': f"{avg_sentiment:.2f}",
-            'Grade': grade,
-            'Positive': positive_count,
-            'Negative': negative_count,
-            'PosRate': f"{positive_rate:.1%}",
-            'Count': len(sentiments),
-            'Sample': sample_text
-        })
-        
-        if idx <= 10 or idx % 5 == 0:
-            print(f"  [{idx}/{len(sorted_landmarks)}] {landmark}: {avg_sentiment:.2f}")
-    
-    # Save CSV
-    print("\nSaving results...")
-    output_dir = r'c:\Users\27885\Desktop\citywalk\情感分析'
-    csv_path = os.path.join(output_dir, 'citywalk_analysis_results.csv')
-    
-    result_df = pd.DataFrame(results)
-    result_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-    print(f"CSV saved: {csv_path}")
-    
-    # Create visualization
-    print("Creating charts...")
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    fig.suptitle('Shanghai CityWalk Sentiment Analysis', fontsize=16, fontweight='bold')
-    
-    landmarks_top = result_df.head(10)
-    
-    # Chart 1: Score
-    ax = axes[0, 0]
-    scores = [float(x) for x in landmarks_top['Score']]
-    ax.barh(landmarks_top['Landmark'], scores, color='skyblue')
-    ax.set_xlabel('Sentiment Score')
-    ax.set_title('Top 10 Landmarks - Score')
-    ax.set_xlim(0, 1)
-    
-    # Chart 2: Review Count
-    ax = axes[0, 1]
-    counts = landmarks_top['Count'].astype(int)
-    ax.bar(range(len(landmarks_top)), counts, color='lightcoral')
-    ax.set_xticks(range(len(landmarks_top)))
-    ax.set_xticklabels(landmarks_top['Landmark'], rotation=45, ha='right')
-    ax.set_ylabel('Review Count')
-    ax.set_title('Top 10 Landmarks - Review Count')
-    
-    # Chart 3: Positive Rate
-    ax = axes[1, 0]
-    pos_rates = [float(x.rstrip('%'))/100 for x in landmarks_top['PosRate']]
-    ax.bar(range(len(landmarks_top)), pos_rates, color='lightgreen')
-    ax.set_xticks(range(len(landmarks_top)))
-    ax.set_xticklabels(landmarks_top['Landmark'], rotation=45, ha='right')
-    ax.set_ylabel('Positive Rate')
-    ax.set_title('Top 10 Landmarks - Positive Rate')
-    ax.set_ylim(0, 1)
-    
-    # Chart 4: Distribution
-    ax = axes[1, 1]
-    all_scores = [float(x) for x in result_df['Score']]
-    ax.hist(all_scores, bins=10, color='orange', edgecolor='black')
-    ax.set_xlabel('Sentiment Score')
-    ax.set_ylabel('Frequency')
-    ax.set_title('All Landmarks - Score Distribution')
-    
-    plt.tight_layout()
-    png_path = os.path.join(output_dir, 'citywalk_analysis_results.png')
-    plt.savefig(png_path, dpi=300, bbox_inches='tight')
-    print(f"PNG saved: {png_path}")
-    
-    print("\n" + "="*70)
-    print("Analysis Complete!")
-    print("="*70)
-    print(f"\nOutput files:")
-    print(f"  1. {csv_path}")
-    print(f"  2. {png_path}")
+            shares = self.themes.theme_shares(self.theme_totals, self.corpus, self.landmarks)
+            members = theme_memberships(shares, self.mentions)
+            print(f"Themes: {len(members)} memberships from {len(self.themes.words)} lexicon words")
+        graph = graph_from_results(results_df, members)
+        # Landmark-landmark co-mentions from the accumulated products
+        edges = edges_from_products(self.landmarks, self.n_comments, self.mentions, *self.products)
+        add_co_mentions(graph, edges)
+        for row in edges.head(5).itertuples():
+            print(f"  {row.start} - {row.end}: {row.count} comments, NPMI {row.npmi:.2f}, sentiment {row.sentiment:.2f}")
+        print(f"Graph: {graph.summary()}")
+        print(export_graph(graph, self.graph_dir, self.graph_format, self.batch_size))
+        return [self.graph_dir]
+
+    def state_dict(self):
+        # Co-mention products as COO triplets on the co-mention pattern (score sums are zero outside it)
+        pairs = self.products[0].tocoo()
+        rows, cols = pairs.row, pairs.col
+        return {
+            'landmarks': np.array(self.landmarks, dtype=str),
+            'n_comments': np.array(self.n_comments),
+            'mentions': self.mentions,
+            'pair_rows': rows,
+            'pair_cols': cols,
+            'pair_count': pairs.data,
+            'pair_score': np.asarray(self.products[1][rows, cols]).ravel(),
+            'pair_scored': np.asarray(self.products[2][rows, cols]).ravel(),
+            'theme_totals': self.theme_totals,
+            'corpus': self.corpus,
+        }
+
+    def load_state(self, state):
+        from scipy import sparse
+        n_themes = len(self.themes.themes) if self.themes is not None else 0
+        self.landmarks = [str(lm) for lm in state.get('landmarks', ())]
+        self._index = {lm: i for i, lm in enumerate(self.landmarks)}
+        n_landmarks = len(self.landmarks)
+        self.n_comments = int(state.get('n_comments', 0))
+        self.mentions = np.asarray(state.get('mentions', np.zeros(n_landmarks)), dtype=np.int64)
+        rows = np.asarray(state.get('pair_rows', ()), dtype=np.intp)
+        cols = np.asarray(state.get('pair_cols', ()), dtype=np.intp)
+        self.products = [sparse.csr_matrix((np.asarray(state.get(key, ()), dtype=float), (rows, cols)),
+                                           shape=(n_landmarks, n_landmarks))
+                         for key in ('pair_count', 'pair_score', 'pair_scored')]
+        self.theme_totals = np.asarray(state.get('theme_totals', np.zeros((n_landmarks, n_themes))), dtype=float)
+        self.corpus = np.asarray(state.get('corpus', np.zeros(n_themes)), dtype=float)
+
+
+def main(analyzer='builtin', graph_dir=None, graph_format='admin', batch_size=DEFAULT_BATCH_SIZE, state_path=None,
+         plot_only=False, output_dir=OUTPUT_DIR, **options):
+    """Main analysis function, run through pipeline.run_analysis (streaming, incremental state and trends included)
+
+    analyzer:     scoring backend from backends.BACKENDS, e.g. 'builtin' (inline sentiment words),
+                  'full' (whole tagging lexicon, double-array trie) or 'snownlp'
+    graph_dir:    if given, also export the Neo4j graph there
+    graph_format: 'admin' (neo4j-admin import CSVs) or 'cypher' (batched UNWIND script)
+    batch_size:   rows per UNWIND batch for the cypher format
+    state_path:   incremental state file, STATE_PATH by default
+    plot_only:    skip the analysis and re-render the chart from the saved results CSV
+    output_dir:   directory for the results, chart, area roll-up, trends and state files
+    options:      workers, input_path, chunksize, incremental, report_path, profile, plot, max_landmarks,
+                  paginate, attribution, clause_window, trends, as_of; see pipeline.run_analysis
+
+    Landmarks are matched on the raw text against the whole gazetteer; the area roll-up (AREAS_PATH)
+    and the graph export run as pipeline hooks.
+    """
+    def output(path):
+        return os.path.join(output_dir, os.path.basename(path))
+
+    hooks = [AreaRollup(output(AREAS_PATH))]
+    if graph_dir and not plot_only:
+        hooks.append(GraphExportHook(graph_dir, graph_format, batch_size))
+    return run_analysis('情感分析', load_data, analyzer, state_path=state_path or output(STATE_PATH),
+                        plot_only=plot_only, places=GAZETTEER, match='raw', hooks=hooks, csv_path=output(CSV_PATH),
+                        png_path=output(PNG_PATH), trends_path=output(TRENDS_PATH), **options)
 
 
 if __name__ == "__main__":
+    from .cli import parse_command
+    kwargs = parse_command('analyze')
+    
     try:
-        main()
+        main(**kwargs)
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
@@ -1,30 +1,59 @@
-import pandas as pd
+# 在仓库根目录运行：python -m 数据.去重 [参数]（去重引擎与分块读写在 情感分析 包中）
+import argparse
 import os
 
+from 情感分析.dedup import DEFAULT_NUM_PERM, DEFAULT_THRESHOLD, Deduplicator
+from 情感分析.ingest import DEFAULT_CHUNKSIZE, find_content_column, iter_chunks, write_chunks
+
 desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
 # 桌面的“原数据.xlsx”路径
 input_file_path = os.path.join(desktop_path, "原数据.xlsx")
 # 去重后保存到桌面，文件名“去重后的数据.xlsx”
 output_file_path = os.path.join(desktop_path, "去重后的数据.xlsx")
 
+parser = argparse.ArgumentParser(description="逐块去除完全重复的博文（加 --near 时同时去除近似重复）")
+parser.add_argument("--input", default=input_file_path, help="输入文件（xlsx/csv/jsonl/parquet），默认桌面的原数据.xlsx")
+parser.add_argument("--output", default=output_file_path, help="输出文件，默认桌面的去重后的数据.xlsx；大数据量建议用 .csv/.parquet")
+parser.add_argument("--report", default=None, help="重复簇报告 CSV，默认与输出文件同目录的“去重报告.csv”")
+parser.add_argument("--near", action="store_true", help="同时去除近似重复的博文（MinHash + LSH），默认只去除完全重复的行")
+parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help=f"近似重复的相似度阈值（默认 {DEFAULT_THRESHOLD}，需 --near）")
+parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM, help=f"MinHash 签名长度（默认 {DEFAULT_NUM_PERM}）")
+parser.add_argument("--bands", type=int, default=None, help="LSH 分段数（默认按阈值自动选择）")
+parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help=f"每块行数（默认 {DEFAULT_CHUNKSIZE}）")
+args = parser.parse_args()
+
+report_path = args.report or os.path.join(os.path.dirname(os.path.abspath(args.output)), "去重报告.csv")
+
 try:
-    # 读取桌面的Excel文件
-    df_original = pd.read_excel(input_file_path)
-    print("✅ 成功读取桌面的原数据.xlsx")
-    print(f"原始数据行数：{df_original.shape[0]} 行")
+    dedup = Deduplicator(threshold=args.threshold, num_perm=args.num_perm, bands=args.bands, near=args.near)
+
+    def deduplicated_chunks():
+        content_column = None
+        for chunk in iter_chunks(args.input, args.chunksize):
+            if content_column is None:
+                content_column = find_content_column(chunk.columns) or chunk.columns[-1]
+                print(f"✅ 成功读取 {args.input}" + (f"，近似去重依据列：{content_column}" if args.near else ""))
+            yield dedup.process(chunk, content_column)
+            print(f"   已处理 {dedup.rows_seen} 行")
+
+    # 逐块检测并去重
+    kept = write_chunks(deduplicated_chunks(), args.output)
+    print(f"原始数据行数：{dedup.rows_seen} 行")
+    print(f"检测到重复行数：{dedup.exact_duplicates} 行（完全重复），{dedup.near_duplicates} 行（近似重复）")
+    print(f"去重后数据行数：{kept} 行")
+    print(dedup.summary())
 
-    # 检测并去重
-    duplicate_count = df_original.duplicated(keep='first').sum()
-    df_deduplicated = df_original.drop_duplicates(keep='first')
-    print(f"检测到重复行数：{duplicate_count} 行")
-    print(f"去重后数据行数：{df_deduplicated.shape[0]} 行")
+    # 重复簇报告：每条被去除的记录及其保留的代表行
+    report = dedup.report()
+    report.to_csv(report_path, index=False, encoding="utf-8-sig")
+    clusters = dedup.clusters()
+    print(f"📋 共 {len(clusters)} 个重复簇，明细已保存：{report_path}")
+    if len(clusters):
+        print(clusters.head(10).to_string(index=False))
 
-    # 保存到桌面
-    df_deduplicated.to_excel(output_file_path, index=False)
-    print(f"✅ 去重完成！文件已保存到桌面：{output_file_path}")
+    print(f"✅ 去重完成！文件已保存：{args.output}")
 
 except FileNotFoundError:
-    print("❌ 错误：桌面上没找到“原数据.xlsx”，请确认文件在桌面且名字正确！")
+    print(f"❌ 错误：没找到输入文件“{args.input}”，请确认文件存在且名字正确！")
 except Exception as e:
     print(f"❌ 运行出错：{str(e)}")
-    
\ No newline at end of file